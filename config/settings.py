@@ -49,12 +49,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # En tête pour mesurer toute la chaîne (voir whichgame/metrics.py)
+    'whichgame.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'whichgame.middleware.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -83,14 +86,69 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# SQLite partagée entre les workers web et les crons (voir whichgame/db.py) :
+# - WAL : les lectures ne sont jamais bloquées par une écriture en cours
+# - synchronous=NORMAL : pas de fsync à chaque commit (sûr en WAL, seul le dernier commit peut être perdu sur coupure)
+# - mmap_size : lectures via la mémoire mappée (256 Mo)
+SQLITE_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA mmap_size=268435456',
+]
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        # DATABASE_PATH : base séparée pour les benchmarks (catalogue synthétique, voir generate_catalog)
+        'NAME': config('DATABASE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
+        # Connexions persistantes : les PRAGMA ne sont rejoués qu'à l'ouverture
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=600, cast=int),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # busy_timeout (s) : un écrivain attend le verrou au lieu de lever "database is locked"
+            'timeout': 20,
+            # BEGIN IMMEDIATE : le verrou d'écriture est pris au début de la transaction (et attendu
+            # via busy_timeout) au lieu d'échouer au milieu, quand une lecture devient une écriture
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': ';'.join(SQLITE_PRAGMAS),
+        },
+        # Base de test dans un fichier (et non en mémoire) : WAL, busy timeout et verrous identiques
+        # à la production, pour le test de concurrence de whichgame/tests.py
+        'TEST': {
+            'NAME': config('TEST_DATABASE_PATH', default=str(BASE_DIR / 'test_db.sqlite3')),
+        },
     }
 }
 
 
+# Cache
+# Cache fichier partagé entre les workers web et les crons (invalidation visible par tous les process)
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / 'cache')),
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+        },
+    },
+    # Cartes HTML de l'explorateur (game_card.html) : en mémoire du process. Le cache fichier coûte une
+    # ouverture + unpickle par carte, et à chaque écriture le comptage des entrées liste tout le
+    # répertoire. Les clés contiennent updated_at et la version des recommandations : rien à invalider
+    # entre process. Environ 11 Ko par carte, soit une vingtaine de Mo par worker.
+    'fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'whichgame-fragments',
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {
+            'MAX_ENTRIES': 2000,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -155,6 +213,47 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 TAILWIND_APP_NAME = 'theme'
 INTERNAL_IPS = ["127.0.0.1"]
 
+# File d'attente des commandes admin (whichgame/jobs.py)
+# True : chaque mise en file lance un worker `run_jobs --once` détaché.
+# False : un worker permanent (`python manage.py run_jobs`) tourne à côté (systemd, supervisor...).
+JOBS_SPAWN_WORKER = config('JOBS_SPAWN_WORKER', default=True, cast=bool)
+
+# Budget de requêtes partagé par les crons (whichgame/ratelimit.py)
+# Base SQLite dédiée, pour ne jamais verrouiller db.sqlite3
+RATE_LIMIT_DB = config('RATE_LIMIT_DB', default=str(BASE_DIR / 'ratelimit.sqlite3'))
+# Requêtes par seconde et rafale maximale, par API
+RATE_LIMITS = {
+    'igdb': (4.0, 4),        # Limite officielle IGDB : 4 req/s
+    'cheapshark': (1.0, 2),  # Pas de limite publiée : rythme prudent pour éviter les 429
+}
+
+# URL de base de chaque API externe. FAKE_UPSTREAMS_URL (ex: http://127.0.0.1:8765) les fait toutes pointer
+# vers `manage.py fake_upstreams` (benchmarks, CI) ; chaque URL reste surchargeable individuellement.
+FAKE_UPSTREAMS_URL = config('FAKE_UPSTREAMS_URL', default='').rstrip('/')
+UPSTREAM_URLS = {
+    'igdb': config('IGDB_API_URL', default=f'{FAKE_UPSTREAMS_URL}/igdb/v4' if FAKE_UPSTREAMS_URL else 'https://api.igdb.com/v4'),
+    'twitch': config('TWITCH_TOKEN_URL', default=f'{FAKE_UPSTREAMS_URL}/twitch/oauth2/token' if FAKE_UPSTREAMS_URL else 'https://id.twitch.tv/oauth2/token'),
+    'cheapshark': config('CHEAPSHARK_API_URL', default=f'{FAKE_UPSTREAMS_URL}/cheapshark/api/1.0' if FAKE_UPSTREAMS_URL else 'https://www.cheapshark.com/api/1.0'),
+    'hltb': config('HLTB_BASE_URL', default=f'{FAKE_UPSTREAMS_URL}/hltb/' if FAKE_UPSTREAMS_URL else 'https://howlongtobeat.com/'),
+}
+
+# Cache disque des réponses des API externes (whichgame/http_cache.py), `--no-cache` pour l'ignorer
+HTTP_CACHE_ENABLED = config('HTTP_CACHE_ENABLED', default=True, cast=bool)
+HTTP_CACHE_DB = config('HTTP_CACHE_DB', default=str(BASE_DIR / 'http_cache.sqlite3'))
+HTTP_CACHE_MAX_MB = config('HTTP_CACHE_MAX_MB', default=200, cast=int)
+# Fraîcheur (s) par API ou par 'api:endpoint' ; 0 = jamais en cache
+HTTP_CACHE_TTLS = {
+    'igdb': 6 * 3600,
+    'igdb:game_time_to_beats': 7 * 86400,  # Les durées de jeu bougent peu
+    'cheapshark': 3600,
+    'cheapshark:deals': 15 * 60,           # Les promos changent vite
+}
+
+# Métriques par vue (whichgame/metrics.py), exposées sur /metrics au staff
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+# Jeton du scraper Prometheus (`Authorization: Bearer <jeton>`), vide = staff uniquement
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
 # Django Sites Framework
 SITE_ID = 1
 
@@ -222,6 +321,7 @@ JAZZMIN_SETTINGS = {
         
         "whichgame.Game": "fas fa-gamepad",
         "whichgame.GameCollection": "fas fa-layer-group",
+        "whichgame.CommandJob": "fas fa-tasks",
     },
     
     "default_icon_parents": "fas fa-chevron-circle-right",
@@ -6,7 +6,7 @@ from . import settings
 from django.conf.urls.static import static
 from django.urls import path, include
 from django.views.generic import TemplateView
-from whichgame.views import run_command, import_franchise_view
+from whichgame.views import run_command, import_franchise_view, job_detail, job_status, metrics_view
 from django.contrib.sitemaps.views import sitemap
 from whichgame.sitemaps import StaticViewSitemap, GameSitemap
 from django.conf.urls.i18n import i18n_patterns
@@ -23,6 +23,7 @@ urlpatterns = [
     path('i18n/', include('django.conf.urls.i18n')),
     path('robots.txt', TemplateView.as_view(template_name="robots.txt", content_type="text/plain")),
     path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # ---------------------------------------------------------
@@ -34,6 +35,8 @@ urlpatterns += i18n_patterns(
     # URLs d'administration
     path('admin/cmd/<str:cmd_name>/', run_command, name='run_admin_command'),
     path('admin/wizard/franchise/', import_franchise_view, name='import_franchise_wizard'),
+    path('admin/jobs/<int:pk>/', job_detail, name='admin_job_detail'),
+    path('admin/jobs/<int:pk>/status/', job_status, name='admin_job_status'),
     path('admin/', admin.site.urls),
     
     path('about/', TemplateView.as_view(template_name="about.html"), name='about'),
@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Préchargement des index en mémoire (recommandations wishlist, autocomplétion) avant la première requête
+from whichgame import feature_index, search_index  # noqa: E402
+
+try:
+    feature_index.warm()
+    search_index.warm()
+except Exception as e:  # Base pas encore migrée, etc. : l'index se chargera à la première requête
+    print(f"⚠️ [WSGI] Préchargement de l'index ignoré : {e}")
@@ -1,33 +1,198 @@
+from datetime import date
+
 from django.contrib import admin
-from .models import Game, GameCollection
+from django.core.paginator import Paginator
+from django.db.models import Count, Q
+from django.urls import reverse
+from django.utils.html import format_html, format_html_join
+from . import auto_collections, ledger, search_index, text
+from .models import Game, GameCollection, CommandJob, CommandRun, RequestProfile
+
+# Jeux trouvés au plus par l'index de préfixes pour une recherche admin
+ADMIN_SEARCH_LIMIT = 500
+
+# Au-delà, la liste des jeux n'est plus comptée exactement (pagination bornée à ce nombre de lignes)
+ADMIN_COUNT_LIMIT = 10_000
+
+class CappedCountPaginator(Paginator):
+    """
+    COUNT(*) borné à ADMIN_COUNT_LIMIT lignes : SQLite n'a pas d'estimation gratuite du nombre de lignes,
+    on compte donc au plus ADMIN_COUNT_LIMIT lignes (sans tri). Exact en dessous ; au-dessus, les
+    pages au-delà de la limite ne sont plus proposées (la recherche et les filtres y mènent).
+    """
+
+    @property
+    def count(self):
+        if not hasattr(self, '_capped_count'):
+            self._capped_count = self.object_list.order_by()[:ADMIN_COUNT_LIMIT].count()
+        return self._capped_count
+
+class DecadeFilter(admin.SimpleListFilter):
+    """Décennies fixes (aucun SELECT DISTINCT sur release_year), filtrées par plage sur la colonne indexée."""
+    title = "décennie"
+    parameter_name = 'decade'
+
+    def lookups(self, request, model_admin):
+        current = date.today().year // 10 * 10
+        return [(str(decade), f"{decade}s") for decade in range(current, 1970, -10)] + [('older', "Avant 1980")]
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value == 'older':
+            return queryset.filter(release_year__lt=1980)
+        if value and value.isdigit():
+            return queryset.filter(release_year__gte=int(value), release_year__lt=int(value) + 10)
+        return queryset
+
+class GameTypeFilter(admin.SimpleListFilter):
+    """Types IGDB connus, listés sans parcourir la table."""
+    title = "type"
+    parameter_name = 'game_type'
+
+    def lookups(self, request, model_admin):
+        return [('0', "Jeu principal"), ('8', "Remake"), ('9', "Remaster")]
+
+    def queryset(self, request, queryset):
+        if self.value() in ('0', '8', '9'):
+            return queryset.filter(game_type=int(self.value()))
+        return queryset
 
 class GameAdmin(admin.ModelAdmin):
     # 1. LA BARRE DE RECHERCHE 🔍
-    # Permet de chercher par Titre OU par Slug (utile si deux jeux ont le même nom)
-    search_fields = ['title', 'slug']
+    # Même normalisation que l'autocomplétion du site (voir get_search_results) : "witcher 3",
+    # "The Witcher" ou un slug exact. Sert aussi l'autocomplete des collections.
+    search_fields = ['title']
+    ordering = ('-total_rating_count',)
 
     # 2. LES COLONNES VISIBLES DANS LA LISTE 📋
     # Affiche ces infos directement dans le tableau
     list_display = ('title', 'rating', 'total_rating_count', 'price_current', 'playtime_main', 'release_year')
 
     # 3. FILTRES LATÉRAUX (Optionnel mais pratique)
-    # Pour filtrer rapidement par année ou type de jeu (Main, Remake...)
-    list_filter = ('release_year', 'game_type')
+    # Pour filtrer rapidement par décennie ou type de jeu (Main, Remake...), avec des choix fixes
+    list_filter = (DecadeFilter, GameTypeFilter)
+
+    # Pas de second COUNT(*) sur toute la table quand une recherche ou un filtre est actif,
+    # et un COUNT(*) borné pour la pagination elle-même
+    show_full_result_count = False
+    paginator = CappedCountPaginator
 
     # 4. ÉDITION RAPIDE (Optionnel)
     # Permet de modifier le temps de jeu directement depuis la liste sans ouvrir la fiche !
     list_editable = ('playtime_main', 'price_current')
 
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Recherche sans LIKE '%...%' sur toute la table :
+        - index de préfixes du site (titres et débuts de mots des jeux notés, en mémoire) ;
+        - préfixe de `clean_title` (plage sur la colonne indexée, tous les jeux, fantômes compris) ;
+        - slug, id ou IGDB id exacts.
+        """
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+
+        condition = Q(slug=term)
+        if term.isdigit():
+            condition |= Q(pk=int(term)) | Q(igdb_id=int(term))
+
+        prefix = text.clean_title(term)
+        if prefix:
+            ids = [game_id for game_id, *_ in search_index.get_index().search(term, limit=ADMIN_SEARCH_LIMIT)]
+            condition |= Q(id__in=ids) | Q(clean_title__gte=prefix, clean_title__lt=prefix + '{') # '{' suit 'z'
+        return queryset.filter(condition), False
+
 @admin.register(GameCollection)
 class GameCollectionAdmin(admin.ModelAdmin):
-    list_display = ('title', 'theme_color', 'is_active', 'display_order', 'count_games')
+    list_display = ('title', 'theme_color', 'is_active', 'display_order', 'count_games', 'is_auto', 'refreshed_at')
     list_editable = ('is_active', 'display_order', 'theme_color')
-    filter_horizontal = ('games',) # Indispensable pour gérer facilement la liste des jeux
+    list_filter = ('is_auto', 'is_active')
+    # Recherche asynchrone (GameAdmin.get_search_results) : la page ne charge que les jeux déjà inclus
+    autocomplete_fields = ('games',)
     search_fields = ('title',)
+    actions = ['refresh_auto']
+
+    def get_readonly_fields(self, request, obj=None):
+        # Collection automatique : les jeux viennent de url_filter (refresh_collections), pas de la saisie
+        if obj is not None and obj.is_auto:
+            return ('games', 'refreshed_at')
+        return ('refreshed_at',)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Filtre ou limite modifiés : la collection est recalculée tout de suite, sans attendre le planificateur
+        if form.instance.is_auto:
+            collection = form.instance
+            collection.ranking = [] # Force l'écriture même si l'ordre calculé n'a pas bougé
+            auto_collections.refresh(collection)
+
+    @admin.action(description="Recalculer les collections automatiques sélectionnées")
+    def refresh_auto(self, request, queryset):
+        results = list(auto_collections.refresh_all(queryset))
+        changed = sum(result.changed for result in results)
+        self.message_user(request, f"{len(results)} collection(s) automatique(s) recalculée(s), {changed} modifiée(s).")
+
+    def get_queryset(self, request):
+        # Nombre de jeux calculé pour toutes les lignes en une seule requête
+        return super().get_queryset(request).annotate(games_count=Count('games'))
 
     def count_games(self, obj):
-        return obj.games.count()
+        return obj.games_count
     count_games.short_description = "Jeux inclus"
+    count_games.admin_order_field = 'games_count'
+
+@admin.register(CommandJob)
+class CommandJobAdmin(admin.ModelAdmin):
+    list_display = ('id', '__str__', 'status', 'created_at', 'duration', 'follow_link')
+    list_filter = ('status', 'command')
+    readonly_fields = ('command', 'args', 'dedupe_key', 'status', 'output', 'error', 'created_at', 'started_at', 'finished_at', 'heartbeat_at')
+
+    def has_add_permission(self, request):
+        return False # Les jobs se lancent depuis les boutons d'action, pas à la main
+
+    def follow_link(self, obj):
+        return format_html('<a href="{}">Suivre</a>', reverse('admin_job_detail', args=[obj.pk]))
+    follow_link.short_description = "Sortie"
+
+@admin.register(CommandRun)
+class CommandRunAdmin(admin.ModelAdmin):
+    list_display = ('command', 'started_at', 'status', 'duration', 'rows_written', 'rows_skipped', 'throughput', 'http_requests', 'http_throttled')
+    list_filter = ('status', 'command')
+    date_hierarchy = 'started_at'
+    readonly_fields = ('command', 'args', 'status', 'error', 'started_at', 'finished_at', 'duration', 'phases', 'http', 'http_requests', 'http_throttled', 'rows', 'rows_written', 'rows_skipped')
+    # Tableau de bord (durées et débit par commande) au-dessus de la liste
+    change_list_template = 'admin/whichgame/commandrun/change_list.html'
+
+    def has_add_permission(self, request):
+        return False # Chaque commande de données enregistre ses exécutions (voir ledger.py)
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {**(extra_context or {}), 'dashboard': ledger.dashboard()}
+        return super().changelist_view(request, extra_context)
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'method', 'path', 'view_name', 'status_code', 'duration_ms', 'sql_count', 'sql_time_ms', 'user')
+    list_filter = ('view_name', 'status_code')
+    search_fields = ('path',)
+    fields = ('path', 'view_name', 'method', 'status_code', 'user', 'created_at', 'duration_ms', 'sql_count', 'sql_time_ms', 'samples', 'report_display', 'sql_display')
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False # Les profils se créent avec ?_profile=1 sur n'importe quelle page
+
+    def report_display(self, obj):
+        return format_html('<pre style="white-space:pre; overflow-x:auto; font-size:12px;">{}</pre>', obj.report)
+    report_display.short_description = "Rapport du profileur"
+
+    def sql_display(self, obj):
+        # Requêtes les plus lentes en premier
+        rows = format_html_join(
+            '\n', '<tr><td style="white-space:nowrap;">{} ms</td><td><code>{}</code><br><small>{}</small></td></tr>',
+            ((query['ms'], query['sql'], query['params']) for query in sorted(obj.sql_log, key=lambda q: -q['ms'])),
+        )
+        return format_html('<table>{}</table>', rows)
+    sql_display.short_description = "Requêtes SQL"
 
 admin.site.register(Game, GameAdmin)
 
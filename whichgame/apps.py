@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class WhichgameConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'whichgame'
+
+    def ready(self):
+        from . import signals  # noqa: F401 (branche les receivers d'invalidation du cache)
@@ -0,0 +1,101 @@
+"""
+Collections automatiques : les jeux d'une `GameCollection(is_auto=True)` sont ceux que donne
+l'explorateur pour son `url_filter` ("?price=10&duration=short"), dans le même ordre.
+
+La liste est matérialisée dans la table M2M (la home la lit avec un simple prefetch) et
+recalculée par `refresh_collections`. Pour chaque collection :
+
+- une requête sur les IDs (mêmes filters.filter_games / order_games que HomeListView) ;
+- si la liste est identique à `ranking`, rien n'est écrit ;
+- si seul l'ordre a changé, seule `ranking` est mise à jour ;
+- sinon, une transaction courte supprime les liens sortants et crée les liens entrants
+  (un DELETE ... IN et un bulk_create, jamais un clear() suivi d'une réécriture complète).
+"""
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from django.db import transaction
+from django.http import QueryDict
+from django.utils import timezone
+
+from .filters import FILTER_PARAMS, filter_games, order_games
+from .models import Game, GameCollection
+
+
+@dataclass
+class RefreshResult:
+    """Bilan du recalcul d'une collection."""
+    collection: GameCollection
+    added: int = 0
+    removed: int = 0
+    reordered: bool = False
+    unknown_params: tuple = ()
+
+    @property
+    def changed(self):
+        return bool(self.added or self.removed or self.reordered)
+
+
+def parse_filter(url_filter):
+    """'?price=10&duration=short' (ou '/en/explorer/?price=10') -> QueryDict."""
+    url_filter = (url_filter or '').strip()
+    query = urlsplit(url_filter).query if '?' in url_filter else url_filter.lstrip('?')
+    return QueryDict(query)
+
+
+def compute_ids(collection):
+    """IDs des jeux de la collection, dans l'ordre de l'explorateur, bornés à `auto_limit`."""
+    params = parse_filter(collection.url_filter)
+    queryset = order_games(filter_games(Game.objects.all(), params), params)
+    return list(queryset.values_list('id', flat=True)[:collection.auto_limit])
+
+
+def refresh(collection, dry_run=False):
+    """Recalcule une collection automatique. Retourne un RefreshResult (rien n'est écrit si dry_run)."""
+    params = parse_filter(collection.url_filter)
+    result = RefreshResult(
+        collection=collection,
+        unknown_params=tuple(key for key in params if key not in FILTER_PARAMS and key != 'page'),
+    )
+
+    ids = compute_ids(collection)
+    if ids == collection.ranking:
+        return result
+
+    # 1. Différence avec les liens actuels (une seule requête sur la table M2M)
+    Through = GameCollection.games.through
+    current = set(Through.objects.filter(gamecollection_id=collection.id).values_list('game_id', flat=True))
+    wanted = set(ids)
+    removed = current - wanted
+    added = wanted - current
+    result.added, result.removed = len(added), len(removed)
+    result.reordered = not added and not removed
+
+    if dry_run:
+        return result
+
+    # 2. Écriture du seul delta. Les signaux m2m_changed ne sont pas émis (comme les imports en masse) :
+    # la home lit les collections sans cache de page, rien d'autre à invalider.
+    with transaction.atomic():
+        if removed:
+            Through.objects.filter(gamecollection_id=collection.id, game_id__in=removed).delete()
+        if added:
+            Through.objects.bulk_create(
+                [Through(gamecollection_id=collection.id, game_id=game_id) for game_id in ids if game_id in added],
+                ignore_conflicts=True,
+            )
+        collection.ranking = ids
+        update_fields = ['ranking']
+        if added or removed:
+            collection.refreshed_at = timezone.now()
+            update_fields.append('refreshed_at')
+        collection.save(update_fields=update_fields)
+    return result
+
+
+def refresh_all(queryset=None, dry_run=False):
+    """Recalcule les collections automatiques de `queryset` (toutes par défaut). Générateur de RefreshResult."""
+    if queryset is None:
+        queryset = GameCollection.objects.all()
+    for collection in queryset.filter(is_auto=True).order_by('display_order', 'id'):
+        yield refresh(collection, dry_run=dry_run)
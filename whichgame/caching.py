@@ -0,0 +1,193 @@
+"""
+Cache des pages publiques.
+
+Les clés sont construites ici pour que les vues (lecture) et les signaux (invalidation)
+utilisent exactement le même format.
+"""
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+
+# Durée de vie max d'une page en cache (l'invalidation se fait surtout via les signaux)
+GAME_DETAIL_TIMEOUT = 60 * 60 * 24
+
+# Durée de vie d'une carte du catalogue en cache (la clé change dès que le jeu est modifié)
+GAME_CARD_TIMEOUT = 60 * 60 * 24
+
+# Durée de vie d'une page de l'API de l'explorateur (courte : le filtre deal=dropped dépend de l'heure)
+EXPLORER_API_TIMEOUT = 60 * 5
+
+# Compteurs de version : les incrémenter invalide d'un coup tout ce qui les utilise dans ses clés
+RECOMMENDATIONS = 'recommendations'
+CATALOG = 'catalog' # Changé après les écritures sur Game (signaux + commandes qui utilisent .update(), voir schedule_bump)
+
+# Pendant une commande, un même compteur change au plus une fois par intervalle (puis une fois à la fin) :
+# sinon chaque worker web reconstruirait ses index en mémoire toutes les quelques secondes
+BUMP_INTERVAL = 60
+
+# Le {% csrf_token %} est remplacé par ce marqueur avant la mise en cache,
+# puis par le vrai jeton du visiteur à chaque réponse.
+CSRF_PLACEHOLDER = 'WHICHGAME-CSRF-PLACEHOLDER'
+
+
+def game_detail_key(slug, language):
+    return f"game_detail:{language}:{slug}"
+
+
+def get_game_detail(slug, language, updated_at):
+    """Retourne le HTML en cache, seulement s'il correspond encore à `updated_at` en base."""
+    entry = cache.get(game_detail_key(slug, language))
+    if entry and entry[0] == updated_at:
+        return entry[1]
+    return None
+
+
+def set_game_detail(slug, language, updated_at, content):
+    cache.set(game_detail_key(slug, language), (updated_at, content), GAME_DETAIL_TIMEOUT)
+
+
+def explorer_api_key(query, catalog_version, recommendations_version, window=''):
+    """
+    Page JSON de l'explorateur : la clé change avec le catalogue, les recommandations (cartes "similaires")
+    et, pour deal=dropped, le jour de début de la fenêtre (`window`, voir filters.drop_window_key).
+    """
+    digest = hashlib.sha1(query.encode()).hexdigest()
+    return f"explorer_api:{catalog_version}:{recommendations_version}:{window or '-'}:{digest}"
+
+
+def invalidate_game(game):
+    """Supprime les pages en cache d'un jeu, pour toutes les langues du site."""
+    cache.delete_many([game_detail_key(game.slug, code) for code, _ in settings.LANGUAGES])
+
+
+def get_version(name):
+    """Version courante d'un jeu de données (ex: les recommandations). Démarre à 1."""
+    key = f"version:{name}"
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key, 1)
+    return version
+
+
+def bump_version(name):
+    """
+    Passe à une nouvelle version : toutes les entrées qui en dépendent deviennent obsolètes.
+    La version est un horodatage (ns), pas un compteur : cache.incr() n'est pas atomique entre
+    processus avec FileBasedCache, alors qu'un simple set() ne peut pas perdre une invalidation
+    (deux changements simultanés donnent chacun une valeur jamais vue).
+    """
+    version = time.time_ns()
+    cache.set(f"version:{name}", version, None)
+    return version
+
+
+# --- Changements de version groupés (signaux, commandes de données) ---
+
+_bump_lock = threading.Lock()
+_pending = set()    # Compteurs modifiés dont le changement de version n'a pas encore été publié
+_last_bump = {}     # {nom: time.monotonic() du dernier changement publié par ce processus}
+_batch_depth = 0    # > 0 pendant une commande de données (voir batched_bumps)
+
+
+def schedule_bump(name):
+    """
+    Demande un changement de version de `name` après le commit de la transaction en cours.
+    Plusieurs demandes dans une même transaction n'en donnent qu'un ; pendant une commande
+    (batched_bumps), au plus un par BUMP_INTERVAL, le dernier à la fin de la commande.
+    """
+    with _bump_lock:
+        _pending.add(name)
+        due = not _batch_depth or time.monotonic() - _last_bump.get(name, float('-inf')) >= BUMP_INTERVAL
+    if due:
+        transaction.on_commit(lambda: _publish(name))
+
+
+def _publish(name):
+    with _bump_lock:
+        if name not in _pending:
+            return # Déjà publié par un autre on_commit de la même transaction
+        _pending.discard(name)
+        _last_bump[name] = time.monotonic()
+    bump_version(name)
+
+
+@contextmanager
+def batched_bumps():
+    """Regroupe les schedule_bump() du bloc (une commande entière, voir ledger.TrackedCommand)."""
+    global _batch_depth
+    with _bump_lock:
+        _batch_depth += 1
+    try:
+        yield
+    finally:
+        with _bump_lock:
+            _batch_depth -= 1
+            names = list(_pending) if not _batch_depth else []
+        for name in names:
+            _publish(name)
+
+
+class VersionedSingleton:
+    """
+    Objet coûteux gardé en mémoire par worker (index de recherche, de recommandations...).
+    Reconstruit par `factory(version)` quand l'un des compteurs `names` a changé.
+    Les compteurs sont relus au plus toutes les `check_interval` secondes.
+
+    Seule la première construction bloque la requête : ensuite, la reconstruction se fait dans
+    un thread et l'ancien objet continue d'être servi jusqu'à ce que le nouveau soit prêt.
+    """
+
+    def __init__(self, factory, *names, check_interval=5.0):
+        self.factory = factory
+        self.names = names
+        self.check_interval = check_interval
+        self._value = None
+        self._version = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._rebuilding = False
+
+    def get(self):
+        now = time.monotonic()
+        if self._value is not None and now - self._last_check < self.check_interval:
+            return self._value
+
+        version = tuple(get_version(name) for name in self.names)
+        self._last_check = now
+        if self._value is not None and self._version == version:
+            return self._value
+
+        if self._value is not None:
+            self._rebuild_in_background(version)
+            return self._value
+
+        with self._lock:
+            # Un autre thread a pu construire l'objet pendant qu'on attendait le verrou
+            if self._value is None:
+                self._value = self.factory(version)
+                self._version = version
+        return self._value
+
+    def _rebuild_in_background(self, version):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild, args=(version,), name='versioned-singleton-rebuild', daemon=True).start()
+
+    def _rebuild(self, version):
+        try:
+            value = self.factory(version)
+            with self._lock:
+                self._value, self._version = value, version
+        except Exception as e:  # L'ancien objet reste servi, nouvel essai au prochain contrôle
+            print(f"⚠️ [CACHE] Reconstruction de l'index impossible : {e}")
+        finally:
+            self._rebuilding = False
+            connections.close_all() # Connexions ouvertes par ce thread
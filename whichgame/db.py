@@ -0,0 +1,31 @@
+"""
+Coordination des écritures SQLite entre les workers web et les crons.
+
+Les réglages de connexion (WAL, synchronous, mmap, BEGIN IMMEDIATE, busy timeout) sont dans
+`settings.DATABASES`. En WAL, les lectures ne sont jamais bloquées ; en revanche il n'y a
+qu'un seul écrivain à la fois. Les commandes découpent donc leurs écritures en transactions
+courtes (`chunks`) : un autre écrivain (admin, autre cron) n'attend jamais plus d'un lot.
+"""
+from django.db import connection
+
+# Lignes écrites par transaction dans les commandes (et limite de paramètres SQLite des `__in`)
+WRITE_CHUNK_SIZE = 500
+
+
+def chunks(items, size=WRITE_CHUNK_SIZE):
+    """Découpe `items` en listes de `size` éléments (une transaction par liste)."""
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def pragmas():
+    """Réglages effectifs de la connexion courante, pour les diagnostics ({} hors SQLite)."""
+    if connection.vendor != 'sqlite':
+        return {}
+    values = {}
+    with connection.cursor() as cursor:
+        for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size'):
+            cursor.execute(f'PRAGMA {name}')
+            values[name] = cursor.fetchone()[0]
+    return values
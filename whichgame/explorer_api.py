@@ -0,0 +1,134 @@
+"""
+API JSON de l'explorateur (v1) : mêmes filtres et même tri que `HomeListView`, en cartes compactes,
+pour charger la suite des résultats sans recharger la page (défilement infini).
+
+Pagination par curseur (keyset) plutôt que par numéro de page :
+- le tri de l'explorateur est complété par l'id (ordre total, aucun doublon entre deux pages) ;
+- le curseur contient les valeurs de tri de la dernière carte renvoyée, la page suivante est un
+  simple WHERE sur les colonnes indexées : aucun OFFSET ni COUNT(*), même loin dans la liste ;
+- les NULL (jeux sans note) sont toujours en fin de liste, quel que soit le moteur SQL.
+"""
+import base64
+import binascii
+import json
+
+from django.db.models import F, Q
+
+from .filters import filter_games, order_games, sort_fields
+from .models import Game
+
+# Cartes par page (comme HomeListView.paginate_by) et maximum accepté en paramètre
+DEFAULT_LIMIT = 24
+MAX_LIMIT = 48
+
+# Jeux similaires par carte (comme game_card.html)
+SIMILAR_PER_CARD = 3
+
+# Paramètres de l'API qui ne sont pas des filtres (sinon has_filters() changerait le tri)
+PAGINATION_PARAMS = ('cursor', 'limit', 'page')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def filter_params(params):
+    """Copie des paramètres GET sans ceux de la pagination : ce que voient filter_games / order_games."""
+    params = params.copy()
+    for name in PAGINATION_PARAMS:
+        params.pop(name, None)
+    return params
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Curseur -> liste de `size` valeurs (tri de l'explorateur + id). InvalidCursor si illisible."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise InvalidCursor("invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("invalid cursor")
+    # Entiers uniquement (True est un int pour Python), NULL permis sauf pour l'id
+    if values[-1] is None or any(value is not None and not _is_int(value) for value in values):
+        raise InvalidCursor("invalid cursor")
+    return values
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _after(fields, values):
+    """
+    Condition "après le curseur" pour un tri décroissant NULLS LAST sur `fields`.
+    (a, b, id) après (x, y, z) : a < x, ou a = x et b < y, ou a = x, b = y et id < z.
+    """
+    condition = Q(pk__in=[]) # Faux
+    equal = Q()
+    for field, value in zip(fields, values):
+        if value is None:
+            # Un NULL est en fin de liste : seuls les autres NULL peuvent le suivre
+            equal &= Q(**{f'{field}__isnull': True})
+            continue
+        condition |= equal & (Q(**{f'{field}__lt': value}) | Q(**{f'{field}__isnull': True}))
+        equal &= Q(**{field: value})
+    return condition
+
+
+def page(params, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    Une page de cartes compactes : {'results': [...], 'next_cursor': str | None}.
+    `params` : paramètres GET de l'explorateur (sans cursor / limit, voir filter_params).
+    """
+    fields = (*sort_fields(params), 'id')
+
+    queryset = order_games(filter_games(Game.objects.all(), params), params)
+    queryset = queryset.order_by(*(F(field).desc(nulls_last=True) for field in fields))
+    if cursor:
+        queryset = queryset.filter(_after(fields, decode_cursor(cursor, len(fields))))
+
+    # Une carte de plus que demandé : indique s'il existe une page suivante, sans COUNT(*)
+    rows = list(queryset.values(
+        'id', 'slug', 'title', 'cover_url', 'rating', 'total_rating_count', 'price_current', 'playtime_main',
+    )[:limit + 1])
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+
+    similar = _similar(row['id'] for row in rows)
+    results = [
+        {
+            'id': row['id'],
+            'slug': row['slug'],
+            'title': row['title'],
+            'cover_url': row['cover_url'],
+            'rating': row['rating'],
+            'price': float(row['price_current']) if row['price_current'] is not None else None,
+            'playtime': row['playtime_main'],
+            'similar': similar.get(row['id'], []),
+        }
+        for row in rows
+    ]
+
+    next_cursor = None
+    if has_next:
+        last = rows[-1]
+        next_cursor = encode_cursor([last[field] for field in fields])
+    return {'results': results, 'next_cursor': next_cursor}
+
+
+def _similar(game_ids):
+    """{id: [jeu similaire, ...]} pour toute la page en une requête (ordre de calculate_recommendations)."""
+    Through = Game.similar_games.through
+    rows = Through.objects.filter(from_game_id__in=list(game_ids)).order_by('from_game_id', 'id').values_list(
+        'from_game_id', 'to_game_id', 'to_game__slug', 'to_game__title', 'to_game__cover_url',
+    )
+    similar = {}
+    for game_id, similar_id, slug, title, cover_url in rows:
+        cards = similar.setdefault(game_id, [])
+        if len(cards) < SIMILAR_PER_CARD:
+            cards.append({'id': similar_id, 'slug': slug, 'title': title, 'cover_url': cover_url})
+    return similar
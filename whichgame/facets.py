@@ -0,0 +1,138 @@
+"""
+Compteurs de facettes de l'explorateur (plateforme, genre, durée).
+
+Chaque worker garde en mémoire, pour chaque valeur de facette, l'ensemble des jeux qui
+y correspondent sous forme de bitmap (un `int` Python, 1 bit par jeu). Pour un jeu de
+filtres donné :
+  1. les filtres "non facettes" (prix, promos, années, recherche, wishlist) sont résolus par UNE
+     requête SQL d'IDs, mise en cache par combinaison de filtres et version du catalogue ;
+  2. les compteurs sont des ET binaires + popcount entre bitmaps (quelques microsecondes).
+
+Comme d'habitude pour des facettes, le compteur d'une facette ignore son propre filtre :
+avec platform=PC, la liste des plateformes montre combien de jeux aurait chaque autre choix.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+
+from . import caching
+from .filters import DURATIONS, GENRES, MIN_RATING_COUNT, PLATFORMS, drop_window_key, duration_bucket, filter_games
+from .models import Game
+
+FACETS = ('platform', 'genre', 'duration')
+
+# Filtres résolus en SQL (tout sauf les facettes)
+SQL_PARAMS = ('price', 'deal', 'year_min', 'year_max', 'search', 'wishlist_ids')
+
+FACET_CACHE_TIMEOUT = 60 * 60
+
+
+class FacetIndex:
+
+    def __init__(self, version):
+        self.version = version
+
+        rows = Game.objects.filter(total_rating_count__gte=MIN_RATING_COUNT).values_list(
+            'id', 'platforms', 'genres', 'playtime_main'
+        )
+
+        self.positions = {}
+        platform_bits = {value: 0 for value in PLATFORMS}
+        genre_bits = {value: 0 for value in GENRES}
+        duration_bits = {value: 0 for value in DURATIONS}
+
+        for position, (game_id, platforms, genres, playtime) in enumerate(rows.iterator()):
+            self.positions[game_id] = position
+            bit = 1 << position
+
+            # Même sémantique que le filtre SQL `icontains` sur le texte JSON
+            platforms_text = json.dumps(platforms or []).lower()
+            for value in PLATFORMS:
+                if value.lower() in platforms_text:
+                    platform_bits[value] |= bit
+
+            genres_text = json.dumps(genres or []).lower()
+            for value in GENRES:
+                if value.lower() in genres_text:
+                    genre_bits[value] |= bit
+
+            bucket = duration_bucket(playtime)
+            if bucket:
+                duration_bits[bucket] |= bit
+
+        self.all = (1 << len(self.positions)) - 1
+        self.bitmaps = {
+            'platform': platform_bits,
+            'genre': genre_bits,
+            'duration': duration_bits,
+        }
+
+    def bitmap_for_ids(self, ids):
+        bitmap = 0
+        positions = self.positions
+        for game_id in ids:
+            position = positions.get(game_id)
+            if position is not None:
+                bitmap |= 1 << position
+        return bitmap
+
+    def selection(self, facet, value):
+        """Bitmap du filtre courant d'une facette (tout le catalogue si le filtre est absent)."""
+        if not value:
+            return self.all
+        # Valeur hors menu (ex: ?platform=Wii) : pas de bitmap précalculé
+        return self.bitmaps[facet].get(value)
+
+    def counts(self, base, selected):
+        """
+        `base` : bitmap des filtres SQL. `selected` : {facette: valeur choisie ou None}.
+        Retourne {facette: {valeur: nombre de jeux}}.
+        """
+        masks = {facet: self.selection(facet, selected.get(facet)) for facet in FACETS}
+        result = {}
+        for facet in FACETS:
+            others = base
+            for other, mask in masks.items():
+                if other != facet:
+                    if mask is None:
+                        others = None
+                        break
+                    others &= mask
+            result[facet] = {
+                value: (others & bitmap).bit_count() if others is not None else None
+                for value, bitmap in self.bitmaps[facet].items()
+            }
+        return result
+
+
+_index = caching.VersionedSingleton(FacetIndex, caching.CATALOG)
+
+
+def _sql_bitmap(index, params):
+    """Bitmap des jeux qui passent les filtres SQL, mis en cache par combinaison de filtres."""
+    sql_params = {name: params.get(name) for name in SQL_PARAMS if params.get(name)}
+    if not sql_params:
+        return index.all
+
+    # Empreinte des filtres : recherche libre et wishlist donneraient des clés trop longues ou
+    # avec espaces (refusées par memcached). Avec deal=dropped, le jour de début de la fenêtre
+    # fait aussi partie de la clé (la liste change à minuit sans changement du catalogue).
+    digest = hashlib.sha1(json.dumps(sql_params, sort_keys=True).encode()).hexdigest()
+    key = "facets:{}:{}:{}".format(":".join(map(str, index.version)), drop_window_key(sql_params) or '-', digest)
+
+    bitmap = cache.get(key)
+    if bitmap is None:
+        queryset = Game.objects.filter(total_rating_count__gte=MIN_RATING_COUNT)
+        ids = filter_games(queryset, sql_params).values_list('id', flat=True)
+        bitmap = index.bitmap_for_ids(ids.iterator())
+        cache.set(key, bitmap, FACET_CACHE_TIMEOUT)
+    return bitmap
+
+
+def facet_counts(params):
+    """{'platform': {...}, 'genre': {...}, 'duration': {...}} pour les filtres GET courants."""
+    index = _index.get()
+    base = _sql_bitmap(index, params)
+    selected = {facet: params.get(facet) for facet in FACETS}
+    return index.counts(base, selected)
@@ -0,0 +1,163 @@
+"""
+In-memory feature index for real-time "because you saved these" recommendations.
+
+Each web worker keeps one `FeatureIndex` in memory (loaded at startup by `config/wsgi.py`).
+It is rebuilt lazily when the catalog or recommendations version changes (see `caching`).
+
+A wishlist is folded into one weighted profile per strict-genre group, so scoring a
+candidate against 100 saved games costs the same as scoring it against one.
+"""
+from collections import Counter, defaultdict
+
+from . import caching
+from .models import Game
+from .similarity import GameFeatures
+
+# Keywords present in more summaries than this are too common to generate candidates
+MAX_KEYWORD_POSTINGS = 50
+
+# Only the rarest keywords of each saved game are used to generate candidates
+SEED_KEYWORDS = 12
+
+# Bonus for each saved game that already lists the candidate in its precomputed similar_games
+SIMILAR_GAMES_BONUS = 10
+
+# Candidates scored exactly per request (the ones sharing the most rare keywords win)
+MAX_CANDIDATES = 400
+
+MAX_WISHLIST_SIZE = 100
+
+
+class _Profile:
+    """Aggregated features of the saved games sharing the same strict genres."""
+    __slots__ = ('keywords', 'genres', 'themes', 'roots')
+
+    def __init__(self):
+        self.keywords = Counter()
+        self.genres = Counter()
+        self.themes = Counter()
+        self.roots = Counter()
+
+    def add(self, features):
+        self.keywords.update(features.keywords)
+        self.genres.update(features.genres)
+        self.themes.update(features.themes)
+        if features.root:
+            self.roots[features.root] += 1
+
+    def score(self, features):
+        """Sum of `similarity.score()` against every saved game of this profile."""
+        keywords = self.keywords
+        genres = self.genres
+        themes = self.themes
+        total = 2 * sum(keywords[k] for k in features.keywords if k in keywords)
+        total += 5 * sum(genres[g] for g in features.genres if g in genres)
+        total += 4 * sum(themes[t] for t in features.themes if t in themes)
+        if features.root:
+            total += 15 * self.roots.get(features.root, 0)
+        return total
+
+
+class FeatureIndex:
+
+    def __init__(self, version):
+        self.version = version
+
+        games = Game.objects.filter(total_rating_count__gte=5).only(
+            'id', 'title', 'slug', 'franchise_root', 'summary', 'genres', 'themes', 'cover_url',
+            'rating', 'total_rating_count', 'price_current', 'playtime_main',
+        )
+        self.features = {}
+        self.cards = {}
+        keyword_postings = defaultdict(list)
+        self.root_postings = defaultdict(list)
+
+        for game in games:
+            features = GameFeatures(game)
+            features.game = None # Only the compact card below is kept in memory
+            self.features[game.id] = features
+            self.cards[game.id] = {
+                'id': game.id,
+                'slug': game.slug,
+                'title': game.title,
+                'cover_url': game.cover_url,
+                'rating': game.rating,
+                'total_rating_count': game.total_rating_count or 0,
+                'price_current': float(game.price_current) if game.price_current is not None else None,
+                'playtime_main': game.playtime_main,
+            }
+            for keyword in features.keywords:
+                keyword_postings[keyword].append(game.id)
+            if features.root:
+                self.root_postings[features.root].append(game.id)
+
+        # Rare keywords only: they carry the signal and keep the candidate set small
+        self.keyword_postings = {
+            k: ids for k, ids in keyword_postings.items() if 1 < len(ids) <= MAX_KEYWORD_POSTINGS
+        }
+        self.seed_keywords = {
+            gid: sorted(
+                (k for k in features.keywords if k in self.keyword_postings),
+                key=lambda k: len(self.keyword_postings[k]),
+            )[:SEED_KEYWORDS]
+            for gid, features in self.features.items()
+        }
+
+        self.similar = defaultdict(list)
+        through = Game.similar_games.through.objects.values_list('from_game_id', 'to_game_id')
+        for from_id, to_id in through.iterator():
+            if to_id in self.features:
+                self.similar[from_id].append(to_id)
+
+    def recommend(self, game_ids, limit=12):
+        """Blended top-N for a set of saved games. Returns a list of card dicts (with `score`)."""
+        seeds = [self.features[i] for i in dict.fromkeys(game_ids) if i in self.features][:MAX_WISHLIST_SIZE]
+        if not seeds:
+            return []
+        seed_ids = {f.id for f in seeds}
+
+        # 1. Wishlist profiles (one per strict-genre group, see similarity.score)
+        profiles = defaultdict(_Profile)
+        for seed in seeds:
+            profiles[seed.strict].add(seed)
+
+        # 2. Candidates: precomputed recommendations, franchise siblings, rare shared keywords
+        similar_votes = Counter()
+        keyword_votes = Counter()
+        candidates = set()
+        for seed in seeds:
+            similar_votes.update(self.similar.get(seed.id, ()))
+            if seed.root:
+                candidates.update(self.root_postings.get(seed.root, ()))
+            for keyword in self.seed_keywords[seed.id]:
+                keyword_votes.update(self.keyword_postings[keyword])
+        candidates.update(similar_votes)
+        candidates.update(gid for gid, _ in keyword_votes.most_common(MAX_CANDIDATES))
+        candidates -= seed_ids
+
+        # 3. Blended score: average similarity to the saved games + precomputed votes
+        scored = []
+        for gid in candidates:
+            features = self.features[gid]
+            profile = profiles.get(features.strict)
+            value = profile.score(features) if profile else 0
+            value += SIMILAR_GAMES_BONUS * similar_votes.get(gid, 0)
+            if value > 0:
+                card = self.cards[gid]
+                scored.append((value / len(seeds), card['total_rating_count'], gid))
+
+        scored.sort(reverse=True)
+        return [dict(self.cards[gid], score=round(value, 2)) for value, _, gid in scored[:limit]]
+
+
+_index = caching.VersionedSingleton(FeatureIndex, caching.CATALOG, caching.RECOMMENDATIONS)
+
+
+def get_index():
+    """Returns this worker's index, rebuilding it if the catalog changed since it was loaded."""
+    return _index.get()
+
+
+def warm():
+    """Loads the index at worker startup so the first request doesn't pay for it."""
+    get_index()
@@ -0,0 +1,165 @@
+"""
+Filtres de l'explorateur, partagés par la liste HTML (`HomeListView`) et les facettes.
+`params` est un dict-like de paramètres GET (QueryDict ou dict).
+"""
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .prices import DROP_WINDOW
+
+# Paramètres GET reconnus par l'explorateur
+FILTER_PARAMS = ('price', 'deal', 'duration', 'platform', 'genre', 'year_min', 'year_max', 'search', 'wishlist_ids')
+
+# Sous ce nombre d'avis, un jeu n'apparaît pas dans les résultats filtrés (Filtre Anti-Poubelle)
+MIN_RATING_COUNT = 5
+
+# Menus de l'explorateur
+# (Pour un MVP, on les écrit en dur pour éviter des requêtes complexes sur JSON)
+PLATFORMS = [
+    "PC", "Mac", "Linux",
+    "PlayStation 5", "PlayStation 4",
+    "Xbox Series X|S", "Xbox One",
+    "Nintendo Switch"
+]
+
+# Liste des genres populaires (Statique pour MVP)
+GENRES = [
+    "Role-playing (RPG)", "Adventure", "Shooter",
+    "Platform", "Puzzle", "Strategy", "Indie",
+    "Sport", "Racing", "Fighting", "Simulator"
+]
+
+DURATIONS = ['short', 'medium', 'long']
+
+# Filtre "bonnes affaires" (colonnes tenues à jour par prices.py)
+DEALS = ['lowest', 'dropped']
+
+
+def drop_window_start(now=None):
+    """
+    Début de la fenêtre "baisse de prix récente" (deal=dropped), aligné sur minuit : la liste ne
+    change qu'avec le catalogue ou le jour, ce que reprennent les clés de cache (voir drop_window_key).
+    """
+    today = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - DROP_WINDOW
+
+
+def drop_window_key(params):
+    """Jour de début de la fenêtre si `params` filtre sur deal=dropped, '' sinon (à ajouter aux clés de cache)."""
+    if params.get('deal') != 'dropped':
+        return ''
+    return drop_window_start().date().isoformat()
+
+
+def duration_bucket(playtime):
+    """Tranche de durée d'un jeu, identique au filtre `duration`."""
+    if playtime is None:
+        return None
+    if playtime <= 10:
+        return 'short'
+    if playtime <= 30:
+        return 'medium'
+    return 'long'
+
+
+def filter_games(queryset, params, exclude=()):
+    """Applique les filtres présents dans `params`, sauf ceux listés dans `exclude`."""
+    def get(name):
+        return None if name in exclude else params.get(name)
+
+    price = get('price')
+    deal = get('deal')
+    duration = get('duration')
+    platform = get('platform')
+    genre = get('genre')
+    year_min = get('year_min')
+    year_max = get('year_max')
+    search = get('search')
+    wishlist_ids = get('wishlist_ids')
+
+    # 1. Barre de Recherche (Recherche dans le titre OU le slug)
+    if search:
+        queryset = queryset.filter(
+            Q(title__icontains=search) | Q(slug__icontains=search)
+        )
+
+    # 2. Filtre Prix
+    if price:
+        try:
+            price_val = float(price)
+            # On garde les jeux MOINS CHERS que la limite OU ceux qui n'ont PAS DE PRIX (None)
+            queryset = queryset.filter(
+                Q(price_current__lte=price_val) | Q(price_current__isnull=True)
+            )
+        except ValueError:
+            pass
+
+    # 2 bis. Bonnes affaires : plus bas historique / baisse de prix récente
+    if deal == 'lowest':
+        # Un prix observé une seule fois (ou jamais changé) est son propre plus bas : on exige
+        # qu'une baisse ait déjà eu lieu, donc qu'un prix plus élevé ait été observé avant
+        queryset = queryset.filter(
+            price_current__isnull=False, price_current__lte=F('price_lowest'), price_dropped_at__isnull=False,
+        )
+    elif deal == 'dropped':
+        queryset = queryset.filter(price_dropped_at__gte=drop_window_start())
+
+    # 3. Filtre Durée
+    if duration == 'short':
+        queryset = queryset.filter(playtime_main__lte=10)
+    elif duration == 'medium':
+        queryset = queryset.filter(playtime_main__gt=10, playtime_main__lte=30)
+    elif duration == 'long':
+        queryset = queryset.filter(playtime_main__gt=30)
+
+    # 4. Filtre Plateforme (JSONField)
+    if platform:
+        # Comme platforms est une liste JSON ["PC", "PS5"], on utilise 'icontains'
+        # pour voir si le mot existe dans la liste.
+        queryset = queryset.filter(platforms__icontains=platform)
+
+    # 5. Filtre Genre (JSONField)
+    if genre:
+        queryset = queryset.filter(genres__icontains=genre)
+
+    # 6. Filtre Année
+    if year_min:
+        try:
+            queryset = queryset.filter(release_year__gte=int(year_min))
+        except ValueError:
+            pass
+
+    if year_max:
+        try:
+            queryset = queryset.filter(release_year__lte=int(year_max))
+        except ValueError:
+            pass
+
+    # 7. Wishlist
+    if wishlist_ids:
+        try:
+            ids_list = [int(id) for id in wishlist_ids.split(',')]
+            queryset = queryset.filter(id__in=ids_list)
+        except ValueError:
+            pass
+
+    return queryset
+
+
+def has_filters(params):
+    """True dès qu'un paramètre autre que la pagination est présent (comportement historique)."""
+    return any(key != 'page' for key in params.keys())
+
+
+def sort_fields(params):
+    """Colonnes du tri de l'explorateur (toutes décroissantes) : note si l'utilisateur filtre, popularité sinon."""
+    if has_filters(params):
+        return ('rating', 'total_rating_count')
+    return ('total_rating_count', 'rating')
+
+
+def order_games(queryset, params):
+    """Tri de l'explorateur (voir sort_fields), avec le Filtre Anti-Poubelle dès qu'un filtre est actif."""
+    if has_filters(params):
+        queryset = queryset.filter(total_rating_count__gte=MIN_RATING_COUNT)
+    return queryset.order_by(*(f'-{field}' for field in sort_fields(params)))
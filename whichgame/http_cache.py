@@ -0,0 +1,322 @@
+"""
+Cache disque des réponses des API externes (IGDB, CheapShark), partagé par tous les processus.
+
+Branché sur les sessions de `http_sessions` : `session.get()` / `session.post()` passent par
+`cached_request()`, les appelants n'ont rien à changer.
+
+- Clé : méthode + URL complète (paramètres triés) + corps (les requêtes IGDB sont des POST Apicalypse).
+  Les en-têtes (jeton Twitch) n'en font pas partie.
+- Fraîcheur par API ou par endpoint (`settings.HTTP_CACHE_TTLS`, 0 = jamais en cache).
+- Entrée expirée avec ETag / Last-Modified : requête conditionnelle, un 304 la prolonge sans
+  retélécharger le corps.
+- Taille bornée (`settings.HTTP_CACHE_MAX_MB`) : les entrées les moins récemment lues sont supprimées.
+- Seules les requêtes qui partent vraiment sur le réseau consomment un jeton de `ratelimit`.
+- `bypass()` (option `--no-cache` des commandes) : aucune lecture du cache, mais les réponses
+  fraîches y sont enregistrées. Propre au contexte courant (contextvars) : une commande ne le
+  change pas pour les autres threads ; `igdb.Client.post_many` le transmet à ses threads.
+
+Stockage : petite base SQLite dédiée (`settings.HTTP_CACHE_DB`), comme ratelimit.py.
+Le cache est facultatif : toute erreur SQLite (base verrouillée, corrompue, en lecture seule)
+fait simplement passer la requête par le réseau.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+from collections import defaultdict
+from contextlib import contextmanager
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from django.conf import settings
+
+from . import ratelimit
+
+# Fraîcheur par défaut (s), surchargeable par settings.HTTP_CACHE_TTLS
+DEFAULT_TTLS = {
+    'igdb': 6 * 3600,
+    'igdb:game_time_to_beats': 7 * 86400,
+    'cheapshark': 3600,
+    'cheapshark:deals': 15 * 60,
+}
+
+# En-têtes qui ne décrivent plus le corps stocké (déjà décompressé par requests)
+_DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+# Compteurs par API dans ce processus : {nom: {'hits', 'revalidated', 'misses'}}
+_stats = defaultdict(lambda: {'hits': 0, 'revalidated': 0, 'misses': 0})
+_stats_lock = threading.Lock()
+_bypass = ContextVar('http_cache_bypass', default=False)
+
+# Bases dont le schéma (et le mode WAL, persistant dans le fichier) est déjà en place dans ce processus
+_ready = set()
+_ready_lock = threading.Lock()
+
+# Une connexion par thread, gardée ouverte entre les requêtes (sqlite3 n'en partage pas entre threads)
+_local = threading.local()
+
+
+def _connect():
+    path = str(settings.HTTP_CACHE_DB)
+    connection = sqlite3.connect(path, timeout=5, isolation_level=None) # Au-delà de 5 s : réseau
+    connection.row_factory = sqlite3.Row
+    try:
+        with _ready_lock:
+            if path not in _ready:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript(_SCHEMA)
+                _ready.add(path)
+    except sqlite3.Error:
+        connection.close()
+        raise
+    return connection
+
+
+@contextmanager
+def _database():
+    """
+    Connexion au cache de ce thread. Après une erreur SQLite elle est refermée (la suivante
+    repart de zéro) et l'erreur remonte jusqu'à _safe.
+    """
+    path = str(settings.HTTP_CACHE_DB)
+    cached = getattr(_local, 'connection', None)
+    if cached is None or cached[0] != path:
+        _local.connection = (path, _connect())
+    connection = _local.connection[1]
+    try:
+        yield connection
+    except sqlite3.Error:
+        _local.connection = None
+        connection.close()
+        with _ready_lock:
+            _ready.discard(path) # Fichier supprimé ou remplacé : schéma recréé à la reconnexion
+        raise
+
+
+def _safe(operation, *args, default=None):
+    """Exécute une opération du cache ; en cas d'erreur SQLite, le cache est ignoré (retourne `default`)."""
+    try:
+        return operation(*args)
+    except sqlite3.Error as e:
+        _count_error(e)
+        return default
+
+
+def ttl(name, endpoint):
+    """Fraîcheur (s) de `endpoint` ('games', 'deals'...) de l'API `name`."""
+    ttls = {**DEFAULT_TTLS, **getattr(settings, 'HTTP_CACHE_TTLS', {})}
+    return ttls.get(f"{name}:{endpoint}", ttls.get(name, 0))
+
+
+@contextmanager
+def bypass(enabled=True):
+    """Ignore le cache en lecture le temps du bloc (les réponses reçues restent enregistrées)."""
+    token = _bypass.set(_bypass.get() or enabled)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def install(session, name):
+    """Fait passer `session.request` (donc get/post) par le cache et le budget de l'API `name`."""
+    send = session.request
+
+    def request(method, url, **kwargs):
+        return cached_request(name, send, method, url, **kwargs)
+
+    session.request = request
+    return session
+
+
+def cached_request(name, send, method, url, **kwargs):
+    limited = name in ratelimit.DEFAULT_LIMITS or name in getattr(settings, 'RATE_LIMITS', {})
+
+    def network(**extra):
+        if limited:
+            ratelimit.acquire(name)
+        return send(method, url, **kwargs, **extra)
+
+    full_url = _full_url(url, kwargs.get('params'))
+    seconds = ttl(name, _endpoint(name, full_url))
+    if not getattr(settings, 'HTTP_CACHE_ENABLED', True) or not seconds or method.upper() not in ('GET', 'POST'):
+        return network()
+
+    key = _key(method, full_url, kwargs.get('data'), kwargs.get('json'))
+    now = time.time()
+    row = None if _bypass.get() else _safe(_read, key)
+
+    # 1. Entrée fraîche : aucun appel réseau
+    if row is not None and row['expires_at'] > now:
+        _count(name, 'hits')
+        _safe(_touch, key, now)
+        return _response(row)
+
+    # 2. Entrée expirée : requête conditionnelle si l'API a fourni un validateur
+    conditional = {}
+    if row is not None:
+        if row['etag']:
+            conditional['If-None-Match'] = row['etag']
+        if row['last_modified']:
+            conditional['If-Modified-Since'] = row['last_modified']
+    if conditional:
+        headers = {**(kwargs.pop('headers', None) or {}), **conditional}
+        response = network(headers=headers)
+        if response.status_code == 304:
+            _count(name, 'revalidated')
+            _safe(_refresh, key, now + seconds, now)
+            return _response(row)
+    else:
+        response = network()
+
+    _count(name, 'misses')
+    if response.status_code == 200 and 'no-store' not in response.headers.get('Cache-Control', ''):
+        _safe(_store, key, full_url, response, now + seconds, now)
+    return response
+
+
+def snapshot():
+    """Copie des compteurs du processus : {nom: {'hits', 'revalidated', 'misses'}} (voir ledger.py)."""
+    with _stats_lock:
+        return {name: dict(counts) for name, counts in _stats.items()}
+
+
+def summary(since=None):
+    """Ligne de résumé du cache pour la sortie des commandes (depuis le snapshot() `since`, comme ratelimit.summary)."""
+    since = since or {}
+    parts = []
+    for name, counts in sorted(snapshot().items()):
+        previous = since.get(name, {})
+        hits, revalidated, misses = (counts[key] - previous.get(key, 0) for key in ('hits', 'revalidated', 'misses'))
+        if hits or revalidated or misses:
+            parts.append(f"{name}: {hits} hits, {revalidated} revalidated, {misses} misses")
+    return "🗄️ HTTP cache — " + " | ".join(parts) if parts else "🗄️ HTTP cache — no upstream request"
+
+
+def clear():
+    """Vide le cache. Retourne le nombre d'entrées supprimées."""
+    with _database() as connection:
+        return connection.execute("DELETE FROM responses").rowcount
+
+
+# --- Helpers ---
+
+def _count(name, kind):
+    with _stats_lock:
+        _stats[name][kind] += 1
+
+
+_last_error = None
+
+
+def _count_error(error):
+    """Cache indisponible : signalé une fois par message d'erreur, pas à chaque requête."""
+    global _last_error
+    if str(error) != _last_error:
+        _last_error = str(error)
+        print(f"⚠️ [HTTP CACHE] Cache ignoré : {error}")
+
+
+def _full_url(url, params):
+    """URL avec les paramètres de `params` ajoutés, triés : même clé quel que soit leur ordre."""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query += list(params.items()) if isinstance(params, dict) else list(params)
+    return urlunsplit(parts._replace(query=urlencode(sorted((str(k), str(v)) for k, v in query))))
+
+
+def _endpoint(name, url):
+    """'https://api.igdb.com/v4/games' -> 'games' (chemin relatif à la base de l'API)."""
+    base = urlsplit(settings.UPSTREAM_URLS.get(name, '')).path.rstrip('/')
+    path = urlsplit(url).path
+    return path[len(base):].strip('/') if path.startswith(base) else path.strip('/')
+
+
+def _key(method, url, data, json_body):
+    body = data if data is not None else json.dumps(json_body, sort_keys=True) if json_body is not None else ''
+    if isinstance(body, dict):
+        body = urlencode(sorted(body.items()))
+    if isinstance(body, str):
+        body = body.encode()
+    return hashlib.sha256(method.upper().encode() + b'\n' + url.encode() + b'\n' + body).hexdigest()
+
+
+def _read(key):
+    with _database() as connection:
+        return connection.execute("SELECT * FROM responses WHERE key = ?", (key,)).fetchone()
+
+
+def _touch(key, now):
+    with _database() as connection:
+        connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+
+
+def _refresh(key, expires_at, now):
+    with _database() as connection:
+        connection.execute("UPDATE responses SET expires_at = ?, last_used = ? WHERE key = ?", (expires_at, now, key))
+
+
+def _store(key, url, response, expires_at, now):
+    body = response.content
+    headers = {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS}
+    max_bytes = getattr(settings, 'HTTP_CACHE_MAX_MB', 200) * 1024 * 1024
+
+    with _database() as connection:
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, response.status_code, json.dumps(headers), body, response.headers.get('ETag'),
+                 response.headers.get('Last-Modified'), expires_at, now, len(body)),
+            )
+            # Éviction LRU : on redescend à 90 % de la limite pour ne pas évincer à chaque écriture
+            total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > max_bytes:
+                excess = total - max_bytes * 0.9
+                freed = 0
+                stale = []
+                for old_key, size in connection.execute("SELECT key, size FROM responses ORDER BY last_used"):
+                    stale.append((old_key,))
+                    freed += size
+                    if freed >= excess:
+                        break
+                connection.executemany("DELETE FROM responses WHERE key = ?", stale)
+            connection.execute("COMMIT")
+        except sqlite3.Error:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise # Ignorée par _safe : la réponse est quand même renvoyée
+
+
+def _response(row):
+    """Reconstruit une requests.Response depuis une entrée du cache."""
+    from requests.models import Response
+    from requests.structures import CaseInsensitiveDict
+    from requests.utils import get_encoding_from_headers
+
+    response = Response()
+    response.status_code = row['status']
+    response.headers = CaseInsensitiveDict(json.loads(row['headers']))
+    response._content = bytes(row['body'])
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.url = row['url']
+    response.from_cache = True
+    return response
@@ -0,0 +1,50 @@
+"""
+Sessions HTTP réutilisées d'une exécution de commande à l'autre.
+
+Lancée par cron, chaque commande repart de zéro ; sous `run_scheduler` (un seul processus
+longue durée), les connexions keep-alive vers IGDB / CheapShark restent ouvertes entre deux
+jobs. Une session par thread et par API (requests.Session n'est pas garanti thread-safe).
+
+Chaque session passe par `http_cache` : les réponses encore fraîches sont servies depuis le
+disque, et seules les requêtes qui partent sur le réseau puisent dans le budget `ratelimit`.
+
+`url()` donne l'URL de base de chaque API (`settings.UPSTREAM_URLS`, à surcharger pour viser
+les faux serveurs de `fake_upstreams`).
+
+`requests` n'est importé qu'à la création de la première session : importer ce module (via
+igdb.py ou une commande) ne coûte rien aux processus qui ne font pas d'appel HTTP.
+"""
+import threading
+
+from django.conf import settings
+
+from . import http_cache
+
+_local = threading.local()
+
+
+def get(name):
+    """Session HTTP persistante de l'API `name` pour le thread courant."""
+    sessions = getattr(_local, 'sessions', None)
+    if sessions is None:
+        sessions = _local.sessions = {}
+
+    session = sessions.get(name)
+    if session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = sessions[name] = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        http_cache.install(session, name)
+    return session
+
+
+def url(name, path=''):
+    """URL de l'API `name` : base de settings.UPSTREAM_URLS + `path` ('games', '/deals'...)."""
+    base = settings.UPSTREAM_URLS[name]
+    if not path:
+        return base
+    return f"{base.rstrip('/')}/{path.lstrip('/')}"
@@ -0,0 +1,180 @@
+"""
+Client IGDB partagé par les commandes d'import.
+
+- `get_access_token()` : jeton Twitch OAuth, mis en cache dans `twitch_token.json`.
+- URLs de l'API et du jeton : `settings.UPSTREAM_URLS` ('igdb', 'twitch'), voir `http_sessions.url()`.
+- `Client` : requêtes POST (Apicalypse) qui puisent dans le budget IGDB partagé par tous les
+  processus (voir ratelimit.py), sauf celles servies par le cache disque (http_cache.py),
+  et `post_many()` pour envoyer plusieurs pages en parallèle.
+- `format_game()` : payload IGDB -> champs de `Game` (le dict passé à `ingest.upsert_game`).
+"""
+import contextvars
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from decouple import config
+from django.conf import settings
+
+from . import http_sessions, ratelimit
+
+# Requêtes ouvertes en parallèle (IGDB en autorise 8 ; le débit est limité par ratelimit.py)
+MAX_WORKERS = 4
+
+# Taille maximale d'une page IGDB (`limit 500`)
+PAGE_SIZE = 500
+
+# Nouvelles tentatives sur un HTTP 429 (attente doublée à chaque fois)
+MAX_RETRIES = 3
+
+GAME_FIELDS = (
+    "fields name, slug, rating, total_rating_count, summary, "
+    "cover.url, platforms.name, genres.name, themes.name, "
+    "first_release_date, release_dates.y, game_type, videos.video_id, screenshots.url, updated_at"
+)
+
+
+# Jeton gardé en mémoire : sous run_scheduler, le fichier n'est relu qu'à expiration.
+# `token_url` : un jeton du faux serveur (fake_upstreams) n'est jamais envoyé au vrai IGDB, et inversement.
+_token = {'access_token': None, 'expires_at': 0, 'token_url': None}
+
+
+def get_access_token():
+    """Retrieves or generates a valid Twitch OAuth token."""
+    token_url = http_sessions.url('twitch')
+    if _token['token_url'] == token_url and _token['expires_at'] > time.time() + 60:
+        return _token['access_token']
+
+    token_file = os.path.join(settings.BASE_DIR, 'twitch_token.json')
+
+    if os.path.exists(token_file):
+        try:
+            with open(token_file, 'r') as f:
+                data = json.load(f)
+                if data.get('token_url') == token_url and data.get('expires_at', 0) > time.time() + 60:
+                    _token.update(access_token=data.get('access_token'), expires_at=data['expires_at'], token_url=token_url)
+                    return data.get('access_token')
+        except json.JSONDecodeError:
+            pass
+
+    import requests
+    try:
+        response = requests.post(token_url, params={
+            'client_id': config('IGDB_CLIENT_ID'),
+            'client_secret': config('IGDB_CLIENT_SECRET'),
+            'grant_type': 'client_credentials'
+        })
+        response.raise_for_status()
+        auth_data = response.json()
+
+        access_token = auth_data.get('access_token')
+        if access_token:
+            _token.update(access_token=access_token, expires_at=time.time() + auth_data['expires_in'], token_url=token_url)
+            with open(token_file, 'w') as f:
+                json.dump(_token, f)
+            return access_token
+    except requests.RequestException:
+        pass
+    return None
+
+
+class Client:
+    """Requêtes IGDB limitées par le budget partagé `ratelimit` ('igdb'), utilisable depuis plusieurs threads."""
+
+    def __init__(self, access_token, workers=MAX_WORKERS):
+        self.headers = {
+            'Client-ID': config('IGDB_CLIENT_ID'),
+            'Authorization': f'Bearer {access_token}'
+        }
+        self.workers = max(1, min(workers, MAX_WORKERS))
+
+    def post(self, endpoint, query):
+        """POST `query` sur /v4/<endpoint>. Retourne le JSON, lève requests.RequestException."""
+        delay = 1.0
+        for attempt in range(MAX_RETRIES + 1):
+            # Budget 'igdb' et cache disque : voir http_sessions / http_cache
+            response = http_sessions.get('igdb').post(http_sessions.url('igdb', endpoint), headers=self.headers, data=query, timeout=30)
+            if response.status_code == 429:
+                ratelimit.throttled('igdb')
+                if attempt < MAX_RETRIES:
+                    time.sleep(delay)
+                    delay *= 2
+                    continue
+            response.raise_for_status()
+            return response.json()
+
+    def post_many(self, endpoint, queries):
+        """
+        Envoie plusieurs requêtes en parallèle (toujours dans la limite de débit).
+        Retourne une liste de (query, résultat ou None, erreur ou None), dans l'ordre des requêtes.
+        """
+        import requests
+
+        def run(query):
+            try:
+                return query, self.post(endpoint, query), None
+            except requests.RequestException as e:
+                return query, None, e
+
+        if self.workers == 1 or len(queries) <= 1:
+            return [run(query) for query in queries]
+        # Chaque requête s'exécute dans une copie du contexte de l'appelant (http_cache.bypass...)
+        contexts = [contextvars.copy_context() for _ in queries]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(lambda context, query: context.run(run, query), contexts, queries))
+
+    def fetch_playtimes(self, igdb_ids):
+        """{igdb_id: heures} depuis `game_time_to_beats`, par pages de PAGE_SIZE IDs."""
+        ids = [str(i) for i in igdb_ids]
+        queries = [
+            f"fields game_id, hastily, normally, completely; where game_id = ({','.join(ids[i:i + PAGE_SIZE])}); limit {PAGE_SIZE};"
+            for i in range(0, len(ids), PAGE_SIZE)
+        ]
+
+        playtimes_map = {}
+        for _, results, _ in self.post_many('game_time_to_beats', queries):
+            for time_data in results or []:
+                seconds = time_data.get('hastily') or time_data.get('normally') or time_data.get('completely') or 0
+                if seconds > 0:
+                    playtimes_map[time_data['game_id']] = max(1, round(seconds / 3600))
+        return playtimes_map
+
+
+def format_game(data, playtimes_map):
+    """Payload IGDB (`GAME_FIELDS`) -> champs de `Game`, comme le faisait import_games."""
+    release_date = None
+    if 'first_release_date' in data:
+        release_date = datetime.fromtimestamp(data['first_release_date']).date()
+
+    cover_url = ""
+    if 'cover' in data and 'url' in data['cover']:
+        cover_url = data['cover']['url'].replace('t_thumb', 't_cover_big')
+        if cover_url.startswith('//'):
+            cover_url = f"https:{cover_url}"
+
+    video_id = next((v['video_id'] for v in data.get('videos', []) if 'video_id' in v), None)
+
+    screenshots = [
+        s['url'].replace('t_thumb', 't_1080p').replace('//', 'https://')
+        for s in data.get('screenshots', [])[:3] if 'url' in s
+    ]
+
+    return {
+        'title': data['name'],
+        'slug': data['slug'],
+        'rating': data.get('rating'),
+        'total_rating_count': data.get('total_rating_count', 0),
+        'summary': data.get('summary', ''),
+        'cover_url': cover_url,
+        'platforms': [p['name'] for p in data.get('platforms', [])],
+        'genres': [g['name'] for g in data.get('genres', [])],
+        'themes': [t['name'] for t in data.get('themes', [])],
+        'playtime_main': playtimes_map.get(data['id'], 0),
+        'game_type': data.get('game_type', 0),
+        'release_year': min([d['y'] for d in data.get('release_dates', []) if 'y' in d], default=None),
+        'first_release_date': release_date,
+        'video_id': video_id,
+        'screenshots': screenshots
+    }
@@ -0,0 +1,72 @@
+"""
+Écriture des jeux importés depuis IGDB, partagée par toutes les commandes d'import.
+
+Chaque payload formaté (le dict `defaults` des anciens `update_or_create`) est haché et le
+hash est stocké sur le jeu (`Game.payload_hash`) :
+  - même hash qu'au dernier import : aucune écriture, `updated_at` ne bouge pas, donc les
+    caches et les GET conditionnels (voir caching.py) restent valides ;
+  - hash différent : seuls les champs réellement modifiés sont écrits.
+"""
+import hashlib
+import json
+from collections import Counter
+
+from .models import Game
+
+NEW = 'new'
+CHANGED = 'changed'
+UNCHANGED = 'unchanged'
+
+
+def payload_hash(defaults):
+    """Empreinte stable d'un payload (clés triées, dates en ISO)."""
+    raw = json.dumps(defaults, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def changed_fields(game, defaults):
+    """Champs de `defaults` dont la valeur diffère de celle du jeu (après conversion du champ)."""
+    changed = []
+    for name, value in defaults.items():
+        field = Game._meta.get_field(name)
+        # Ex: une note IGDB 85.3 est stockée 85 dans un IntegerField, ce n'est pas un changement
+        if field.to_python(value) != getattr(game, name):
+            changed.append(name)
+    return changed
+
+
+def upsert_game(igdb_id, defaults):
+    """
+    Crée ou met à jour un jeu à partir de son payload IGDB formaté.
+    Retourne (game, statut) avec statut parmi NEW, CHANGED, UNCHANGED.
+    """
+    digest = payload_hash(defaults)
+    game = Game.objects.filter(igdb_id=igdb_id).first()
+
+    if game is None:
+        game = Game.objects.create(igdb_id=igdb_id, payload_hash=digest, **defaults)
+        return game, NEW
+
+    if game.payload_hash == digest:
+        return game, UNCHANGED
+
+    fields = changed_fields(game, defaults)
+    if not fields:
+        # Payload différent mais même contenu en base (ex: un autre import plus partiel) :
+        # on retient le hash sans toucher à updated_at
+        Game.objects.filter(pk=game.pk).update(payload_hash=digest)
+        game.payload_hash = digest
+        return game, UNCHANGED
+
+    for name in fields:
+        setattr(game, name, defaults[name])
+    game.payload_hash = digest
+    game.save(update_fields=[*fields, 'payload_hash', 'updated_at'])
+    return game, CHANGED
+
+
+class UpsertStats(Counter):
+    """Compteurs NEW / CHANGED / UNCHANGED d'un import, pour le résumé des commandes."""
+
+    def summary(self):
+        return f"🆕 New: {self[NEW]} | ✏️ Changed: {self[CHANGED]} | 💤 Unchanged: {self[UNCHANGED]}"
@@ -0,0 +1,230 @@
+"""
+File d'attente locale (SQLite) pour les commandes lancées depuis l'admin.
+
+La vue admin ne fait qu'enregistrer un `CommandJob` et rend la main immédiatement.
+Le worker `python manage.py run_jobs` (processus séparé) exécute les jobs un par un
+et écrit la sortie de la commande en base au fil de l'eau, que l'admin lit par polling.
+"""
+import io
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .models import CommandJob
+
+# Un job "running" sans heartbeat depuis ce délai est considéré comme mort (worker tué)
+STALE_AFTER = timedelta(minutes=10)
+
+# Un job "queued" que personne n'a pris depuis ce délai, alors qu'aucun job ne tourne : le worker lancé
+# pour lui est mort avant de le réserver, on en relance un
+QUEUED_RESPAWN_AFTER = timedelta(minutes=2)
+
+# Au-delà, un job "queued" sans aucun job en cours est abandonné (pas de worker du tout,
+# JOBS_SPAWN_WORKER=False) : la déduplication ne bloque plus la commande
+QUEUED_EXPIRE_AFTER = timedelta(hours=1)
+
+# Fréquence du heartbeat, indépendante de la sortie (une étape silencieuse peut durer longtemps)
+HEARTBEAT_INTERVAL = 60
+
+# Fréquence minimale d'écriture de la sortie en base pendant l'exécution
+FLUSH_INTERVAL = 1.0
+
+# On garde la fin de la sortie si une commande est très bavarde
+MAX_OUTPUT_CHARS = 200_000
+
+
+def _dedupe_key(command, args):
+    return "|".join([command, *args])[:255]
+
+
+def enqueue(command, *args):
+    """
+    Ajoute une commande à la file et retourne (job, created).
+    Si la même commande (mêmes arguments) est déjà en attente ou en cours, retourne ce job-là.
+    """
+    args = [str(a) for a in args]
+    key = _dedupe_key(command, args)
+
+    _fail_stale_jobs()
+
+    try:
+        with transaction.atomic():
+            job = CommandJob.objects.create(command=command, args=args, dedupe_key=key)
+    except IntegrityError:
+        # La contrainte unique a refusé le doublon : on renvoie le job déjà actif
+        existing = CommandJob.objects.filter(
+            dedupe_key=key, status__in=CommandJob.ACTIVE_STATUSES
+        ).first()
+        if existing:
+            _revive_queue()
+            return existing, False
+        raise
+
+    if getattr(settings, 'JOBS_SPAWN_WORKER', True):
+        spawn_worker()
+    return job, True
+
+
+def spawn_worker():
+    """Lance un worker détaché qui vide la file puis s'arrête (utile sans worker permanent)."""
+    manage_py = os.path.join(settings.BASE_DIR, 'manage.py')
+    try:
+        subprocess.Popen(
+            [sys.executable, manage_py, 'run_jobs', '--once'],
+            cwd=settings.BASE_DIR,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError as e:
+        print(f"⚠️ [JOBS] Impossible de lancer le worker : {e}")
+
+
+def claim_next_job():
+    """Réserve atomiquement le plus ancien job en attente. Retourne None si la file est vide."""
+    for job in CommandJob.objects.filter(status=CommandJob.STATUS_QUEUED).order_by('created_at')[:10]:
+        now = timezone.now()
+        claimed = CommandJob.objects.filter(pk=job.pk, status=CommandJob.STATUS_QUEUED).update(
+            status=CommandJob.STATUS_RUNNING, started_at=now, heartbeat_at=now
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def run_job(job):
+    """Exécute un job réservé et enregistre son statut final."""
+    out = JobOutput(job)
+    heartbeat = Heartbeat(job)
+    heartbeat.start()
+    try:
+        call_command(job.command, *job.args, stdout=out, stderr=out)
+    except BaseException as e:
+        heartbeat.stop()
+        out.flush()
+        CommandJob.objects.filter(pk=job.pk).update(
+            status=CommandJob.STATUS_FAILED,
+            error=str(e) or e.__class__.__name__,
+            finished_at=timezone.now(),
+        )
+        if isinstance(e, (KeyboardInterrupt, SystemExit)):
+            raise
+        return False
+
+    heartbeat.stop()
+    out.flush()
+    CommandJob.objects.filter(pk=job.pk).update(
+        status=CommandJob.STATUS_SUCCESS, finished_at=timezone.now()
+    )
+    return True
+
+
+def _fail_stale_jobs():
+    """
+    Libère les jobs dont le worker a disparu, sinon la déduplication les bloquerait à vie :
+    - "running" sans heartbeat depuis STALE_AFTER ;
+    - "queued" depuis QUEUED_EXPIRE_AFTER alors qu'aucun job ne tourne (aucun worker ne les prendra).
+    """
+    now = timezone.now()
+    CommandJob.objects.filter(status=CommandJob.STATUS_RUNNING, heartbeat_at__lt=now - STALE_AFTER).update(
+        status=CommandJob.STATUS_FAILED,
+        error="Worker interrompu (plus de heartbeat).",
+        finished_at=now,
+    )
+    if CommandJob.objects.filter(status=CommandJob.STATUS_RUNNING).exists():
+        return # Un worker est vivant : les jobs en attente passeront après le sien
+    CommandJob.objects.filter(status=CommandJob.STATUS_QUEUED, created_at__lt=now - QUEUED_EXPIRE_AFTER).update(
+        status=CommandJob.STATUS_FAILED,
+        error="Aucun worker n'a pris le job.",
+        finished_at=now,
+    )
+
+
+def _revive_queue():
+    """Relance un worker si des jobs attendent depuis QUEUED_RESPAWN_AFTER sans qu'aucun ne tourne."""
+    if not getattr(settings, 'JOBS_SPAWN_WORKER', True):
+        return
+    if CommandJob.objects.filter(status=CommandJob.STATUS_RUNNING).exists():
+        return
+    limit = timezone.now() - QUEUED_RESPAWN_AFTER
+    if CommandJob.objects.filter(status=CommandJob.STATUS_QUEUED, created_at__lt=limit).exists():
+        spawn_worker()
+
+
+class Heartbeat(threading.Thread):
+    """
+    Met à jour `heartbeat_at` toutes les HEARTBEAT_INTERVAL secondes tant que la commande tourne,
+    même sans aucune sortie : un job vivant n'est jamais pris pour un worker mort.
+    """
+
+    def __init__(self, job):
+        super().__init__(name=f"job-{job.pk}-heartbeat", daemon=True)
+        self.job_pk = job.pk
+        self._stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self._stopped.wait(HEARTBEAT_INTERVAL):
+                CommandJob.objects.filter(pk=self.job_pk).update(heartbeat_at=timezone.now())
+        finally:
+            connection.close() # Connexion propre à ce thread
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+class JobOutput(io.StringIO):
+    """
+    Flux de sortie qui recopie périodiquement son contenu dans `CommandJob.output`.
+    Seuls les MAX_OUTPUT_CHARS derniers caractères sont gardés ; `output_length` compte tout ce
+    qui a été écrit, pour que le polling (offset) reste juste une fois la sortie tronquée.
+
+    Les commandes à pool de threads (igdb.py) écrivent depuis leurs threads : ces écritures ne font
+    que remplir le tampon, seul le thread du job (celui qui a créé le flux) écrit en base.
+    """
+
+    def __init__(self, job):
+        super().__init__()
+        self.job_pk = job.pk
+        self._owner = threading.get_ident()
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        self._written = 0
+
+    def write(self, s):
+        with self._lock:
+            n = super().write(s)
+            self._written += n
+            if self.tell() > 2 * MAX_OUTPUT_CHARS:
+                # On ne garde en mémoire que la fenêtre utile
+                window = self.getvalue()[-MAX_OUTPUT_CHARS:]
+                self.seek(0)
+                self.truncate()
+                super().write(window)
+        if time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+            self.flush()
+        return n
+
+    def flush(self):
+        if threading.get_ident() != self._owner:
+            return # Thread d'un pool : le tampon sera écrit par le thread du job
+        with self._lock:
+            output = self.getvalue()[-MAX_OUTPUT_CHARS:]
+            written = self._written
+        self._last_flush = time.monotonic()
+        CommandJob.objects.filter(pk=self.job_pk).update(
+            output=output,
+            output_length=written,
+            heartbeat_at=timezone.now(),
+        )
@@ -0,0 +1,168 @@
+"""
+Journal des exécutions de commandes (`CommandRun`), affiché en tableau de bord dans l'admin.
+
+Les commandes de données héritent de `TrackedCommand` au lieu de `BaseCommand` :
+- `with self.phase('fetch'):` chronomètre une étape (cumulée si elle se répète) ;
+- `self.rows` (Counter) compte les lignes : `self.rows.update(stats)` pour un `UpsertStats`,
+  `self.rows['ignored'] += 1`... Les clés de WRITTEN / SKIPPED alimentent les totaux ;
+- les requêtes HTTP, l'attente du rate limit et les 429 sont la différence des compteurs de
+  `ratelimit` entre le début et la fin (exact aussi sous `run_scheduler`, qui enchaîne les commandes),
+  de même pour les réponses servies par le cache disque (`http_cache`) ;
+- toutes les commandes acceptent `--no-cache` : réponses HTTP fraîches, sans lecture du cache.
+
+Une base pas encore migrée ne bloque jamais une commande : l'exécution n'est simplement pas journalisée.
+"""
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+
+from . import caching, http_cache, ratelimit
+from .models import CommandRun
+
+# Clés de `rows` comptées comme écrites / ignorées (les autres restent dans le détail)
+WRITTEN = ('new', 'changed', 'updated', 'deleted', 'linked')
+SKIPPED = ('unchanged', 'ignored', 'skipped', 'not_found')
+
+# Options ajoutées par Django à toutes les commandes : sans intérêt dans le journal
+_BASE_OPTIONS = {'verbosity', 'settings', 'pythonpath', 'traceback', 'no_color', 'force_color', 'skip_checks', 'stdout', 'stderr'}
+
+
+class TrackedCommand(BaseCommand):
+    """BaseCommand qui enregistre chaque exécution dans `CommandRun`."""
+
+    def create_parser(self, prog_name, subcommand, **kwargs):
+        parser = super().create_parser(prog_name, subcommand, **kwargs)
+        parser.add_argument('--no-cache', action='store_true', help='Bypass the on-disk HTTP cache (fresh upstream responses).')
+        return parser
+
+    def execute(self, *args, **options):
+        self.rows = Counter()
+        self.phases = {}
+        run = self._start_run(args, options)
+        before = self.http_before = ratelimit.snapshot()
+        cache_before = self.cache_before = http_cache.snapshot()
+        start = time.perf_counter()
+
+        status, error = CommandRun.STATUS_SUCCESS, ''
+        try:
+            # Versions du catalogue publiées au plus une fois par minute, et à la fin de la commande
+            with http_cache.bypass(options.get('no_cache', False)), caching.batched_bumps():
+                return super().execute(*args, **options)
+        except BaseException as e:
+            status, error = CommandRun.STATUS_FAILED, f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if run is not None:
+                self._finish_run(run, status, error, time.perf_counter() - start, before, cache_before)
+
+    def http_summary(self):
+        """Résumé rate limit + cache HTTP de cette exécution seulement (les compteurs sont ceux du processus)."""
+        return f"{ratelimit.summary(since=self.http_before)}\n{http_cache.summary(since=self.cache_before)}"
+
+    @contextmanager
+    def phase(self, name):
+        """Chronomètre une étape de la commande (auth, fetch, playtimes, save...)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round(self.phases.get(name, 0) + time.perf_counter() - start, 3)
+
+    def _start_run(self, args, options):
+        logged = {
+            name: value for name, value in options.items()
+            if name not in _BASE_OPTIONS and isinstance(value, (str, int, float, bool, list, type(None)))
+        }
+        if args:
+            logged['args'] = [str(a) for a in args]
+        try:
+            return CommandRun.objects.create(
+                command=self.__module__.rsplit('.', 1)[-1],
+                args=logged,
+                started_at=timezone.now(),
+            )
+        except DatabaseError:
+            return None # Table absente (migrate pas encore lancé)
+
+    def _finish_run(self, run, status, error, duration, before, cache_before):
+        # Appels HTTP de cette exécution seulement
+        http = {}
+        for name, after in ratelimit.snapshot().items():
+            previous = before.get(name, {})
+            delta = {key: round(after[key] - previous.get(key, 0), 3) for key in after}
+            if delta['requests'] or delta['throttled']:
+                http[name] = delta
+        for name, after in http_cache.snapshot().items():
+            previous = cache_before.get(name, {})
+            delta = {f"cache_{key}": count - previous.get(key, 0) for key, count in after.items()}
+            if any(delta.values()):
+                http.setdefault(name, {'requests': 0, 'wait': 0.0, 'throttled': 0}).update(delta)
+
+        rows = {key: count for key, count in self.rows.items() if count}
+        try:
+            CommandRun.objects.filter(pk=run.pk).update(
+                status=status,
+                error=error,
+                finished_at=timezone.now(),
+                duration=round(duration, 3),
+                phases=self.phases,
+                http=http,
+                http_requests=sum(int(api['requests']) for api in http.values()),
+                http_throttled=sum(int(api['throttled']) for api in http.values()),
+                rows=rows,
+                rows_written=sum(rows.get(key, 0) for key in WRITTEN),
+                rows_skipped=sum(rows.get(key, 0) for key in SKIPPED),
+            )
+        except DatabaseError:
+            pass # Ne jamais masquer le résultat de la commande
+
+
+def dashboard(days=30, last=20):
+    """
+    Synthèse par commande pour l'admin : exécutions, échecs, durée moyenne, débit (lignes/s),
+    appels HTTP et 429 sur `days` jours, durée moyenne par étape et histogramme des `last` dernières durées.
+    """
+    finished = CommandRun.objects.exclude(status=CommandRun.STATUS_RUNNING)
+    totals = (
+        finished.filter(started_at__gte=timezone.now() - timedelta(days=days))
+        .values('command')
+        .annotate(
+            runs=Count('id'),
+            failures=Count('id', filter=Q(status=CommandRun.STATUS_FAILED)),
+            avg_duration=Avg('duration'),
+            total_duration=Sum('duration'),
+            written=Sum('rows_written'),
+            http_requests=Sum('http_requests'),
+            http_throttled=Sum('http_throttled'),
+        )
+        .order_by('command')
+    )
+
+    rows = []
+    for total in totals:
+        recent = list(
+            finished.filter(command=total['command'])
+            .only('duration', 'started_at', 'status', 'phases', 'rows_written')[:last]
+        )[::-1]
+        longest = max((run.duration or 0 for run in recent), default=0) or 1
+
+        phases = Counter()
+        for run in recent:
+            phases.update(run.phases)
+
+        rows.append({
+            **total,
+            'throughput': round(total['written'] / total['total_duration'], 2) if total['total_duration'] else None,
+            'phases': {name: round(seconds / len(recent), 2) for name, seconds in phases.items()},
+            'bars': [
+                {'run': run, 'height': max(2, round((run.duration or 0) / longest * 100))}
+                for run in recent
+            ],
+        })
+    return rows
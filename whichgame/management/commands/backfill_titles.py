@@ -0,0 +1,60 @@
+import time
+
+from whichgame.ledger import TrackedCommand
+from whichgame.models import Game
+from whichgame.text import clean_title, franchise_root
+
+BATCH_SIZE = 500
+
+
+class Command(TrackedCommand):
+    help = 'Fills the normalized title columns (clean_title, franchise_root) for existing games.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recompute every game, not only the ones with empty columns (e.g. after changing the normalization).',
+        )
+
+    def handle(self, *args, **options):
+        start_time = time.time()
+
+        # 1. Games to process (new rows are filled by Game.save(), only old ones are empty)
+        games = Game.objects.only('id', 'title', 'clean_title', 'franchise_root').order_by('id')
+        if not options['all']:
+            games = games.filter(clean_title='')
+
+        total = games.count()
+        if total == 0:
+            self.stdout.write(self.style.SUCCESS("✅ All normalized titles are already filled."))
+            return
+
+        self.stdout.write(f"🔤 Normalizing titles for {total} games...")
+
+        # 2. Compute in Python, write in batches (bulk_update bypasses save() and updated_at)
+        batch = []
+        updated = 0
+        for game in games.iterator(chunk_size=BATCH_SIZE):
+            new_clean = clean_title(game.title)
+            new_root = franchise_root(game.title)[:100]
+            if game.clean_title == new_clean and game.franchise_root == new_root:
+                continue
+
+            game.clean_title = new_clean
+            game.franchise_root = new_root
+            batch.append(game)
+
+            if len(batch) >= BATCH_SIZE:
+                Game.objects.bulk_update(batch, ['clean_title', 'franchise_root'])
+                updated += len(batch)
+                batch = []
+                self.stdout.write(f"   Updated {updated}/{total}")
+
+        if batch:
+            Game.objects.bulk_update(batch, ['clean_title', 'franchise_root'])
+            updated += len(batch)
+
+        self.rows['updated'] += updated
+        duration = round(time.time() - start_time, 2)
+        self.stdout.write(self.style.SUCCESS(f"✅ Finished in {duration}s. {updated} games updated."))
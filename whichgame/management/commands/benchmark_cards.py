@@ -0,0 +1,101 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries
+from django.http import Http404
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.utils import translation
+from whichgame.views import HomeListView
+
+DUMMY_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'fragments': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+# Cache alias used by {% cache ... using="fragments" %} in game_card.html
+FRAGMENT_CACHE = 'fragments'
+
+class Command(BaseCommand):
+    help = (
+        'Measures explorer page render time without the game_card fragment cache, then with the configured '
+        'fragment backend cold (every card misses and is stored) and warm. Clears the fragment cache.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=5, help='Number of explorer pages rendered per pass.')
+        parser.add_argument('--repeat', type=int, default=3, help='Passes per scenario (best pass is kept).')
+        parser.add_argument('--query', type=str, default='', help='Explorer query string, e.g. "platform=PC&duration=short".')
+
+    def handle(self, *args, **options):
+        pages = options['pages']
+        repeat = options['repeat']
+        query = options['query']
+        fragments = caches[FRAGMENT_CACHE]
+
+        self.stdout.write(
+            f"⏱️ Rendering {pages} explorer pages x {repeat} passes (query: '{query or 'none'}', "
+            f"fragment backend: {type(fragments).__name__})..."
+        )
+        translation.activate('en')
+
+        # 1. "Before": every card is rendered (no cache backend)
+        with override_settings(CACHES=DUMMY_CACHE, DEBUG=True):
+            before = self._measure(pages, repeat, query)
+
+        with override_settings(DEBUG=True):
+            # 2. Cold: the configured backend is emptied before each pass (first visit after a deploy or
+            #    a recommendations_version bump: every card is rendered and written)
+            cold = self._measure(pages, repeat, query, before_pass=fragments.clear)
+
+            # 3. Warm: fragment cache filled by a first pass, then measured
+            fragments.clear()
+            self._render_pages(pages, query)
+            warm = self._measure(pages, repeat, query)
+
+        self.stdout.write(f"\n   {'Scenario':<22}{'ms/page':>10}{'queries/page':>15}")
+        self.stdout.write(f"   {'No card cache':<22}{before[0]:>10.1f}{before[1]:>15.1f}")
+        self.stdout.write(f"   {'Cold card cache':<22}{cold[0]:>10.1f}{cold[1]:>15.1f}")
+        self.stdout.write(f"   {'Warm card cache':<22}{warm[0]:>10.1f}{warm[1]:>15.1f}")
+
+        if warm[0] > 0:
+            self.stdout.write(self.style.SUCCESS(
+                f"\n✅ Speed-up (warm): x{before[0] / warm[0]:.1f}, cold-miss overhead: {cold[0] - before[0]:+.1f} ms/page"
+            ))
+
+    def _measure(self, pages, repeat, query, before_pass=None):
+        """Returns (best ms per page, queries per page). `before_pass` runs untimed before each pass."""
+        best = None
+        queries = 0
+        for _ in range(repeat):
+            if before_pass:
+                before_pass()
+            reset_queries()
+            start = time.perf_counter()
+            rendered = self._render_pages(pages, query)
+            elapsed = (time.perf_counter() - start) * 1000
+            queries = len(connection.queries)
+            if rendered and (best is None or elapsed / rendered < best):
+                best = elapsed / rendered
+        return (best or 0.0, queries / max(pages, 1))
+
+    def _render_pages(self, pages, query):
+        """Renders explorer pages 1..N through the real view, returns how many were rendered."""
+        factory = RequestFactory()
+        view = HomeListView.as_view()
+        rendered = 0
+
+        for page in range(1, pages + 1):
+            separator = '&' if query else ''
+            request = factory.get(f"/en/explorer/?{query}{separator}page={page}")
+            request.user = AnonymousUser()
+            try:
+                response = view(request)
+            except Http404:
+                break # Past the last page
+            response.render()
+            rendered += 1
+
+        return rendered
@@ -0,0 +1,183 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management import find_commands
+from django.core.management.base import BaseCommand, CommandError
+
+# Default budgets (ms). A target above its budget makes the command exit with status 1.
+MAX_CHECK_MS = 2000
+MAX_WSGI_MS = 4000
+MAX_COMMAND_MS = 300
+
+# Packages that `manage.py check` and a cold WSGI worker must never import (HTTP clients are
+# only needed by the data commands, which import them inside their functions)
+FORBIDDEN_IMPORTS = ['requests', 'howlongtobeatpy']
+
+# Printed on stderr just before the measured import, so the -X importtime lines that follow
+# can be told apart from django.setup()
+MARKER = '--- measured import ---'
+
+WSGI_SCRIPT = """
+import os, sys, time
+from wsgiref.util import setup_testing_defaults
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+start = time.perf_counter()
+from config.wsgi import application
+from django.conf import settings
+host = next((h.lstrip('.') for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost')
+environ = {'PATH_INFO': sys.argv[1], 'HTTP_HOST': host}
+setup_testing_defaults(environ)
+status = []
+b''.join(application(environ, lambda s, headers, exc_info=None: status.append(s)))
+print(status[0])
+print((time.perf_counter() - start) * 1000)
+"""
+
+COMMAND_SCRIPT = """
+import os, sys, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+import django
+django.setup()
+from django.core.management import load_command_class
+sys.stderr.write('%s\\n')
+start = time.perf_counter()
+load_command_class(sys.argv[1], sys.argv[2])
+print((time.perf_counter() - start) * 1000)
+""" % MARKER
+
+
+class Command(BaseCommand):
+    help = 'Measures cold start time (manage.py check, first WSGI request, command imports) against a budget.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per target (best run is kept).')
+        parser.add_argument('--path', type=str, default='/en/', help='URL requested by the cold WSGI worker.')
+        parser.add_argument('--commands', nargs='+', metavar='NAME', help='Only measure these commands (default: all whichgame commands).')
+        parser.add_argument('--top', type=int, default=5, help='Heaviest top-level packages shown per target.')
+        parser.add_argument('--max-check-ms', type=float, default=MAX_CHECK_MS, help='Budget for `manage.py check`.')
+        parser.add_argument('--max-wsgi-ms', type=float, default=MAX_WSGI_MS, help='Budget for WSGI import + first request.')
+        parser.add_argument('--max-command-ms', type=float, default=MAX_COMMAND_MS, help='Budget for importing one command module (after django.setup()).')
+        parser.add_argument('--no-budget', action='store_true', help='Report timings without failing on them (only forbidden imports fail).')
+        parser.add_argument('--forbid', nargs='*', default=FORBIDDEN_IMPORTS, metavar='PACKAGE', help='Packages that must not be imported by `check` or the cold WSGI worker.')
+        parser.add_argument('--isolated', action='store_true', help='Run the children against an empty temporary database and cache instead of the configured ones.')
+
+    def handle(self, *args, **options):
+        repeat = max(1, options['repeat'])
+        top = options['top']
+        results = []
+
+        self.stdout.write(f"⏱️ Measuring cold start ({repeat} runs per target, best run kept)...")
+
+        with tempfile.TemporaryDirectory(prefix='benchmark_startup-') as directory:
+            self.env = self._isolated_env(directory) if options['isolated'] else None
+            forbidden = self._measure(repeat, top, options, results)
+
+        # 4. Report
+        self.stdout.write(f"\n   {'Target':<36}{'ms':>10}{'budget':>10}   Heaviest imports (cumulative ms)")
+        over_budget = []
+        for label, ms, budget, heaviest in results:
+            packages = ", ".join(f"{name} {us / 1000:.0f}" for name, us in heaviest) or "-"
+            line = f"   {label:<36}{ms:>10.1f}{budget:>10.0f}   {packages}"
+            if ms > budget and not options['no_budget']:
+                over_budget.append(label)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+
+        for label, packages in forbidden:
+            self.stdout.write(self.style.ERROR(f"   {label} imports {', '.join(packages)}"))
+
+        if forbidden:
+            raise CommandError(f"Forbidden imports at startup: {', '.join(label for label, _ in forbidden)}")
+        if over_budget:
+            raise CommandError(f"Startup budget exceeded: {', '.join(over_budget)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✅ {len(results)} targets " + ("measured, no forbidden import." if options['no_budget'] else "within budget.")
+        ))
+
+    def _measure(self, repeat, top, options, results):
+        """Fills `results`. Returns [(label, forbidden packages imported)] for check and WSGI."""
+        forbidden = []
+
+        # 1. manage.py check: settings, app registry, models, URLconf and system checks
+        ms, stderr = self._best(repeat, ['manage.py', 'check'], timed_by_child=False)
+        results.append(('manage.py check', ms, options['max_check_ms'], self._heaviest(stderr, top)))
+        forbidden.append(('manage.py check', self._imported(stderr, options['forbid'])))
+
+        # 2. A brand new WSGI worker serving its first request (wsgi.py also warms the in-memory indexes)
+        label = f"WSGI cold {options['path']}"
+        ms, stderr = self._best(repeat, ['-c', WSGI_SCRIPT, options['path']])
+        results.append((label, ms, options['max_wsgi_ms'], self._heaviest(stderr, top)))
+        forbidden.append((label, self._imported(stderr, options['forbid'])))
+
+        # 3. Each command module on its own, on top of an already set up Django
+        app_config = apps.get_app_config('whichgame')
+        names = options['commands'] or sorted(find_commands(os.path.join(app_config.path, 'management')))
+        for name in names:
+            ms, stderr = self._best(repeat, ['-c', COMMAND_SCRIPT, app_config.name, name])
+            results.append((f"command {name}", ms, options['max_command_ms'], self._heaviest(stderr.split(MARKER, 1)[-1], top)))
+
+        return [(label, packages) for label, packages in forbidden if packages]
+
+    def _isolated_env(self, directory):
+        """Environment pointing every file the children may open (database, caches) into `directory`."""
+        env = dict(os.environ)
+        env.update({
+            'DATABASE_PATH': os.path.join(directory, 'db.sqlite3'),
+            'CACHE_LOCATION': os.path.join(directory, 'cache'),
+            'RATE_LIMIT_DB': os.path.join(directory, 'ratelimit.sqlite3'),
+            'HTTP_CACHE_DB': os.path.join(directory, 'http_cache.sqlite3'),
+        })
+        return env
+
+    def _best(self, repeat, argv, timed_by_child=True):
+        """
+        Runs `python -X importtime <argv>` `repeat` times in a fresh interpreter.
+        Returns (best ms, stderr of that run). The child prints its own timing on the last
+        stdout line unless `timed_by_child` is False (then the whole process is timed).
+        """
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            process = subprocess.run(
+                [sys.executable, '-X', 'importtime', *argv],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+                env=self.env,
+            )
+            elapsed = (time.perf_counter() - start) * 1000
+            if process.returncode != 0:
+                raise CommandError(f"`{' '.join(argv[:2])}` failed:\n{process.stderr[-2000:]}")
+            if timed_by_child:
+                elapsed = float(process.stdout.strip().splitlines()[-1])
+            if best is None or elapsed < best[0]:
+                best = (elapsed, process.stderr)
+        return best
+
+    def _imported(self, importtime_output, packages):
+        """Those of `packages` that appear (at any depth) in -X importtime lines."""
+        found = set()
+        for line in importtime_output.splitlines():
+            if line.startswith('import time:') and 'cumulative' not in line:
+                found.add(line.rsplit('|', 1)[-1].strip().split('.')[0])
+        return sorted(found.intersection(packages))
+
+    def _heaviest(self, importtime_output, top):
+        """Top-level packages sorted by cumulative import time (µs), from -X importtime lines."""
+        totals = Counter()
+        for line in importtime_output.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            # Nested imports are indented: they are already counted in their parent
+            if name[1:2] == ' ':
+                continue
+            totals[name.strip().split('.')[0]] += int(cumulative)
+        return totals.most_common(top)
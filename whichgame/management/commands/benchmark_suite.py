@@ -0,0 +1,223 @@
+import io
+import json
+import platform
+import statistics
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from whichgame.metrics import QueryTimer
+from whichgame.models import Game
+from whichgame.management.commands import sync_hot_deals
+
+DUMMY_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'fragments': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+# Explorer filter combinations (same parameters as the explorer form)
+EXPLORER_QUERIES = {
+    'explorer': '',
+    'explorer_platform': 'platform=PC',
+    'explorer_genre_duration': 'genre=Role-playing&duration=medium',
+    'explorer_price_years': 'price=20&year_min=2010&year_max=2020',
+    'explorer_deals': 'deal=lowest',
+    'explorer_all_filters': 'platform=PlayStation&genre=Adventure&duration=short&price=30&year_min=2000',
+    'explorer_search': 'search=dragon',
+    'explorer_page_5': 'page=5',
+}
+
+AUTOCOMPLETE_QUERIES = ['s', 'sha', 'shadow leg', 'zzz']
+
+
+class Command(BaseCommand):
+    help = 'Runs the benchmark suite (pages and data commands) and writes machine-readable results.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Measured runs per scenario.')
+        parser.add_argument('--warmup', type=int, default=1, help='Unmeasured runs per scenario (imports, in-memory indexes).')
+        parser.add_argument('--only', nargs='+', metavar='SCENARIO', help='Only run these scenarios (prefix match, e.g. "explorer").')
+        parser.add_argument('--list', action='store_true', help='List the scenarios and exit.')
+        parser.add_argument('--output', type=str, help='Write the results to this JSON file.')
+        parser.add_argument('--compare', type=str, metavar='BASELINE', help='JSON file from a previous run to compare against.')
+        parser.add_argument('--fail-above', type=float, default=None, metavar='PCT', help='Exit with status 1 if a scenario median is PCT%% slower than the baseline.')
+
+    def handle(self, *args, **options):
+        scenarios = self._scenarios()
+        if options['list']:
+            for name in scenarios:
+                self.stdout.write(name)
+            return
+
+        if options['only']:
+            scenarios = {
+                name: scenario for name, scenario in scenarios.items()
+                if any(name.startswith(prefix) for prefix in options['only'])
+            }
+            if not scenarios:
+                raise CommandError("No scenario matches --only. Use --list to see them.")
+
+        catalog_size = Game.objects.count()
+        if not catalog_size:
+            raise CommandError("The catalog is empty. Run `generate_catalog --size 10000` on a benchmark DATABASE_PATH first.")
+
+        repeat = max(1, options['repeat'])
+        self.stdout.write(f"⏱️ {len(scenarios)} scenarios on {catalog_size} games ({options['warmup']} warm-up + {repeat} runs each)...\n")
+
+        # 1. Run every scenario (pages without any cache: we measure the work, not the cache hit)
+        results = {}
+        with override_settings(CACHES=DUMMY_CACHE, ALLOWED_HOSTS=['*']):
+            for name, scenario in scenarios.items():
+                results[name] = self._measure(scenario, options['warmup'], repeat)
+                result = results[name]
+                self.stdout.write(
+                    f"   {name:<28}{result['median_ms']:>10.1f} ms  (min {result['min_ms']:.1f}, max {result['max_ms']:.1f})"
+                    f"{result['queries']:>7} queries ({result['sql_ms']:.1f} ms SQL)"
+                )
+
+        report = {
+            'commit': self._git_commit(),
+            'timestamp': datetime.now(dt_timezone.utc).isoformat(timespec='seconds'),
+            'catalog_size': catalog_size,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': str(settings.DATABASES['default']['NAME']),
+            'repeat': repeat,
+            'scenarios': results,
+        }
+
+        # 2. Machine-readable output
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"\n💾 Results written to {options['output']}"))
+
+        # 3. Comparison with a baseline (e.g. the same suite on the previous commit)
+        if options['compare']:
+            regressions = self._compare(report, options['compare'], options['fail_above'])
+            if regressions:
+                raise CommandError(f"{len(regressions)} scenario(s) slower than the baseline: {', '.join(regressions)}")
+
+    def _scenarios(self):
+        """{name: callable}. A callable returns nothing; page callables raise on non-200 responses."""
+        client = Client()
+        scenarios = {}
+
+        def page(url):
+            def run():
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f"{url} returned {response.status_code}")
+            return run
+
+        # Slugs picked once: a popular game, like the pages people actually open
+        detail_slug = (
+            Game.objects.filter(slug__isnull=False).order_by('-total_rating_count').values_list('slug', flat=True).first()
+        )
+
+        scenarios['home'] = page('/en/')
+        for name, query in EXPLORER_QUERIES.items():
+            scenarios[name] = page(f"/en/explorer/?{query}")
+        for name, query in EXPLORER_QUERIES.items():
+            if 'page=' not in query: # The JSON API pages with a cursor, not page numbers
+                scenarios[name.replace('explorer', 'explorer_api', 1)] = page(f"/en/api/v1/explorer/?{query}")
+        for query in AUTOCOMPLETE_QUERIES:
+            scenarios[f"autocomplete_{query.replace(' ', '_')}"] = page(f"/en/api/autocomplete/?q={query}")
+        if detail_slug:
+            scenarios['detail'] = page(f"/en/game/{detail_slug}/")
+        scenarios['sitemap'] = page('/sitemap.xml')
+
+        # Data commands: run inside a transaction that is rolled back, so every run sees the same data
+        scenarios['calculate_recommendations_lsh'] = self._command('calculate_recommendations', '--candidates', 'lsh')
+        scenarios['link_remakes'] = self._command('link_remakes')
+        scenarios['clean_mobile_games'] = self._command('clean_mobile_games', '--dry-run')
+        scenarios['deal_matcher'] = self._deal_matcher
+        return scenarios
+
+    def _command(self, name, *args):
+        def run():
+            with transaction.atomic():
+                call_command(name, *args, stdout=io.StringIO(), stderr=io.StringIO())
+                transaction.set_rollback(True)
+        return run
+
+    def _deal_matcher(self):
+        """sync_hot_deals' matching step alone, fed with deals built from the catalog (no HTTP)."""
+        if not hasattr(self, '_live_deals'):
+            titles = Game.objects.exclude(clean_title='').values_list('clean_title', flat=True)[:3000]
+            # Two thirds of the deals match a local game, like a real CheapShark crawl
+            self._live_deals = {title: 4.99 for title in titles}
+            self._live_deals.update({f"unknowndeal{i}": 9.99 for i in range(len(self._live_deals) // 2)})
+
+        command = sync_hot_deals.Command(stdout=io.StringIO())
+        command.rows = Counter() # Normally set by TrackedCommand.execute()
+        with transaction.atomic():
+            command._update_local_games(self._live_deals)
+            transaction.set_rollback(True)
+
+    def _measure(self, scenario, warmup, repeat):
+        for _ in range(warmup):
+            scenario()
+
+        # Counted with an execute wrapper: connection.queries is capped at 9000 entries
+        timings = []
+        for _ in range(repeat):
+            timer = QueryTimer()
+            with connection.execute_wrapper(timer):
+                start = time.perf_counter()
+                scenario()
+                timings.append((time.perf_counter() - start) * 1000)
+
+        return {
+            'min_ms': round(min(timings), 2),
+            'median_ms': round(statistics.median(timings), 2),
+            'max_ms': round(max(timings), 2),
+            'queries': timer.count,
+            'sql_ms': round(timer.duration * 1000, 2),
+        }
+
+    def _compare(self, report, path, fail_above):
+        """Prints the median change per scenario, returns the scenarios above `fail_above` %."""
+        try:
+            with open(path) as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read baseline {path}: {e}")
+
+        self.stdout.write(f"\n📊 Compared with {path} (commit {baseline.get('commit') or '?'}, {baseline.get('catalog_size')} games)")
+        if baseline.get('catalog_size') != report['catalog_size']:
+            self.stdout.write(self.style.WARNING("   ⚠️ Different catalog sizes: timings are not comparable."))
+
+        regressions = []
+        for name, result in report['scenarios'].items():
+            before = baseline.get('scenarios', {}).get(name)
+            if not before or not before['median_ms']:
+                self.stdout.write(f"   {name:<28}{'new':>10}")
+                continue
+            change = (result['median_ms'] - before['median_ms']) / before['median_ms'] * 100
+            line = f"   {name:<28}{change:>+9.1f}%  queries {before['queries']} -> {result['queries']}"
+            if fail_above is not None and change > fail_above:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(line))
+            elif change < 0:
+                self.stdout.write(self.style.SUCCESS(line))
+            else:
+                self.stdout.write(line)
+        return regressions
+
+    def _git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
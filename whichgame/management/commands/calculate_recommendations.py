@@ -1,125 +1,147 @@
-import re
-from django.core.management.base import BaseCommand
+import random
+import time
+
+from django.db import transaction
 from whichgame.models import Game
+from whichgame import caching, db
+from whichgame.ledger import TrackedCommand
+from whichgame.similarity import GameFeatures, MinHashLSH, score, top_recommendations
 
-class Command(BaseCommand):
+class Command(TrackedCommand):
     help = 'Generates game recommendations based on a weighted score (Semantics, Metadata, Diversity).'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--candidates',
+            choices=['exhaustive', 'lsh'],
+            default='exhaustive',
+            help='Candidate generation: score every pair (exhaustive) or pre-select neighbours with MinHash/LSH.',
+        )
+        parser.add_argument('--lsh-bands', type=int, default=32, help='LSH bands. More bands = better recall, slower.')
+        parser.add_argument('--lsh-rows', type=int, default=2, help='MinHash rows per band. Fewer rows = better recall, slower.')
+        parser.add_argument('--max-candidates', type=int, default=300, help='Max candidates scored per game in LSH mode.')
+        parser.add_argument(
+            '--measure-recall',
+            type=int,
+            default=0,
+            metavar='N',
+            help='Compare LSH against the exhaustive scorer on N sampled games and report recall (no DB write).',
+        )
+
     def handle(self, *args, **options):
         # Base filter: Only process games with at least 5 reviews to ensure quality recommendations
         games = list(Game.objects.filter(total_rating_count__gte=5))
         total = len(games)
-        
+
         if total == 0:
             self.stdout.write(self.style.WARNING("⚠️ No eligible games found for recommendations."))
             return
 
-        self.stdout.write(f"🧠 Processing recommendations for {total} games...")
+        # 1. Pre-compute keywords, genres, themes and franchise roots once per game
+        with self.phase('features'):
+            features = [GameFeatures(game) for game in games]
+
+        lsh = None
+        if options['candidates'] == 'lsh' or options['measure_recall']:
+            start_time = time.time()
+            lsh = MinHashLSH(
+                features,
+                bands=options['lsh_bands'],
+                rows=options['lsh_rows'],
+                max_candidates=options['max_candidates'],
+            )
+            self.stdout.write(f"🧮 LSH index built in {round(time.time() - start_time, 2)}s "
+                              f"({options['lsh_bands']} bands x {options['lsh_rows']} rows)")
+
+        if options['measure_recall']:
+            self._measure_recall(features, lsh, options['measure_recall'])
+            return
 
-        strict_genres = {'Racing', 'Sport', 'Fighting', 'Puzzle', 'Strategy', 'Simulator'}
-        stopwords = self._get_stopwords()
+        self.stdout.write(f"🧠 Processing recommendations for {total} games ({options['candidates']} candidates)...")
 
         count_updated = 0
+        start_time = time.time()
+        pending = []
 
         # Processing loop
-        for index, game in enumerate(games, 1):
-            candidates_scores = []
-            game_keywords = self._extract_keywords(game.summary, stopwords)
-            game_root = self._get_title_root(game.title)
-
-            for candidate in games:
-                if game.id == candidate.id: # type: ignore
-                    continue
-
-                # 1. Strict Genre Check (e.g., Don't recommend a Racing game for a RPG)
-                if not self._check_strict_genres(game.genres, candidate.genres, strict_genres):
-                    continue
-
-                score = 0
-                
-                # 2. Keyword Intersection (Summary semantics)
-                candidate_keywords = self._extract_keywords(candidate.summary, stopwords)
-                shared_words = game_keywords.intersection(candidate_keywords)
-                score += len(shared_words) * 2
-
-                # 3. Metadata Intersection (Genres & Themes)
-                shared_genres = set(game.genres).intersection(set(candidate.genres))
-                score += len(shared_genres) * 5
-
-                shared_themes = set(game.themes).intersection(set(candidate.themes))
-                score += len(shared_themes) * 4
-
-                # 4. Same Franchise / Title similarity penalty or boost
-                candidate_root = self._get_title_root(candidate.title)
-                if game_root and candidate_root and game_root == candidate_root:
-                    score += 15 # Boost for being in the same franchise
-
-                if score > 0:
-                    candidates_scores.append((score, candidate))
-
-            # 5. Sort by score descending
-            candidates_scores.sort(key=lambda x: x[0], reverse=True)
-
-            # 6. Apply Diversity Filter (Limit games from the exact same franchise)
-            final_selection = []
-            same_franchise_count = 0
-
-            for score, candidate in candidates_scores:
-                if len(final_selection) >= 6: # Store top 6 recommendations
-                    break
-                
-                candidate_root = self._get_title_root(candidate.title)
-                if game_root and candidate_root and game_root == candidate_root:
-                    if same_franchise_count >= 2:
-                        continue # Skip to ensure diversity
-                    same_franchise_count += 1
-                
-                final_selection.append(candidate)
-
-            # 7. Update Database (ManyToMany relation)
+        for index, game in enumerate(features, 1):
+            # 2. Candidate generation (every game, or LSH neighbours only)
+            candidates = lsh.candidates(game) if lsh else features
+
+            # 3. Exact scoring + diversity filter
+            final_selection = top_recommendations(game, candidates)
+
+            # 4. Update Database (ManyToMany relation), one short transaction per chunk of games
             if final_selection:
-                game.similar_games.set(final_selection)
-            
+                pending.append((game.game, [c.game for c in final_selection]))
+                if len(pending) >= db.WRITE_CHUNK_SIZE:
+                    self._save_recommendations(pending)
+                    pending = []
+
             count_updated += 1
 
             if index % 100 == 0:
                 self.stdout.write(f"   Processed {index}/{total}")
 
-        self.stdout.write(self.style.SUCCESS(f"✅ Finished. {count_updated} games updated with new recommendations."))
-
-    def _check_strict_genres(self, g1, g2, strict_list):
-        """Ensures fundamental genre incompatibilities are respected."""
-        for genre in strict_list:
-            if (genre in g1) != (genre in g2):
-                return False
-        return True
-
-    def _get_stopwords(self):
-        """Returns a set of common words to ignore during semantic keyword extraction."""
-        return {
-            'the', 'a', 'an', 'and', 'or', 'of', 'to', 'in', 'on', 'at', 'with', 'by', 'from',
-            'game', 'play', 'player', 'world', 'story', 'new', 'best', 'experience', 'character',
-            'level', 'mode', 'edition', 'version', 'series', 'explore', 'fight', 'action', 'adventure',
-            'gameplay', 'system', 'features', 'time', 'original', 'classic', 'set', 'take', 'control',
-            'find', 'make', 'use', 'get', 'one', 'two', 'three', 'first', 'second', 'third'
-        }
-
-    def _extract_keywords(self, text, stopwords):
-        """Extracts meaningful keywords from a text block."""
-        if not text: 
-            return set()
-        text_clean = re.sub(r'[^\w\s]', '', text.lower())
-        words = text_clean.split()
-        return {w for w in words if len(w) > 3 and w not in stopwords}
-
-    def _get_title_root(self, title):
-        """Extracts the base franchise name from a title to detect sequels/spin-offs."""
-        if not title: 
-            return ""
-        t = title.lower()
-        t = re.sub(r'\b(i|ii|iii|iv|v|vi|vii|viii|ix|x)\b', '', t) # Remove isolated roman numerals
-        t = re.sub(r'[^\w\s]', '', t)
-        for prefix in ['the ', 'a ', 'super ']:
-            if t.startswith(prefix):
-                t = t[len(prefix):]
-        return t.split()[0] if t.split() else ""
\ No newline at end of file
+        if pending:
+            self._save_recommendations(pending)
+
+        # Invalidate cached explorer cards ("You might also like" block)
+        caching.bump_version(caching.RECOMMENDATIONS)
+
+        duration = round(time.time() - start_time, 2)
+        self.stdout.write(self.style.SUCCESS(f"✅ Finished in {duration}s. {count_updated} games updated with new recommendations."))
+
+    def _save_recommendations(self, pending):
+        """
+        Replaces the similar_games rows of a chunk of games in one short transaction
+        (same result as .set() per game, without a write transaction per game).
+        """
+        Through = Game.similar_games.through
+        with self.phase('save'), transaction.atomic():
+            Through.objects.filter(from_game_id__in=[game.id for game, _ in pending]).delete()
+            Through.objects.bulk_create([
+                Through(from_game_id=game.id, to_game_id=similar.id)
+                for game, selection in pending
+                for similar in selection
+            ])
+        self.rows['updated'] += len(pending)
+
+    def _measure_recall(self, features, lsh, sample_size):
+        """Recall@6 of the LSH pipeline against the exhaustive scorer on a random sample."""
+        sample = random.Random(0).sample(features, min(sample_size, len(features)))
+        self.stdout.write(f"📏 Measuring recall on {len(sample)} games...")
+
+        exhaustive_time = 0.0
+        lsh_time = 0.0
+        hits = 0
+        expected = 0
+        score_ratio = 0.0
+        candidate_count = 0
+
+        for game in sample:
+            start_time = time.perf_counter()
+            reference = top_recommendations(game, features)
+            exhaustive_time += time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            candidates = lsh.candidates(game)
+            approx = top_recommendations(game, candidates)
+            lsh_time += time.perf_counter() - start_time
+
+            candidate_count += len(candidates)
+            reference_ids = {c.id for c in reference}
+            hits += len(reference_ids & {c.id for c in approx})
+            expected += len(reference_ids)
+
+            # Ties make ID recall pessimistic: also compare the total score of both selections
+            reference_score = sum(score(game, c) for c in reference)
+            score_ratio += sum(score(game, c) for c in approx) / reference_score if reference_score else 1.0
+
+        recall = hits / expected if expected else 1.0
+        n = len(sample)
+        self.stdout.write(f"   🎯 Recall@6: {recall:.1%} ({hits}/{expected})")
+        self.stdout.write(f"   📊 Score captured: {score_ratio / n:.1%} of the exhaustive selection")
+        self.stdout.write(f"   🔎 Avg candidates scored: {candidate_count / n:.0f} (vs {len(features) - 1} exhaustive)")
+        self.stdout.write(f"   ⏱️ Per game: exhaustive {exhaustive_time / n * 1000:.1f}ms | LSH {lsh_time / n * 1000:.1f}ms")
+        self.stdout.write(self.style.SUCCESS("✅ Recall measurement complete (database untouched)."))
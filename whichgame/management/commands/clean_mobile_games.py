@@ -1,9 +1,9 @@
 import time
-from django.core.management.base import BaseCommand
 from django.db.models import Q
+from whichgame.ledger import TrackedCommand
 from whichgame.models import Game
 
-class Command(BaseCommand):
+class Command(TrackedCommand):
     help = 'Deletes games that are EXCLUSIVELY available on Mobile (Android/iOS) or Web Browser.'
 
     def add_arguments(self, parser):
@@ -43,6 +43,7 @@ class Command(BaseCommand):
                     self.stdout.write(self.style.WARNING(f"   [DRY-RUN] Would delete: {game.title} ({game.platforms})"))
                 else:
                     game.delete()
+                    self.rows['deleted'] += 1
                     self.stdout.write(f"   🗑️ Deleted: {game.title}")
                 deleted_count += 1
             else:
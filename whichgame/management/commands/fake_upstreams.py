@@ -0,0 +1,415 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from django.core.management.base import BaseCommand
+from django.utils.text import slugify
+from whichgame.management.commands.generate_catalog import (
+    GENRES, MOBILE_PLATFORMS, PLATFORMS, SUBTITLES, SUMMARY_WORDS, THEMES, TITLE_NOUNS, TITLE_WORDS,
+)
+
+# Recorded payloads (real IGDB / CheapShark / HLTB shapes), served before the generated games
+FIXTURES_DIR = Path(__file__).resolve().parents[2] / 'fixtures' / 'upstreams'
+
+# Generated games get IGDB ids above this one (no clash with the fixtures)
+FIRST_GENERATED_ID = 1_000_000
+
+# Upstream page size limits
+IGDB_MAX_LIMIT = 500
+CHEAPSHARK_MAX_PAGE_SIZE = 60
+
+# howlongtobeatpy scrapes the home page for its `_app-*.js` script, then reads the search
+# endpoint and API key from it: the fake script contains every pattern it has looked for.
+HLTB_KEY = 'fakehltbkey'
+HLTB_HOME = '<html><head><script src="/_next/static/chunks/pages/_app-fake.js"></script></head><body></body></html>'
+HLTB_SCRIPT = (
+    'users:{id:"%(key)s"};'
+    'fetch("/api/search/".concat("%(key)s"),{method:"POST"});'
+    'fetch("/api/find",{method:"POST",headers:{}});'
+) % {'key': HLTB_KEY}
+
+# Where each API lives on the fake server (prefix -> rate limit bucket)
+APIS = {'/igdb/': 'igdb', '/twitch/': 'twitch', '/cheapshark/': 'cheapshark', '/hltb/': 'hltb'}
+
+_CLAUSE = re.compile(r'^([\w.]+)\s*(!=|>=|<=|=|>|<|~)\s*(.+)$')
+
+
+class Command(BaseCommand):
+    help = 'Serves fake IGDB, Twitch OAuth, CheapShark and HLTB APIs locally (benchmarks, CI). Set FAKE_UPSTREAMS_URL to use it.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', type=str, default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--games', type=int, default=2000, help='Generated games served after the fixtures.')
+        parser.add_argument('--seed', type=int, default=42, help='Seed for generated data, latency jitter and injected errors.')
+        parser.add_argument('--latency-ms', type=float, default=50, help='Added latency per response.')
+        parser.add_argument('--jitter-ms', type=float, default=0, help='Random extra latency (0..N ms) per response.')
+        parser.add_argument('--rate', type=float, default=0, help='Requests/second allowed per API before answering 429 (0 = unlimited).')
+        parser.add_argument('--burst', type=int, default=4, help='Burst size of the --rate token bucket.')
+        parser.add_argument('--error-rate', type=float, default=0, help='Share of requests answered with an injected 429 (0.0 - 1.0).')
+
+    def handle(self, *args, **options):
+        upstream = FakeUpstreams(options)
+        handler = type('Handler', (FakeHandler,), {'upstream': upstream, 'verbose': options['verbosity'] >= 2})
+        server = ThreadingHTTPServer((options['host'], options['port']), handler)
+        server.daemon_threads = True
+
+        base_url = f"http://{options['host']}:{options['port']}"
+        self.stdout.write(self.style.SUCCESS(
+            f"🧪 Fake upstreams on {base_url} ({len(upstream.games)} IGDB games, {len(upstream.deals)} deals)"
+        ))
+        self.stdout.write(
+            f"   latency {options['latency_ms']}ms (+0..{options['jitter_ms']}ms), "
+            f"rate {options['rate'] or 'unlimited'}/s per API, injected 429: {options['error_rate'] * 100:.0f}%"
+        )
+        self.stdout.write(f"   export FAKE_UPSTREAMS_URL={base_url} IGDB_CLIENT_ID=fake IGDB_CLIENT_SECRET=fake")
+        self.stdout.write(f"   Counters: {base_url}/_stats  (Ctrl+C to stop)")
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write("\n📊 Requests served:")
+            for api, counts in sorted(upstream.stats.items()):
+                self.stdout.write(f"   {api:<12}{counts['requests']:>7} requests{counts['throttled']:>7} x 429")
+
+
+class FakeUpstreams:
+    """Data, latency, rate limits and error injection shared by every request thread."""
+
+    def __init__(self, options):
+        self.latency = options['latency_ms'] / 1000
+        self.jitter = options['jitter_ms'] / 1000
+        self.rate = options['rate']
+        self.burst = options['burst']
+        self.error_rate = options['error_rate']
+        self.rng = random.Random(options['seed'])
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.stats = defaultdict(lambda: {'requests': 0, 'throttled': 0})
+
+        self.games = self._load('igdb_games.json') + self._generate_games(options['games'], random.Random(options['seed']))
+        self.games.sort(key=lambda game: game['id'])
+        self.time_to_beats = self._time_to_beats()
+        self.deals = self._deals()
+        self.hltb = self._hltb()
+
+    # --- Traffic shaping ---
+
+    def admit(self, api):
+        """Returns (delay in s, throttled?) for one request to `api`, and counts it."""
+        with self.lock:
+            self.stats[api]['requests'] += 1
+            delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0)
+            throttled = self.error_rate > 0 and self.rng.random() < self.error_rate
+
+            if self.rate and not throttled:
+                now = time.monotonic()
+                tokens, updated = self.buckets.get(api, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - updated) * self.rate)
+                throttled = tokens < 1
+                self.buckets[api] = (tokens if throttled else tokens - 1, now)
+
+            if throttled:
+                self.stats[api]['throttled'] += 1
+        return delay, throttled
+
+    # --- Data ---
+
+    def _load(self, name):
+        with open(FIXTURES_DIR / name) as f:
+            return json.load(f)
+
+    def _generate_games(self, count, rng):
+        now = int(time.time())
+        games = []
+        for index in range(count):
+            game_id = FIRST_GENERATED_ID + index
+            name = f"{rng.choice(TITLE_WORDS)} {rng.choice(TITLE_NOUNS)}"
+            if rng.random() < 0.3:
+                name = f"{name}: {rng.choice(SUBTITLES)}"
+            platforms = rng.sample(MOBILE_PLATFORMS if rng.random() < 0.03 else PLATFORMS, rng.randint(1, 3))
+            # A few recent releases, so import_news and refresh_ghost_games find something
+            if rng.random() < 0.03:
+                released = now - rng.randint(0, 6 * 86400)
+            else:
+                released = rng.randint(790000000, now)
+            games.append({
+                'id': game_id,
+                'name': name,
+                'slug': f"{slugify(name)}-{game_id}",
+                'rating': round(rng.uniform(40, 98), 2),
+                'total_rating_count': int(rng.paretovariate(1.2) * 5),
+                'hypes': rng.choice([0, 0, 5, 20, 80]),
+                'follows': rng.choice([0, 3, 10, 50, 300]),
+                'summary': " ".join(rng.choice(SUMMARY_WORDS) for _ in range(rng.randint(20, 60))).capitalize() + ".",
+                'cover': {'url': f"//images.igdb.com/igdb/image/upload/t_thumb/fake{game_id}.jpg"},
+                'platforms': [{'id': PLATFORMS.index(p) + 1 if p in PLATFORMS else 90 + MOBILE_PLATFORMS.index(p), 'name': p} for p in platforms],
+                'genres': [{'name': g} for g in rng.sample(GENRES, rng.randint(1, 3))],
+                'themes': [{'name': t} for t in rng.sample(THEMES, rng.randint(0, 3))],
+                'first_release_date': released,
+                'release_dates': [{'y': time.gmtime(released).tm_year}],
+                'game_type': 8 if rng.random() < 0.03 else 0,
+                'videos': [{'video_id': f"fake{game_id}"}] if rng.random() < 0.5 else [],
+                'screenshots': [{'url': f"//images.igdb.com/igdb/image/upload/t_thumb/fakesc{game_id}_{n}.jpg"} for n in range(rng.randint(0, 3))],
+                'updated_at': now - rng.randint(0, 60 * 86400),
+            })
+        return games
+
+    def _time_to_beats(self):
+        rng = random.Random(len(self.games))
+        records = []
+        for game in self.games:
+            if rng.random() < 0.7:
+                hours = rng.choice([3, 8, 12, 20, 35, 60])
+                records.append({
+                    'id': game['id'], 'game_id': game['id'],
+                    'hastily': hours * 3600, 'normally': int(hours * 1.4) * 3600, 'completely': hours * 2 * 3600,
+                })
+        return records
+
+    def _deals(self):
+        """CheapShark deals: the recorded ones, then one for about a third of the generated PC games."""
+        pc = {'PC (Microsoft Windows)', 'Mac', 'Linux'}
+        rng = random.Random(len(self.games) + 1)
+        deals = []
+        for title, deal in self._load('cheapshark.json').items():
+            deals.append(dict(deal, title=title, dealRating='10.0'))
+        for game in self.games:
+            if game['id'] >= FIRST_GENERATED_ID and pc & {p['name'] for p in game['platforms']} and rng.random() < 0.33:
+                normal = rng.choice([9.99, 19.99, 29.99, 59.99])
+                deals.append({
+                    'title': game['name'],
+                    'salePrice': f"{normal * rng.choice([0.25, 0.5, 0.75]):.2f}",
+                    'normalPrice': f"{normal:.2f}",
+                    'storeID': str(rng.choice([1, 7, 25])),
+                    'steamAppID': str(game['id']),
+                    'dealRating': f"{rng.uniform(5, 9.9):.1f}",
+                })
+        for number, deal in enumerate(deals):
+            deal.update(dealID=f"fakedeal{number}", gameID=str(number), internalName=slugify(deal['title']).replace('-', '').upper())
+        deals.sort(key=lambda deal: float(deal['dealRating']), reverse=True)
+        return deals
+
+    def _hltb(self):
+        """HLTB entries (main story hours), recorded ones first, generated from time_to_beats for the others."""
+        entries = dict(self._load('hltb.json'))
+        by_id = {record['game_id']: record for record in self.time_to_beats}
+        for game in self.games:
+            if game['name'] not in entries and game['id'] in by_id:
+                entries[game['name']] = by_id[game['id']]['normally'] / 3600
+        return entries
+
+    # --- Endpoints ---
+
+    def igdb(self, endpoint, body):
+        query = parse_apicalypse(body)
+        records = self.time_to_beats if endpoint == 'game_time_to_beats' else self.games if endpoint == 'games' else None
+        if records is None:
+            return 404, {'message': f"Unknown endpoint {endpoint}"}
+
+        if 'search' in query:
+            term = query['search'].strip('"').lower()
+            records = [record for record in records if term in record.get('name', '').lower()]
+        if 'where' in query:
+            records = [record for record in records if matches(record, query['where'])]
+        if 'sort' in query:
+            field, _, direction = query['sort'].partition(' ')
+            records = sorted(records, key=lambda record: record.get(field) or 0, reverse=direction.strip() == 'desc')
+
+        limit = min(int(query.get('limit', 10)), IGDB_MAX_LIMIT)
+        offset = int(query.get('offset', 0))
+        return 200, records[offset:offset + limit]
+
+    def cheapshark(self, endpoint, params):
+        if endpoint == 'deals':
+            page_size = min(int(params.get('pageSize', 60)), CHEAPSHARK_MAX_PAGE_SIZE)
+            page = int(params.get('pageNumber', 0))
+            return 200, self.deals[page * page_size:(page + 1) * page_size]
+        if endpoint == 'games':
+            title = params.get('title', '').lower()
+            limit = int(params.get('limit', 60))
+            found = [deal for deal in self.deals if title and title in deal['title'].lower()][:limit]
+            return 200, [
+                {
+                    'gameID': deal['gameID'], 'steamAppID': deal['steamAppID'], 'cheapest': deal['salePrice'],
+                    'cheapestDealID': deal['dealID'], 'external': deal['title'], 'internalName': deal['internalName'],
+                    'thumb': '',
+                }
+                for deal in found
+            ]
+        return 404, {'error': f"Unknown endpoint {endpoint}"}
+
+    def hltb_search(self, body):
+        try:
+            terms = [term.lower() for term in json.loads(body or b'{}').get('searchTerms', []) if term]
+        except ValueError:
+            return 400, {'error': 'Invalid JSON'}
+        data = []
+        for number, (name, hours) in enumerate(self.hltb.items()):
+            if terms and all(term in name.lower() for term in terms):
+                seconds = int(hours * 3600)
+                data.append({
+                    'game_id': number + 1, 'game_name': name, 'game_name_date': 0, 'game_alias': '', 'game_type': 'game',
+                    'game_image': '', 'comp_lvl_combine': 0, 'comp_lvl_sp': 1, 'comp_lvl_co': 0, 'comp_lvl_mp': 0,
+                    'comp_main': seconds, 'comp_plus': int(seconds * 1.3), 'comp_100': seconds * 2, 'comp_all': seconds,
+                    'comp_main_count': 10, 'comp_plus_count': 5, 'comp_100_count': 2, 'comp_all_count': 17,
+                    'invested_co': 0, 'invested_mp': 0, 'count_comp': 17, 'count_speedrun': 0, 'count_backlog': 0,
+                    'count_review': 5, 'review_score': 80, 'count_playing': 0, 'count_retired': 0,
+                    'profile_platform': 'PC', 'profile_popular': 10, 'release_world': 2020,
+                })
+        return 200, {'color': 'blue', 'title': '', 'category': 'games', 'count': len(data), 'pageCurrent': 1,
+                     'pageTotal': 1, 'pageSize': 20, 'data': data[:20]}
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    upstream = None
+    verbose = False
+    protocol_version = 'HTTP/1.1' # Keep-alive, like the real APIs (http_sessions reuses connections)
+
+    def do_GET(self):
+        self._dispatch(b'')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self._dispatch(self.rfile.read(length) if length else b'')
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+    def _dispatch(self, body):
+        url = urlsplit(self.path)
+        if url.path == '/_stats':
+            return self._send(200, dict(self.upstream.stats))
+
+        api = next((name for prefix, name in APIS.items() if url.path.startswith(prefix)), None)
+        if api is None:
+            return self._send(404, {'error': 'Unknown API'})
+
+        delay, throttled = self.upstream.admit(api)
+        time.sleep(delay)
+        if throttled:
+            return self._send(429, {'message': 'Too Many Requests'}, headers={'Retry-After': '1'})
+
+        path = url.path[len(f"/{api}/"):]
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        status, payload = self._route(api, path, params, body)
+        self._send(status, payload)
+
+    def _route(self, api, path, params, body):
+        if api == 'twitch':
+            if not params.get('client_id'):
+                return 400, {'status': 400, 'message': 'missing client id'}
+            return 200, {'access_token': 'fake-access-token', 'expires_in': 5000000, 'token_type': 'bearer'}
+
+        if api == 'igdb':
+            if not self.headers.get('Authorization', '').startswith('Bearer ') or not self.headers.get('Client-ID'):
+                return 401, {'message': 'Authorization Failure'}
+            return self.upstream.igdb(path.removeprefix('v4/').strip('/'), body.decode('utf-8', 'replace'))
+
+        if api == 'cheapshark':
+            return self.upstream.cheapshark(path.removeprefix('api/1.0/').strip('/'), params)
+
+        # hltb: home page and script (API key discovery), then the search API
+        if path in ('', '/'):
+            return 200, HLTB_HOME
+        if path.endswith('.js'):
+            return 200, HLTB_SCRIPT
+        if path.startswith('api/') and path.rstrip('/').endswith('init'):
+            return 200, {'token': HLTB_KEY}
+        if path.startswith('api/') and self.command == 'POST':
+            return self.upstream.hltb_search(body)
+        return 404, {'error': 'Not found'}
+
+    def _send(self, status, payload, headers=None):
+        if isinstance(payload, str):
+            data, content_type = payload.encode(), 'text/html; charset=utf-8'
+        else:
+            data, content_type = json.dumps(payload).encode(), 'application/json'
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def parse_apicalypse(body):
+    """'fields a, b; where x = 1; limit 10;' -> {'fields': 'a, b', 'where': 'x = 1', 'limit': '10'}."""
+    query = {}
+    for statement in body.split(';'):
+        keyword, _, rest = statement.strip().partition(' ')
+        if keyword:
+            query[keyword.lower()] = rest.strip()
+    return query
+
+
+def matches(record, condition):
+    """Evaluates an Apicalypse `where` clause ('a = (1,2) & b != null & (c > 1 | d > 1)') on a record."""
+    for term in _split(condition, '&'):
+        term = term.strip()
+        if term.startswith('(') and term.endswith(')') and '|' in term:
+            if not any(matches(record, alternative) for alternative in _split(term[1:-1], '|')):
+                return False
+            continue
+
+        found = _CLAUSE.match(term)
+        if not found:
+            continue # Unsupported clause: ignored, like a field the fake does not model
+        field, operator, raw = found.groups()
+        value = record.get(field.split('.')[0])
+        expected = _value(raw.strip())
+
+        if expected is None:
+            ok = (value is None) == (operator == '=')
+        elif isinstance(expected, list):
+            ok = (value in expected) == (operator == '=')
+        elif operator == '~':
+            ok = str(expected).strip('*"').lower() in str(value or '').lower()
+        elif value is None:
+            ok = False
+        else:
+            ok = {
+                '=': value == expected, '!=': value != expected, '>': value > expected,
+                '>=': value >= expected, '<': value < expected, '<=': value <= expected,
+            }[operator]
+        if not ok:
+            return False
+    return True
+
+
+def _split(text, separator):
+    """Splits on `separator` outside parentheses."""
+    parts, depth, current = [], 0, ''
+    for char in text:
+        depth += (char == '(') - (char == ')')
+        if char == separator and depth == 0:
+            parts.append(current)
+            current = ''
+        else:
+            current += char
+    parts.append(current)
+    return parts
+
+
+def _value(raw):
+    if raw == 'null':
+        return None
+    if raw.startswith('('):
+        return [_value(item.strip()) for item in raw.strip('()').split(',') if item.strip()]
+    if raw.startswith('"'):
+        return raw.strip('"')
+    try:
+        return float(raw) if '.' in raw else int(raw)
+    except ValueError:
+        return raw
@@ -0,0 +1,191 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from whichgame import caching, db
+from whichgame.models import Game, GameCollection
+from whichgame.text import clean_title, franchise_root
+
+# Every synthetic game slug starts with this prefix (used by --clear)
+SLUG_PREFIX = 'synthetic-'
+
+# IGDB-like vocabularies (same names as the real imports, so filters and facets behave the same)
+PLATFORMS = [
+    "PC (Microsoft Windows)", "Mac", "Linux", "PlayStation 5", "PlayStation 4",
+    "Xbox Series X|S", "Xbox One", "Nintendo Switch",
+]
+MOBILE_PLATFORMS = ["Android", "iOS", "Web browser"]
+GENRES = [
+    "Role-playing (RPG)", "Adventure", "Shooter", "Platform", "Puzzle", "Strategy", "Indie",
+    "Sport", "Racing", "Fighting", "Simulator", "Real Time Strategy (RTS)", "Hack and slash/Beat 'em up",
+]
+THEMES = [
+    "Action", "Fantasy", "Science fiction", "Horror", "Survival", "Open world", "Stealth",
+    "Comedy", "Historical", "Sandbox", "Mystery", "Warfare",
+]
+TITLE_WORDS = [
+    "Shadow", "Crystal", "Iron", "Star", "Dragon", "Neon", "Lost", "Eternal", "Dark", "Silent",
+    "Crimson", "Frozen", "Hollow", "Sky", "Ember", "Storm", "Void", "Golden", "Wild", "Last",
+]
+TITLE_NOUNS = [
+    "Legends", "Chronicles", "Kingdom", "Protocol", "Frontier", "Odyssey", "Tactics", "Horizon",
+    "Saga", "Rebellion", "Dynasty", "Requiem", "Quest", "Colony", "Arena", "Souls",
+]
+SUBTITLES = [
+    "Rebirth", "Origins", "Wild Hunt", "Reckoning", "Definitive Edition", "The Lost Age",
+    "Revelations", "Dawn of War", "Resurrection", "Beyond",
+]
+SUMMARY_WORDS = (
+    "explore vast open world forge alliances uncover ancient secrets battle fierce enemies craft powerful "
+    "weapons lead squad tactical combat story driven adventure rich characters dynamic weather build base "
+    "survive harsh wilderness race rivals master skills hidden dungeons epic boss fights cooperative multiplayer "
+    "stealth infiltration puzzle solving mysterious island haunted mansion galactic empire medieval kingdom"
+).split()
+
+COLLECTIONS = [
+    ('Budget Picks', 'Under 10€', '?price=10', 'green'),
+    ('Quick Sessions', 'Under 10 hours', '?duration=short', 'yellow'),
+    ('Recent Releases', 'Since 2020', '?year_min=2020', 'purple'),
+    ('Historical Lows', 'Best prices ever', '?deal=lowest', 'blue'),
+]
+
+class Command(BaseCommand):
+    help = 'Generates a synthetic catalog (1k / 10k / 100k games) for benchmarks. Use a dedicated DATABASE_PATH.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=1000, help='Number of games to generate (e.g. 1000, 10000, 100000).')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (same seed = same catalog).')
+        parser.add_argument('--similar', type=int, default=6, help='similar_games per game.')
+        parser.add_argument('--clear', action='store_true', help='Delete the synthetic games and collections, then exit.')
+        parser.add_argument('--yes', action='store_true', help='Allow writing into a database that already has real games.')
+
+    def handle(self, *args, **options):
+        start_time = time.time()
+
+        if options['clear']:
+            deleted = self._clear()
+            self.stdout.write(self.style.SUCCESS(f"🧹 {deleted} synthetic games deleted."))
+            return
+
+        # 1. Safety: never mix synthetic data into a real catalog by accident
+        real_games = Game.objects.exclude(slug__startswith=SLUG_PREFIX).count()
+        if real_games and not options['yes']:
+            raise CommandError(
+                f"The database already holds {real_games} real games. Point DATABASE_PATH to a benchmark "
+                f"database, or pass --yes."
+            )
+        if Game.objects.filter(slug__startswith=SLUG_PREFIX).exists():
+            raise CommandError("A synthetic catalog already exists. Run with --clear first.")
+
+        rng = random.Random(options['seed'])
+        size = options['size']
+        self.stdout.write(f"🏭 Generating {size} synthetic games (seed {options['seed']})...")
+
+        # 2. Games (bulk_create bypasses save(): derived title columns are computed here)
+        games = [self._make_game(rng, index) for index in range(size)]
+        for chunk in db.chunks(games):
+            with transaction.atomic():
+                Game.objects.bulk_create(chunk)
+        ids = list(Game.objects.filter(slug__startswith=SLUG_PREFIX).order_by('id').values_list('id', 'genres'))
+        self.stdout.write(f"   🎮 {len(ids)} games written")
+
+        # 3. similar_games: neighbours sharing the first genre (what calculate_recommendations tends to produce)
+        by_genre = {}
+        for game_id, genres in ids:
+            by_genre.setdefault(genres[0], []).append(game_id)
+        Through = Game.similar_games.through
+        links = []
+        for game_id, genres in ids:
+            pool = by_genre[genres[0]]
+            for other in rng.sample(pool, min(options['similar'] + 1, len(pool))):
+                if other != game_id:
+                    links.append(Through(from_game_id=game_id, to_game_id=other))
+        for chunk in db.chunks(links):
+            with transaction.atomic():
+                Through.objects.bulk_create(chunk)
+        self.stdout.write(f"   🧠 {len(links)} similar_games links written")
+
+        # 4. Home collections (24 games each)
+        all_ids = [game_id for game_id, _ in ids]
+        CollectionThrough = GameCollection.games.through
+        for order, (title, subtitle, url_filter, color) in enumerate(COLLECTIONS):
+            collection = GameCollection.objects.create(
+                title=f"{title} (synthetic)", subtitle=subtitle, url_filter=url_filter,
+                theme_color=color, display_order=100 + order,
+            )
+            CollectionThrough.objects.bulk_create([
+                CollectionThrough(gamecollection_id=collection.id, game_id=game_id)
+                for game_id in rng.sample(all_ids, min(24, len(all_ids)))
+            ])
+
+        caching.bump_version(caching.CATALOG)
+        caching.bump_version(caching.RECOMMENDATIONS)
+
+        duration = round(time.time() - start_time, 2)
+        self.stdout.write(self.style.SUCCESS(f"✅ Synthetic catalog ready in {duration}s."))
+
+    def _make_game(self, rng, index):
+        """One plausible game: franchises with sequels and remakes, ghosts, mobile-only titles, prices."""
+        franchise = f"{rng.choice(TITLE_WORDS)} {rng.choice(TITLE_NOUNS)}"
+        roll = rng.random()
+        if roll < 0.25:
+            title = f"{franchise} {rng.randint(2, 5)}"
+        elif roll < 0.45:
+            title = f"{franchise}: {rng.choice(SUBTITLES)}"
+        else:
+            title = franchise
+        game_type = 8 if roll > 0.97 else 9 if roll > 0.94 else 0
+
+        if rng.random() < 0.03:
+            platforms = rng.sample(MOBILE_PLATFORMS, rng.randint(1, 2)) # Candidates for clean_mobile_games
+        else:
+            platforms = rng.sample(PLATFORMS, rng.randint(1, 5))
+
+        release = date(1995, 1, 1) + timedelta(days=rng.randint(0, 30 * 365))
+        rating_count = rng.choice([0, 2, 4]) if rng.random() < 0.08 else int(rng.paretovariate(1.2) * 5)
+
+        price = None
+        if any(p in platforms for p in ("PC (Microsoft Windows)", "Mac", "Linux")) and rng.random() < 0.7:
+            price = Decimal(rng.choice([4.99, 9.99, 14.99, 19.99, 29.99, 39.99, 59.99, 69.99])).quantize(Decimal('0.01'))
+
+        # Titles repeat across the catalog (like real editions and ports), slugs never do
+        return Game(
+            title=title,
+            slug=f"{SLUG_PREFIX}{index}",
+            clean_title=clean_title(title),
+            franchise_root=franchise_root(title)[:100],
+            summary=" ".join(rng.choice(SUMMARY_WORDS) for _ in range(rng.randint(30, 90))).capitalize() + ".",
+            cover_url=f"https://images.igdb.com/igdb/image/upload/t_cover_big/synthetic{index}.jpg",
+            platforms=platforms,
+            genres=rng.sample(GENRES, rng.randint(1, 3)),
+            themes=rng.sample(THEMES, rng.randint(0, 3)),
+            rating=rng.randint(40, 98) if rating_count else None,
+            total_rating_count=rating_count,
+            price_current=price,
+            price_lowest=price * Decimal('0.75') if price and rng.random() < 0.5 else price,
+            price_dropped_at=timezone.now() - timedelta(days=rng.randint(0, 30)) if price and rng.random() < 0.2 else None,
+            playtime_main=rng.choice([0, 3, 8, 12, 20, 35, 60, 100]),
+            release_year=release.year,
+            first_release_date=release,
+            game_type=game_type,
+        )
+
+    def _clear(self):
+        """Deletes synthetic games in chunks (short transactions), then the synthetic collections."""
+        GameCollection.objects.filter(title__endswith='(synthetic)').delete()
+        deleted = 0
+        queryset = Game.objects.filter(slug__startswith=SLUG_PREFIX)
+        while True:
+            ids = list(queryset.values_list('id', flat=True)[:db.WRITE_CHUNK_SIZE])
+            if not ids:
+                break
+            with transaction.atomic():
+                Game.similar_games.through.objects.filter(from_game_id__in=ids).delete()
+                count, _ = Game.objects.filter(id__in=ids).delete()
+            deleted += count
+        caching.bump_version(caching.CATALOG)
+        return deleted
@@ -1,14 +1,8 @@
-import os
-import json
-import time
-import requests
-from decouple import config
+from whichgame import igdb
+from whichgame.ingest import NEW, UpsertStats, upsert_game
+from whichgame.ledger import TrackedCommand
 
-from django.core.management.base import BaseCommand
-from django.conf import settings
-from whichgame.models import Game
-
-class Command(BaseCommand):
+class Command(TrackedCommand):
     help = 'Imports all games from a specific franchise or search query (e.g., "Mario", "Zelda").'
 
     def add_arguments(self, parser):
@@ -19,66 +13,33 @@ class Command(BaseCommand):
         self.stdout.write(f"🔍 Searching for franchise: '{query}'...")
 
         # 1. Authentication
-        access_token = self._get_twitch_access_token()
+        with self.phase('auth'):
+            access_token = igdb.get_access_token()
         if not access_token:
             self.stdout.write(self.style.ERROR("❌ Failed to obtain Twitch access token. Aborting."))
             return
 
-        headers = {
-            'Client-ID': config('IGDB_CLIENT_ID'),
-            'Authorization': f'Bearer {access_token}'
-        }
+        client = igdb.Client(access_token)
 
         # 2. Search Games on IGDB
-        games_data = self._search_franchise_games(headers, query)
+        with self.phase('fetch'):
+            games_data = self._search_franchise_games(client, query)
         if not games_data:
             self.stdout.write(self.style.WARNING(f"⚠️ No games found for query '{query}'."))
             return
 
         # 3. Fetch Playtimes
-        playtimes_map = self._fetch_playtimes(headers, games_data)
+        with self.phase('playtimes'):
+            playtimes_map = client.fetch_playtimes([g['id'] for g in games_data])
 
         # 4. Process and Save to Database
-        self._process_and_save_games(games_data, playtimes_map, query)
-
-    def _get_twitch_access_token(self):
-        """Retrieves or generates a valid Twitch OAuth token."""
-        token_file = os.path.join(settings.BASE_DIR, 'twitch_token.json')
-        client_id = config('IGDB_CLIENT_ID')
-        client_secret = config('IGDB_CLIENT_SECRET')
+        with self.phase('save'):
+            self._process_and_save_games(games_data, playtimes_map, query)
+        self.stdout.write(self.http_summary())
 
-        if os.path.exists(token_file):
-            try:
-                with open(token_file, 'r') as f:
-                    data = json.load(f)
-                    if data.get('expires_at', 0) > time.time() + 60:
-                        return data.get('access_token')
-            except json.JSONDecodeError:
-                pass
-
-        try:
-            response = requests.post("https://id.twitch.tv/oauth2/token", params={
-                'client_id': client_id,
-                'client_secret': client_secret,
-                'grant_type': 'client_credentials'
-            })
-            response.raise_for_status()
-            auth_data = response.json()
-            
-            access_token = auth_data.get('access_token')
-            if access_token:
-                with open(token_file, 'w') as f:
-                    json.dump({
-                        'access_token': access_token,
-                        'expires_at': time.time() + auth_data['expires_in']
-                    }, f)
-                return access_token
-        except requests.RequestException:
-            pass
-        return None
-
-    def _search_franchise_games(self, headers, query):
+    def _search_franchise_games(self, client, query):
         """Searches IGDB for games matching the provided query."""
+        import requests
         fields = (
             "fields name, slug, rating, cover.url, platforms.name, genres.name, "
             "first_release_date, release_dates.y, game_type, videos.video_id, screenshots.url"
@@ -87,40 +48,14 @@ class Command(BaseCommand):
         igdb_query = f'search "{query}"; {fields}; where game_type = (0, 8, 9) & cover != null; limit 50;'
 
         try:
-            response = requests.post("https://api.igdb.com/v4/games", headers=headers, data=igdb_query)
-            response.raise_for_status()
-            return response.json()
+            return client.post('games', igdb_query)
         except requests.RequestException as e:
             self.stdout.write(self.style.ERROR(f"IGDB Search API Error: {e}"))
             return []
 
-    def _fetch_playtimes(self, headers, games_data):
-        """Fetches playtime data for the retrieved games."""
-        game_ids = [str(g['id']) for g in games_data]
-        if not game_ids:
-            return {}
-
-        ids_string = ",".join(game_ids)
-        playtimes_map = {}
-        
-        query = f"fields game_id, hastily, normally, completely; where game_id = ({ids_string}); limit 500;"
-        
-        try:
-            response = requests.post("https://api.igdb.com/v4/game_time_to_beats", headers=headers, data=query)
-            response.raise_for_status()
-            
-            for time_data in response.json():
-                seconds = time_data.get('hastily') or time_data.get('normally') or time_data.get('completely') or 0
-                if seconds > 0:
-                    playtimes_map[time_data['game_id']] = max(1, round(seconds / 3600))
-        except requests.RequestException:
-            pass
-            
-        return playtimes_map
-
     def _process_and_save_games(self, games_data, playtimes_map, query):
         """Formats the data, applies filters, and saves games to the database."""
-        count = 0
+        stats = UpsertStats()
         ignored = 0
 
         for data in games_data:
@@ -146,11 +81,11 @@ class Command(BaseCommand):
                 for s in data.get('screenshots', [])[:3] if 'url' in s
             ]
 
-            # 3. Database Save
+            # 3. Database Save (skipped when IGDB returned the same data as last time)
             try:
-                Game.objects.update_or_create(
-                    igdb_id=data['id'],
-                    defaults={
+                _, status = upsert_game(
+                    data['id'],
+                    {
                         'title': data['name'],
                         'slug': data['slug'],
                         'rating': data.get('rating'),
@@ -164,9 +99,12 @@ class Command(BaseCommand):
                         'screenshots': screenshots
                     }
                 )
-                count += 1
-                self.stdout.write(self.style.SUCCESS(f"   ✅ Imported: {data['name']}"))
+                stats[status] += 1
+                label = "Imported" if status == NEW else status.capitalize()
+                self.stdout.write(self.style.SUCCESS(f"   ✅ {label}: {data['name']}"))
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"   [ERROR] Failed to save {data.get('name', 'Unknown')}: {e}"))
 
-        self.stdout.write(self.style.SUCCESS(f"✨ Finished! {count} games imported for franchise '{query}' ({ignored} ignored)."))
\ No newline at end of file
+        self.rows.update(stats)
+        self.rows['ignored'] += ignored
+        self.stdout.write(self.style.SUCCESS(f"✨ Finished franchise '{query}'! {stats.summary()} | Ignored: {ignored}"))
\ No newline at end of file
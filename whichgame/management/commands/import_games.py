@@ -1,60 +1,164 @@
 import os
-import json
 import time
-import requests
 from datetime import datetime
-from decouple import config
 
-from django.core.management.base import BaseCommand
 from django.conf import settings
+from whichgame import igdb
+from whichgame.ingest import UpsertStats, upsert_game
+from whichgame.ledger import TrackedCommand
 from whichgame.models import Game
 
-class Command(BaseCommand):
+# Safety margin applied to the delta watermark (IGDB clock drift, in-flight edits)
+DELTA_OVERLAP_SECONDS = 300
+
+# First delta run without a watermark: look back this many days
+DELTA_DEFAULT_DAYS = 7
+
+class Command(TrackedCommand):
     help = 'Fetches and updates the main catalog of games from IGDB (Max 10,000 games).'
 
     def add_arguments(self, parser):
         parser.add_argument('--limit', type=int, default=500, help='Number of games to fetch per run.')
+        parser.add_argument(
+            '--delta',
+            action='store_true',
+            help='Refresh only the catalog games modified on IGDB since the last delta sync (updated_at watermark).',
+        )
+        parser.add_argument(
+            '--since',
+            type=str,
+            help='Delta mode: override the watermark (YYYY-MM-DD or unix timestamp).',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=igdb.MAX_WORKERS,
+            help=f'Delta mode: concurrent IGDB requests (max {igdb.MAX_WORKERS}, always within the rate limit).',
+        )
 
     def handle(self, *args, **options):
+        # 1. Authentication
+        with self.phase('auth'):
+            access_token = igdb.get_access_token()
+        if not access_token:
+            self.stdout.write(self.style.ERROR("❌ Failed to obtain Twitch access token. Aborting."))
+            return
+
+        client = igdb.Client(access_token, workers=options['workers'])
+
+        if options['delta']:
+            self._delta_sync(client, options['since'])
+        else:
+            self._offset_crawl(client, options['limit'])
+
+        self.stdout.write(self.http_summary())
+
+    def _offset_crawl(self, client, limit):
+        """Walks the popularity-sorted catalog, one batch per run (state file offset)."""
         state_file = os.path.join(settings.BASE_DIR, 'igdb_import.state')
-        limit = options['limit']
-        offset = self._get_offset(state_file)
+        offset = self._read_state(state_file)
 
         if offset >= 10000:
             self.stdout.write(self.style.SUCCESS("🛑 Maximum limit of 10,000 games reached. Halting import."))
             return
-        
-        self.stdout.write(f"🚀 Starting IGDB catalog import (Offset: {offset}, Limit: {limit})...")
-
-        # 1. Authentication
-        access_token = self._get_twitch_access_token()
-        if not access_token:
-            self.stdout.write(self.style.ERROR("❌ Failed to obtain Twitch access token. Aborting."))
-            return
 
-        headers = {
-            'Client-ID': config('IGDB_CLIENT_ID'),
-            'Authorization': f'Bearer {access_token}'
-        }
+        self.stdout.write(f"🚀 Starting IGDB catalog import (Offset: {offset}, Limit: {limit})...")
 
         # 2. Fetch Games Data
-        games_data = self._fetch_games(headers, limit, offset)
+        with self.phase('fetch'):
+            games_data = self._fetch_games(client, limit, offset)
         if not games_data:
             self.stdout.write(self.style.WARNING("⚠️ No more games found or API error. End of list."))
             return
 
         # 3. Fetch Playtimes (HLTB data via IGDB)
-        playtimes_map = self._fetch_playtimes(headers, games_data)
+        with self.phase('playtimes'):
+            playtimes_map = client.fetch_playtimes([g['id'] for g in games_data])
 
         # 4. Process and Save to Database
-        added_count, ignored_count = self._process_and_save_games(games_data, playtimes_map)
+        with self.phase('save'):
+            stats, ignored_count = self._process_and_save_games(games_data, playtimes_map)
 
         # 5. Update State
-        self._save_offset(state_file, offset + limit)
-        self.stdout.write(self.style.SUCCESS(f"✅ Batch complete. Imported: {added_count} | Ignored (Low ratings/Web): {ignored_count}"))
+        self._write_state(state_file, offset + limit)
+        self.stdout.write(self.style.SUCCESS(f"✅ Batch complete. {stats.summary()} | Ignored (Low ratings/Web): {ignored_count}"))
+
+    def _delta_sync(self, client, since):
+        """
+        Re-fetches only the catalog games whose IGDB `updated_at` is newer than the watermark.
+        Our IGDB IDs are sent in pages of 500, so a full catalog check costs ~20 requests and
+        only the games that actually changed come back.
+        """
+        state_file = os.path.join(settings.BASE_DIR, 'igdb_delta.state')
+        started_at = int(time.time())
+
+        # 1. Watermark
+        if since:
+            watermark = self._parse_since(since)
+            if watermark is None:
+                self.stdout.write(self.style.ERROR(f"❌ Invalid --since value: {since}"))
+                return
+        else:
+            watermark = self._read_state(state_file) or started_at - DELTA_DEFAULT_DAYS * 86400
+        watermark -= DELTA_OVERLAP_SECONDS
+
+        igdb_ids = list(Game.objects.filter(igdb_id__isnull=False).order_by('igdb_id').values_list('igdb_id', flat=True))
+        if not igdb_ids:
+            self.stdout.write(self.style.WARNING("⚠️ Empty catalog: run the offset import first."))
+            return
 
-    def _get_offset(self, state_file):
-        """Reads the current offset from the state file."""
+        pages = [igdb_ids[i:i + igdb.PAGE_SIZE] for i in range(0, len(igdb_ids), igdb.PAGE_SIZE)]
+        self.stdout.write(
+            f"🔄 Delta sync since {datetime.fromtimestamp(watermark):%Y-%m-%d %H:%M} "
+            f"({len(igdb_ids)} games, {len(pages)} pages, {client.workers} workers)..."
+        )
+
+        # 2. Concurrent, rate-limited pages (HTTP only in threads, DB writes stay in this thread)
+        queries = [
+            f"{igdb.GAME_FIELDS}; where id = ({','.join(map(str, page))}) & updated_at > {watermark}; limit {igdb.PAGE_SIZE};"
+            for page in pages
+        ]
+        start_time = time.time()
+        games_data = []
+        failed_pages = 0
+        with self.phase('fetch'):
+            responses = client.post_many('games', queries)
+        for _, results, error in responses:
+            if error is not None:
+                failed_pages += 1
+                self.stdout.write(self.style.ERROR(f"   ❌ IGDB page failed: {error}"))
+            else:
+                games_data.extend(results)
+
+        self.stdout.write(f"   📥 {len(games_data)} modified games fetched in {round(time.time() - start_time, 2)}s")
+
+        # 3. Playtimes for the modified games only, then upsert (unchanged payloads are skipped)
+        stats, ignored_count = UpsertStats(), 0
+        if games_data:
+            with self.phase('playtimes'):
+                playtimes_map = client.fetch_playtimes([g['id'] for g in games_data])
+            with self.phase('save'):
+                stats, ignored_count = self._process_and_save_games(games_data, playtimes_map)
+
+        # 4. Move the watermark only if every page succeeded (otherwise the next run retries them)
+        if failed_pages:
+            self.stdout.write(self.style.WARNING(f"⚠️ {failed_pages} page(s) failed. Watermark kept for the next run."))
+        elif not since:
+            self._write_state(state_file, started_at)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Delta sync complete. {stats.summary()} | Ignored (Low ratings/Web): {ignored_count}"))
+
+    def _parse_since(self, value):
+        """'2025-01-31' or a unix timestamp -> unix timestamp (None if invalid)."""
+        if value.isdigit():
+            return int(value)
+        try:
+            return int(datetime.strptime(value, '%Y-%m-%d').timestamp())
+        except ValueError:
+            return None
+
+    def _read_state(self, state_file):
+        """Reads the integer stored in a state file (offset or watermark)."""
         if os.path.exists(state_file):
             try:
                 with open(state_file, 'r') as f:
@@ -63,93 +167,27 @@ class Command(BaseCommand):
                 pass
         return 0
 
-    def _save_offset(self, state_file, offset):
-        """Saves the new offset to the state file."""
+    def _write_state(self, state_file, value):
+        """Saves an integer to a state file."""
         with open(state_file, 'w') as f:
-            f.write(str(offset))
-
-    def _get_twitch_access_token(self):
-        """Retrieves or generates a valid Twitch OAuth token."""
-        token_file = os.path.join(settings.BASE_DIR, 'twitch_token.json')
-        client_id = config('IGDB_CLIENT_ID')
-        client_secret = config('IGDB_CLIENT_SECRET')
+            f.write(str(value))
 
-        if os.path.exists(token_file):
-            try:
-                with open(token_file, 'r') as f:
-                    data = json.load(f)
-                    if data.get('expires_at', 0) > time.time() + 60:
-                        return data.get('access_token')
-            except json.JSONDecodeError:
-                pass
-
-        try:
-            response = requests.post("https://id.twitch.tv/oauth2/token", params={
-                'client_id': client_id,
-                'client_secret': client_secret,
-                'grant_type': 'client_credentials'
-            })
-            response.raise_for_status()
-            auth_data = response.json()
-            
-            access_token = auth_data.get('access_token')
-            if access_token:
-                with open(token_file, 'w') as f:
-                    json.dump({
-                        'access_token': access_token,
-                        'expires_at': time.time() + auth_data['expires_in']
-                    }, f)
-                return access_token
-        except requests.RequestException:
-            pass
-        return None
-
-    def _fetch_games(self, headers, limit, offset):
+    def _fetch_games(self, client, limit, offset):
         """Fetches the main catalog of games from IGDB sorted by popularity."""
-        fields = (
-            "fields name, slug, rating, total_rating_count, summary, "
-            "cover.url, platforms.name, genres.name, themes.name, "
-            "first_release_date, release_dates.y, game_type, videos.video_id, screenshots.url"
-        )
-        query = f"{fields}; where game_type = (0, 8, 9) & cover != null; sort total_rating_count desc; limit {limit}; offset {offset};"
+        import requests
+        query = f"{igdb.GAME_FIELDS}; where game_type = (0, 8, 9) & cover != null; sort total_rating_count desc; limit {limit}; offset {offset};"
 
         try:
-            response = requests.post("https://api.igdb.com/v4/games", headers=headers, data=query)
-            response.raise_for_status()
-            return response.json()
+            return client.post('games', query)
         except requests.RequestException as e:
             self.stdout.write(self.style.ERROR(f"IGDB Games API Error: {e}"))
             return []
 
-    def _fetch_playtimes(self, headers, games_data):
-        """Fetches playtime data for the retrieved games."""
-        game_ids = [str(g['id']) for g in games_data]
-        if not game_ids:
-            return {}
-
-        ids_string = ",".join(game_ids)
-        playtimes_map = {}
-        
-        query = f"fields game_id, hastily, normally, completely; where game_id = ({ids_string}); limit 500;"
-        
-        try:
-            response = requests.post("https://api.igdb.com/v4/game_time_to_beats", headers=headers, data=query)
-            response.raise_for_status()
-            
-            for time_data in response.json():
-                seconds = time_data.get('hastily') or time_data.get('normally') or time_data.get('completely') or 0
-                if seconds > 0:
-                    playtimes_map[time_data['game_id']] = max(1, round(seconds / 3600))
-        except requests.RequestException:
-            pass
-            
-        return playtimes_map
-
     def _process_and_save_games(self, games_data, playtimes_map):
         """Formats the data, applies strict filters, and saves games to the database."""
-        added_count = 0
+        stats = UpsertStats()
         ignored_count = 0
-        
+
         for data in games_data:
             # 1. Quality Filter (Requires minimum reviews to avoid garbage data)
             rating_count = data.get('total_rating_count', 0)
@@ -163,48 +201,13 @@ class Command(BaseCommand):
                 ignored_count += 1
                 continue
 
-            # 3. Data Formatting
-            release_date = None
-            if 'first_release_date' in data:
-                release_date = datetime.fromtimestamp(data['first_release_date']).date()
-
-            cover_url = ""
-            if 'cover' in data and 'url' in data['cover']:
-                cover_url = data['cover']['url'].replace('t_thumb', 't_cover_big')
-                if cover_url.startswith('//'): 
-                    cover_url = f"https:{cover_url}"
-
-            video_id = next((v['video_id'] for v in data.get('videos', []) if 'video_id' in v), None)
-            
-            screenshots = [
-                s['url'].replace('t_thumb', 't_1080p').replace('//', 'https://') 
-                for s in data.get('screenshots', [])[:3] if 'url' in s
-            ]
-
-            # 4. Database Save
+            # 3. Database Save (skipped when IGDB returned the same data as last time)
             try:
-                Game.objects.update_or_create(
-                    igdb_id=data['id'],
-                    defaults={
-                        'title': data['name'],
-                        'slug': data['slug'],
-                        'rating': data.get('rating'),
-                        'total_rating_count': rating_count,
-                        'summary': data.get('summary', ''),
-                        'cover_url': cover_url,
-                        'platforms': platform_names,
-                        'genres': [g['name'] for g in data.get('genres', [])],
-                        'themes': [t['name'] for t in data.get('themes', [])],
-                        'playtime_main': playtimes_map.get(data['id'], 0),
-                        'game_type': data.get('game_type', 0),
-                        'release_year': min([d['y'] for d in data.get('release_dates', []) if 'y' in d], default=None),
-                        'first_release_date': release_date,
-                        'video_id': video_id,
-                        'screenshots': screenshots
-                    }
-                )
-                added_count += 1
+                _, status = upsert_game(data['id'], igdb.format_game(data, playtimes_map))
+                stats[status] += 1
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"   [ERROR] Failed to save {data.get('name', 'Unknown')}: {e}"))
 
-        return added_count, ignored_count
\ No newline at end of file
+        self.rows.update(stats)
+        self.rows['ignored'] += ignored_count
+        return stats, ignored_count
@@ -1,15 +1,11 @@
-import os
-import json
 import time
-import requests
 from datetime import datetime, timedelta
-from decouple import config
 
-from django.core.management.base import BaseCommand
-from django.conf import settings
-from whichgame.models import Game
+from whichgame import igdb
+from whichgame.ingest import NEW, UNCHANGED, UpsertStats, upsert_game
+from whichgame.ledger import TrackedCommand
 
-class Command(BaseCommand):
+class Command(TrackedCommand):
     help = 'Fetches recent game releases from IGDB (Runs automatically on the 1st and 15th of each month).'
 
     def add_arguments(self, parser):
@@ -29,70 +25,33 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS("Starting new releases import..."))
 
         # 2. Authentication
-        access_token = self._get_twitch_access_token()
+        with self.phase('auth'):
+            access_token = igdb.get_access_token()
         if not access_token:
             self.stdout.write(self.style.ERROR("Failed to obtain Twitch access token. Aborting."))
             return
 
-        headers = {
-            'Client-ID': config('IGDB_CLIENT_ID'),
-            'Authorization': f'Bearer {access_token}'
-        }
+        client = igdb.Client(access_token)
 
         # 3. Fetch Recent Games (Last 60 Days)
-        games_data = self._fetch_recent_games(headers)
+        with self.phase('fetch'):
+            games_data = self._fetch_recent_games(client)
         if not games_data:
             self.stdout.write(self.style.WARNING("No recent games found matching the criteria."))
             return
 
         # 4. Fetch Playtimes
-        playtimes_map = self._fetch_playtimes(headers, games_data)
+        with self.phase('playtimes'):
+            playtimes_map = self._fetch_playtimes(client, games_data)
 
         # 5. Process and Save to Database
-        self._process_and_save_games(games_data, playtimes_map)
+        with self.phase('save'):
+            self._process_and_save_games(games_data, playtimes_map)
+        self.stdout.write(self.http_summary())
 
-    def _get_twitch_access_token(self):
-        """Retrieves or generates a valid Twitch OAuth token."""
-        token_file = os.path.join(settings.BASE_DIR, 'twitch_token.json')
-        client_id = config('IGDB_CLIENT_ID')
-        client_secret = config('IGDB_CLIENT_SECRET')
-
-        # Check existing cached token
-        if os.path.exists(token_file):
-            try:
-                with open(token_file, 'r') as f:
-                    data = json.load(f)
-                    if data.get('expires_at', 0) > time.time() + 60:
-                        return data.get('access_token')
-            except json.JSONDecodeError:
-                pass # Invalid JSON, proceed to fetch a new one
-
-        # Fetch new token from Twitch API
-        try:
-            response = requests.post("https://id.twitch.tv/oauth2/token", params={
-                'client_id': client_id,
-                'client_secret': client_secret,
-                'grant_type': 'client_credentials'
-            })
-            response.raise_for_status()
-            auth_data = response.json()
-            
-            access_token = auth_data.get('access_token')
-            if access_token:
-                # Cache the new token
-                with open(token_file, 'w') as f:
-                    json.dump({
-                        'access_token': access_token,
-                        'expires_at': time.time() + auth_data['expires_in']
-                    }, f)
-                return access_token
-        except requests.RequestException as e:
-            self.stdout.write(self.style.ERROR(f"Twitch Auth API Error: {e}"))
-        
-        return None
-
-    def _fetch_recent_games(self, headers):
+    def _fetch_recent_games(self, client):
         """Fetches high-quality games released within the last 60 days."""
+        import requests
         timestamp_now = int(time.time())
         timestamp_past = int((datetime.now() - timedelta(days=60)).timestamp())
         
@@ -110,15 +69,14 @@ class Command(BaseCommand):
         )
 
         try:
-            response = requests.post("https://api.igdb.com/v4/games", headers=headers, data=query)
-            response.raise_for_status()
-            return response.json()
+            return client.post('games', query)
         except requests.RequestException as e:
             self.stdout.write(self.style.ERROR(f"IGDB Games API Error: {e}"))
             return []
 
-    def _fetch_playtimes(self, headers, games_data):
+    def _fetch_playtimes(self, client, games_data):
         """Fetches playtime data for the retrieved games and caps it to prevent UI bugs."""
+        import requests
         game_ids = [str(g['id']) for g in games_data]
         ids_string = ",".join(game_ids)
         playtimes_map = {}
@@ -126,10 +84,7 @@ class Command(BaseCommand):
         query = f"fields game_id, hastily, normally, completely; where game_id = ({ids_string}); limit 500;"
         
         try:
-            response = requests.post("https://api.igdb.com/v4/game_time_to_beats", headers=headers, data=query)
-            response.raise_for_status()
-            
-            for time_data in response.json():
+            for time_data in client.post('game_time_to_beats', query):
                 seconds = time_data.get('hastily') or time_data.get('normally') or time_data.get('completely') or 0
                 if seconds > 0:
                     hours = round(seconds / 3600)
@@ -142,7 +97,7 @@ class Command(BaseCommand):
 
     def _process_and_save_games(self, games_data, playtimes_map):
         """Formats the data, applies strict filters, and saves games to the database."""
-        added_count = 0
+        stats = UpsertStats()
         ignored_count = 0
         
         for data in games_data:
@@ -178,11 +133,11 @@ class Command(BaseCommand):
                 for s in data.get('screenshots', [])[:3] if 'url' in s
             ]
 
-            # 4. Database Save
+            # 4. Database Save (skipped when IGDB returned the same data as last time)
             try:
-                Game.objects.update_or_create(
-                    igdb_id=data['id'],
-                    defaults={
+                _, status = upsert_game(
+                    data['id'],
+                    {
                         'title': data['name'],
                         'slug': data['slug'],
                         'rating': data.get('rating'),
@@ -200,9 +155,13 @@ class Command(BaseCommand):
                         'screenshots': screenshots
                     }
                 )
-                added_count += 1
-                self.stdout.write(self.style.SUCCESS(f"   [ADDED] {data['name']} (Hype: {hypes} | Reviews: {rating_count})"))
+                stats[status] += 1
+                if status != UNCHANGED:
+                    label = "ADDED" if status == NEW else "UPDATED"
+                    self.stdout.write(self.style.SUCCESS(f"   [{label}] {data['name']} (Hype: {hypes} | Reviews: {rating_count})"))
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"   [ERROR] Failed to save {data.get('name', 'Unknown')}: {e}"))
 
-        self.stdout.write(self.style.SUCCESS(f"Finished. Added: {added_count} | Ignored (Low Quality/Web): {ignored_count}"))
\ No newline at end of file
+        self.rows.update(stats)
+        self.rows['ignored'] += ignored_count
+        self.stdout.write(self.style.SUCCESS(f"Finished. {stats.summary()} | Ignored (Low Quality/Web): {ignored_count}"))
\ No newline at end of file
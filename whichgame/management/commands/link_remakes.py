@@ -1,42 +1,72 @@
-from django.core.management.base import BaseCommand
-from django.db.models import Q
+from collections import defaultdict
+
+from whichgame import db
+from whichgame.ledger import TrackedCommand
 from whichgame.models import Game
 
-class Command(BaseCommand):
+class Command(TrackedCommand):
     help = 'Links original games to their most recent Remake or Remaster version.'
 
     def handle(self, *args, **options):
-        # Fetch all original games (game_type 0)
-        main_games = Game.objects.filter(game_type=0)
-        
-        update_count = 0
         self.stdout.write("🔗 Searching for remakes/remasters (Prioritizing the most recent release)...")
 
-        for game in main_games:
-            candidate = self._find_latest_remake(game)
+        # 1. Load every Remake (type 8) / Remaster (type 9) once
+        remakes = list(Game.objects.filter(game_type__in=[8, 9]).exclude(clean_title='').only(
+            'id', 'slug', 'title', 'clean_title', 'game_type', 'release_year'
+        ))
+
+        # 2. Original games (game_type 0) indexed by normalized title (ids only, no model instances)
+        originals = defaultdict(list)
+        with self.phase('load'):
+            for game_id, title in Game.objects.filter(game_type=0).exclude(clean_title='').values_list('id', 'clean_title').iterator():
+                originals[title].append(game_id)
 
-            if candidate:
-                # Update database only if the link doesn't already exist or has changed
-                if game.remake_slug != candidate.slug:
+        # 3. A remake matches every original whose normalized title is contained in its own, whatever
+        #    the first word ("ultimatedoom" contains "doom"): each substring is one dict lookup
+        latest = {}
+        with self.phase('match'):
+            for remake in remakes:
+                for original_id in self._contained_originals(remake.clean_title, originals):
+                    if original_id != remake.pk and self._is_newer(remake, latest.get(original_id)):
+                        latest[original_id] = remake
+
+        # 4. Update database only if the link doesn't already exist or has changed
+        update_count = 0
+        with self.phase('save'):
+            for chunk in db.chunks(list(latest)):
+                for game in Game.objects.filter(id__in=chunk).only('id', 'title', 'remake_slug'):
+                    candidate = latest[game.id]
+                    if game.remake_slug == candidate.slug:
+                        continue
                     game.remake_slug = candidate.slug
-                    
+
                     # Optimize database write by targeting only the necessary field
-                    game.save(update_fields=['remake_slug'])
-                    
+                    game.save(update_fields=['remake_slug', 'updated_at'])
+
                     type_name = "Remake" if candidate.game_type == 8 else "Remaster"
                     self.stdout.write(self.style.SUCCESS(
                         f"   ✨ Linked: {game.title[:30].ljust(30)} -> {candidate.title[:30]} ({type_name} - {candidate.release_year})"
                     ))
                     update_count += 1
-        
+                    self.rows['linked'] += 1
+
         self.stdout.write(self.style.SUCCESS(f"✅ Finished. {update_count} game links updated or created."))
 
-    def _find_latest_remake(self, original_game):
+    def _contained_originals(self, remake_title, originals):
+        """Ids of the original games whose normalized title is a substring of `remake_title`."""
+        found = set()
+        length = len(remake_title)
+        for start in range(length):
+            for end in range(start + 1, length + 1):
+                found.update(originals.get(remake_title[start:end], ()))
+        return found
+
+    def _is_newer(self, remake, current):
         """
-        Queries the database for a Remake (type 8) or Remaster (type 9)
-        whose title contains the original game's title, returning the most recent one.
+        Most recent release wins (NULL years last, like the former `order_by('-release_year')`);
+        on a tie the first remake found is kept.
         """
-        return Game.objects.filter(
-            Q(game_type=8) | Q(game_type=9),
-            title__icontains=original_game.title
-        ).exclude(pk=original_game.pk).order_by('-release_year').first()
\ No newline at end of file
+        if current is None:
+            return True
+        key = lambda game: (game.release_year is not None, game.release_year or 0)
+        return key(remake) > key(current)
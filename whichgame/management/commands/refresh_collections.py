@@ -0,0 +1,54 @@
+from whichgame import auto_collections
+from whichgame.ledger import TrackedCommand
+from whichgame.models import GameCollection
+
+class Command(TrackedCommand):
+    help = 'Recomputes the games of automatic home collections from their explorer filter (only writes what changed).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Show what would change without writing anything.')
+        parser.add_argument('--collection', type=int, nargs='+', metavar='ID', help='Only refresh these collection IDs.')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        queryset = GameCollection.objects.all()
+        if options['collection']:
+            queryset = queryset.filter(id__in=options['collection'])
+
+        self.stdout.write("🗂️ Refreshing automatic collections..." + (" (dry run)" if dry_run else ""))
+
+        # 1. One filtered id query per collection, then only the membership delta is written
+        refreshed = 0
+        with self.phase('refresh'):
+            for result in auto_collections.refresh_all(queryset, dry_run=dry_run):
+                collection = result.collection
+                if result.unknown_params:
+                    self.stdout.write(self.style.WARNING(
+                        f"   ⚠️ {collection.title}: unknown filter parameter(s) ignored: {', '.join(result.unknown_params)}"
+                    ))
+
+                if not result.changed:
+                    self.rows['unchanged'] += 1
+                    continue
+
+                refreshed += 1
+                if dry_run:
+                    self.stdout.write(self.style.WARNING(
+                        f"   [DRY-RUN] {collection.title}: +{result.added} / -{result.removed} games"
+                        + (" (new order)" if result.reordered else "")
+                    ))
+                    continue
+
+                self.rows['linked'] += result.added
+                self.rows['deleted'] += result.removed
+                if result.reordered:
+                    self.rows['updated'] += 1
+                    self.stdout.write(f"   🔀 {collection.title}: new order")
+                else:
+                    self.stdout.write(self.style.SUCCESS(
+                        f"   ✨ {collection.title}: +{result.added} / -{result.removed} games"
+                    ))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Finished. {refreshed} collection(s) changed, {self.rows['unchanged']} unchanged."
+        ))
@@ -1,117 +1,114 @@
-import os
-import json
 import time
-import requests
 from datetime import datetime, timedelta
-from decouple import config
 
-from django.core.management.base import BaseCommand
-from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 from whichgame.models import Game
+from whichgame import caching, db, igdb
+from whichgame.ingest import NEW, UpsertStats, upsert_game
+from whichgame.ledger import TrackedCommand
 
-class Command(BaseCommand):
+class Command(TrackedCommand):
     help = 'Daily CRON: Updates missing ratings for existing games and imports highly hyped new releases.'
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS("👻 Starting Ghost Games & Daily Bangers refresh..."))
 
         # 1. Authentication
-        access_token = self._get_twitch_access_token()
+        with self.phase('auth'):
+            access_token = igdb.get_access_token()
         if not access_token:
             self.stdout.write(self.style.ERROR("Auth failed. Aborting."))
             return
 
-        headers = {
-            'Client-ID': config('IGDB_CLIENT_ID'),
-            'Authorization': f'Bearer {access_token}'
-        }
+        client = igdb.Client(access_token)
 
-        # 2. Update existing "Ghost" games (Games currently hidden because reviews < 5)
-        self.stdout.write("\n🔍 1. Updating existing Ghost games (Waiting for reviews)...")
-        self._update_ghost_games(headers)
+        # 2. Update existing "Ghost" games (hidden because reviews < 5, or shown with a boosted rating)
+        self.stdout.write("\n🔍 1. Sweeping Ghost games (Waiting for reviews)...")
+        self._update_ghost_games(client)
 
         # 3. Fetch and inject today's "Bangers" (Highly anticipated new releases)
         self.stdout.write("\n🔥 2. Fetching recent Bangers (High hype, newly released)...")
-        self._fetch_daily_bangers(headers)
+        self._fetch_daily_bangers(client)
 
+        self.stdout.write(self.http_summary())
         self.stdout.write(self.style.SUCCESS("\n🎉 Daily refresh complete! Your catalog is perfectly up to date."))
 
-    def _get_twitch_access_token(self):
-        """Retrieves or generates a valid Twitch OAuth token."""
-        token_file = os.path.join(settings.BASE_DIR, 'twitch_token.json')
-        client_id = config('IGDB_CLIENT_ID')
-        client_secret = config('IGDB_CLIENT_SECRET')
-
-        if os.path.exists(token_file):
-            try:
-                with open(token_file, 'r') as f:
-                    data = json.load(f)
-                    if data.get('expires_at', 0) > time.time() + 60:
-                        return data.get('access_token')
-            except json.JSONDecodeError:
-                pass 
+    def _update_ghost_games(self, client):
+        """
+        Re-checks EVERY ghost game on IGDB (500 IDs per request, concurrent within the rate limit)
+        and applies the new ratings in chunked bulk_updates. Boosted bangers get their real rating back
+        as soon as IGDB has enough reviews.
+        """
+        ghosts = {
+            g.igdb_id: g
+            for g in Game.objects.filter(
+                Q(total_rating_count__lt=5) | Q(total_rating_count__isnull=True) | Q(rating_boosted=True),
+                igdb_id__isnull=False,
+            ).only('id', 'igdb_id', 'slug', 'title', 'rating', 'total_rating_count', 'rating_boosted')
+        }
 
-        try:
-            response = requests.post("https://id.twitch.tv/oauth2/token", params={
-                'client_id': client_id,
-                'client_secret': client_secret,
-                'grant_type': 'client_credentials'
-            })
-            response.raise_for_status()
-            auth_data = response.json()
-            
-            access_token = auth_data.get('access_token')
-            if access_token:
-                with open(token_file, 'w') as f:
-                    json.dump({
-                        'access_token': access_token,
-                        'expires_at': time.time() + auth_data['expires_in']
-                    }, f)
-                return access_token
-        except requests.RequestException:
-            pass
-        return None
-
-    def _update_ghost_games(self, headers):
-        """Finds games in DB with missing ratings and queries IGDB to update them."""
-        # Get the 50 most recently added games that lack enough reviews
-        ghosts = Game.objects.filter(total_rating_count__lt=5).order_by('-id')[:50]
-        
         if not ghosts:
             self.stdout.write("   ✅ No ghost games found. Everything is rated!")
             return
 
-        ghost_ids = [str(g.igdb_id) for g in ghosts if g.igdb_id]
-        if not ghost_ids:
-            return
-
-        ids_string = ",".join(ghost_ids)
-        query = f"fields name, rating, total_rating_count; where id = ({ids_string}); limit 50;"
-
-        try:
-            response = requests.post("https://api.igdb.com/v4/games", headers=headers, data=query)
-            response.raise_for_status()
-            updated_data = response.json()
-
-            update_count = 0
-            for data in updated_data:
+        ids = sorted(ghosts)
+        queries = [
+            f"fields name, rating, total_rating_count; where id = ({','.join(map(str, ids[i:i + igdb.PAGE_SIZE]))}); limit {igdb.PAGE_SIZE};"
+            for i in range(0, len(ids), igdb.PAGE_SIZE)
+        ]
+        self.stdout.write(f"   🔎 Checking {len(ids)} ghost games in {len(queries)} IGDB requests...")
+
+        now = timezone.now()
+        to_update = []
+        failed = 0
+        with self.phase('fetch'):
+            responses = client.post_many('games', queries)
+        for _, results, error in responses:
+            if error is not None:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"   ❌ IGDB API Error: {error}"))
+                continue
+
+            for data in results:
                 real_count = data.get('total_rating_count', 0)
-                if real_count >= 5:
-                    Game.objects.filter(igdb_id=data['id']).update(
-                        rating=data.get('rating'),
-                        total_rating_count=real_count
-                    )
-                    update_count += 1
-                    self.stdout.write(self.style.SUCCESS(f"   📈 {data['name']} finally got its reviews ({real_count} ratings)!"))
-            
-            if update_count == 0:
-                self.stdout.write("   ⏳ Ghost games checked, but still waiting for IGDB reviews.")
-
-        except requests.RequestException as e:
-            self.stdout.write(self.style.ERROR(f"   ❌ IGDB API Error: {e}"))
-
-    def _fetch_daily_bangers(self, headers):
+                if real_count < 5:
+                    continue # Still waiting (a boosted game keeps its temporary rating)
+
+                game = ghosts[data['id']]
+                was_boosted = game.rating_boosted
+                game.rating = data.get('rating')
+                game.total_rating_count = real_count
+                game.rating_boosted = False
+                game.updated_at = now # bulk_update() bypasses auto_now
+                to_update.append(game)
+
+                label = "boost retired" if was_boosted else "finally got its reviews"
+                self.stdout.write(self.style.SUCCESS(f"   📈 {data['name']} {label} ({real_count} ratings)!"))
+
+        self.rows['updated'] += len(to_update)
+        self.rows['unchanged'] += len(ghosts) - len(to_update)
+        if to_update:
+            # One short transaction per chunk, so web and cron writers never queue behind the whole sweep
+            with self.phase('save'):
+                for chunk in db.chunks(to_update):
+                    with transaction.atomic():
+                        Game.objects.bulk_update(chunk, ['rating', 'total_rating_count', 'rating_boosted', 'updated_at'])
+            # bulk_update() skips the post_save signal: invalidate caches and in-memory indexes manually
+            for game in to_update:
+                caching.invalidate_game(game)
+            caching.schedule_bump(caching.CATALOG)
+            self.stdout.write(f"   💾 {len(to_update)} games updated in bulk writes.")
+        else:
+            self.stdout.write("   ⏳ Ghost games checked, but still waiting for IGDB reviews.")
+
+        if failed:
+            self.stdout.write(self.style.WARNING(f"   ⚠️ {failed} request(s) failed, those ghosts will be retried tomorrow."))
+
+    def _fetch_daily_bangers(self, client):
         """Fetches major games released in the last 7 days and forces them into the DB."""
+        import requests
         timestamp_now = int(time.time())
         timestamp_past = int((datetime.now() - timedelta(days=7)).timestamp())
         
@@ -131,9 +128,8 @@ class Command(BaseCommand):
         )
 
         try:
-            response = requests.post("https://api.igdb.com/v4/games", headers=headers, data=query)
-            response.raise_for_status()
-            games_data = response.json()
+            with self.phase('fetch'):
+                games_data = client.post('games', query)
         except requests.RequestException as e:
             self.stdout.write(self.style.ERROR(f"   ❌ IGDB API Error: {e}"))
             return
@@ -142,7 +138,7 @@ class Command(BaseCommand):
             self.stdout.write("   🤷 No major bangers released in the last 7 days.")
             return
 
-        count = 0
+        stats = UpsertStats()
         for data in games_data:
             # 💡 THE MAGIC TRICK: Artificial bypass for brand new hyped games
             real_count = data.get('total_rating_count', 0)
@@ -180,9 +176,9 @@ class Command(BaseCommand):
             ]
 
             try:
-                obj, created = Game.objects.update_or_create(
-                    igdb_id=data['id'],
-                    defaults={
+                _, status = upsert_game(
+                    data['id'],
+                    {
                         'title': data['name'],
                         'slug': data['slug'],
                         'rating': save_rating,
@@ -196,16 +192,19 @@ class Command(BaseCommand):
                         'release_year': min([d['y'] for d in data.get('release_dates', []) if 'y' in d], default=None),
                         'first_release_date': release_date,
                         'video_id': video_id,
-                        'screenshots': screenshots
+                        'screenshots': screenshots,
+                        'rating_boosted': trick_applied
                     }
                 )
                 
-                if created:
-                    count += 1
-                    status = "💉 Artificially Boosted!" if trick_applied else "✅ Real Ratings!"
-                    self.stdout.write(self.style.SUCCESS(f"   🎮 BANGER ADDED: {data['name']} -> {status}"))
+                stats[status] += 1
+                if status == NEW:
+                    label = "💉 Artificially Boosted!" if trick_applied else "✅ Real Ratings!"
+                    self.stdout.write(self.style.SUCCESS(f"   🎮 BANGER ADDED: {data['name']} -> {label}"))
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"   ❌ DB Error on {data['name']}: {e}"))
 
-        if count > 0:
+        self.rows.update(stats)
+        self.stdout.write(f"   {stats.summary()}")
+        if stats[NEW] > 0:
             self.stdout.write(self.style.WARNING("   ⚠️ Note: Bangers added with 0h playtime. The HLTB cron will update them in the next cycle."))
\ No newline at end of file
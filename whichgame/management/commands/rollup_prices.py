@@ -0,0 +1,43 @@
+import time
+
+from whichgame import prices
+from whichgame.ledger import TrackedCommand
+from whichgame.models import PriceHistory, PriceRollup
+
+
+class Command(TrackedCommand):
+    help = 'Prunes old raw price points and daily rollups (weekly rollups are kept forever).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild-lowest',
+            action='store_true',
+            help='Recompute Game.price_lowest from the weekly rollups.',
+        )
+
+    def handle(self, *args, **options):
+        start_time = time.time()
+
+        # 1. Retention (rollups are maintained on write by prices.record_prices)
+        with self.phase('prune'):
+            raw, daily = prices.prune()
+        self.rows['deleted'] += raw + daily
+        self.stdout.write(f"🧹 Pruned {raw} raw price points (> {prices.RAW_RETENTION.days} days) "
+                          f"and {daily} daily rollups (> {prices.DAILY_RETENTION.days} days)")
+
+        # 2. Optional consistency pass on the denormalized "historical low"
+        if options['rebuild_lowest']:
+            with self.phase('rebuild'):
+                count = prices.rebuild_lowest()
+            self.rows['updated'] += count
+            self.stdout.write(f"📉 Historical low recomputed for {count} games")
+
+        # 3. Storage report
+        self.stdout.write(
+            f"📦 Stored: {PriceHistory.objects.count()} raw points | "
+            f"{PriceRollup.objects.filter(period=PriceRollup.PERIOD_DAY).count()} daily | "
+            f"{PriceRollup.objects.filter(period=PriceRollup.PERIOD_WEEK).count()} weekly rollups"
+        )
+
+        duration = round(time.time() - start_time, 2)
+        self.stdout.write(self.style.SUCCESS(f"✅ Finished in {duration}s."))
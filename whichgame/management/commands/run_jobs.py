@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from whichgame.jobs import claim_next_job, run_job
+
+class Command(BaseCommand):
+    help = 'Background worker: executes the commands queued from the admin (CommandJob).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue then exit (no polling loop).')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds between two polls of an empty queue.')
+
+    def handle(self, *args, **options):
+        once = options['once']
+        sleep = options['sleep']
+
+        self.stdout.write(f"👷 Job worker started ({'drain mode' if once else 'polling mode'})...")
+
+        while True:
+            job = claim_next_job()
+
+            if job is None:
+                if once:
+                    break
+                time.sleep(sleep)
+                continue
+
+            self.stdout.write(f"   ▶️ Job #{job.pk}: {job}")
+            start_time = time.time()
+            ok = run_job(job)
+            duration = round(time.time() - start_time, 2)
+
+            if ok:
+                self.stdout.write(self.style.SUCCESS(f"   ✅ Job #{job.pk} finished in {duration}s"))
+            else:
+                self.stdout.write(self.style.ERROR(f"   ❌ Job #{job.pk} failed after {duration}s"))
+
+        self.stdout.write(self.style.SUCCESS("✅ Queue empty. Worker stopped."))
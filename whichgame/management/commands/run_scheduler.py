@@ -0,0 +1,168 @@
+import signal
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+# Default schedule. Override with settings.SCHEDULE (same shape).
+#   every: run every N minutes | at: run once a day at "HH:MM" | days: restrict to days of the month
+DEFAULT_SCHEDULE = [
+    {'name': 'update_prices', 'command': 'update_prices', 'every': 15},
+    {'name': 'update_hltb', 'command': 'update_hltb', 'every': 10},
+    # Automatic home collections follow price and catalog changes (no write when nothing moved)
+    {'name': 'refresh_collections', 'command': 'refresh_collections', 'every': 30},
+    {'name': 'rollup_prices', 'command': 'rollup_prices', 'at': '02:00'},
+    # import_news only does something on the 1st and 15th: no need to wake it up the other days
+    {'name': 'import_news', 'command': 'import_news', 'at': '03:00', 'days': [1, 15]},
+    {'name': 'refresh_ghost_games', 'command': 'refresh_ghost_games', 'at': '04:00'},
+    {'name': 'import_games_delta', 'command': 'import_games', 'args': ['--delta'], 'at': '05:00'},
+    {'name': 'link_remakes', 'command': 'link_remakes', 'at': '05:15'},
+    {'name': 'calculate_recommendations', 'command': 'calculate_recommendations', 'args': ['--candidates', 'lsh'], 'at': '05:30'},
+    {'name': 'sync_hot_deals', 'command': 'sync_hot_deals', 'at': '06:00'},
+]
+
+# Max sleep between two checks (also how fast SIGTERM is honoured while idle)
+TICK_SECONDS = 30
+
+
+class ScheduledJob:
+    """One schedule entry, with its next run time and per-job statistics."""
+
+    def __init__(self, entry):
+        self.name = entry['name']
+        self.command = entry['command']
+        self.args = [str(a) for a in entry.get('args', [])]
+        self.every = timedelta(minutes=entry['every']) if entry.get('every') else None
+        self.at = datetime.strptime(entry['at'], '%H:%M').time() if entry.get('at') else None
+        self.days = set(entry.get('days') or [])
+        if not self.every and not self.at:
+            raise ValueError(f"Schedule entry '{self.name}' needs 'every' or 'at'.")
+
+        self.next_run = None
+        self.runs = 0
+        self.failures = 0
+        self.total_duration = 0.0
+        self.last_duration = None
+
+    def schedule_after(self, now, first=False):
+        """Computes the next run time strictly after `now` (interval jobs start right away)."""
+        if self.every:
+            self.next_run = now if first else now + self.every
+            return
+
+        candidate = datetime.combine(now.date(), self.at)
+        if candidate <= now:
+            candidate += timedelta(days=1)
+        while self.days and candidate.day not in self.days:
+            candidate += timedelta(days=1)
+        self.next_run = candidate
+
+
+class Command(BaseCommand):
+    help = 'Runs the periodic commands in one long-lived process (warm imports, HTTP pools and tokens).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--list', action='store_true', help='Print the schedule with the next run times and exit.')
+        parser.add_argument('--only', nargs='+', metavar='NAME', help='Only schedule these entries.')
+        parser.add_argument('--run-now', action='store_true', help='Run every selected entry once immediately, then exit.')
+
+    def handle(self, *args, **options):
+        entries = getattr(settings, 'SCHEDULE', DEFAULT_SCHEDULE)
+        if options['only']:
+            entries = [e for e in entries if e['name'] in options['only']]
+        jobs = [ScheduledJob(entry) for entry in entries]
+
+        if not jobs:
+            self.stdout.write(self.style.WARNING("⚠️ Nothing to schedule."))
+            return
+
+        now = datetime.now()
+        for job in jobs:
+            job.schedule_after(now, first=True)
+
+        if options['list']:
+            self._print_schedule(jobs)
+            return
+
+        if options['run_now']:
+            for job in jobs:
+                self._run(job)
+            self._print_report(jobs)
+            return
+
+        # 1. Graceful stop: finish the running job, then print the report
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        self.stdout.write(self.style.SUCCESS(f"🗓️ Scheduler started with {len(jobs)} jobs."))
+        self._print_schedule(jobs)
+
+        # 2. Main loop: run what is due, then sleep until the next due job (or the next tick)
+        while not self._stopping:
+            now = datetime.now()
+            for job in sorted(jobs, key=lambda j: j.next_run):
+                if self._stopping:
+                    break
+                if job.next_run <= now:
+                    self._run(job)
+                    job.schedule_after(datetime.now())
+
+            next_due = min(job.next_run for job in jobs)
+            pause = min(TICK_SECONDS, max(0.0, (next_due - datetime.now()).total_seconds()))
+            if pause and not self._stopping:
+                time.sleep(pause)
+
+        self._print_report(jobs)
+
+    def _request_stop(self, signum, frame):
+        self.stdout.write(self.style.WARNING("\n🛑 Stop requested, finishing the current job..."))
+        self._stopping = True
+
+    def _run(self, job):
+        """Runs one command in-process and records its duration."""
+        label = " ".join([job.command, *job.args])
+        self.stdout.write(f"\n▶️ [{datetime.now():%Y-%m-%d %H:%M:%S}] {job.name}: {label}")
+
+        # Long-lived process: drop connections the DB server may have closed meanwhile
+        close_old_connections()
+        start_time = time.perf_counter()
+        try:
+            call_command(job.command, *job.args, stdout=self.stdout, stderr=self.stderr)
+            status = self.style.SUCCESS("ok")
+        except Exception:
+            job.failures += 1
+            self.stderr.write(traceback.format_exc())
+            status = self.style.ERROR("failed")
+        finally:
+            close_old_connections()
+
+        duration = time.perf_counter() - start_time
+        job.runs += 1
+        job.total_duration += duration
+        job.last_duration = duration
+        self.stdout.write(f"⏱️ {job.name} {status} in {duration:.1f}s (avg {job.total_duration / job.runs:.1f}s over {job.runs} runs)")
+
+    def _print_schedule(self, jobs):
+        for job in sorted(jobs, key=lambda j: j.next_run):
+            if job.every:
+                rule = f"every {int(job.every.total_seconds() // 60)} min"
+            else:
+                rule = f"daily at {job.at:%H:%M}"
+                if job.days:
+                    rule += f" (days {', '.join(map(str, sorted(job.days)))})"
+            self.stdout.write(f"   • {job.name.ljust(28)} {rule.ljust(30)} next: {job.next_run:%Y-%m-%d %H:%M}")
+
+    def _print_report(self, jobs):
+        self.stdout.write("\n📊 Scheduler report")
+        for job in jobs:
+            if not job.runs:
+                continue
+            self.stdout.write(
+                f"   • {job.name.ljust(28)} runs: {job.runs} | failures: {job.failures} | "
+                f"avg: {job.total_duration / job.runs:.1f}s | last: {job.last_duration:.1f}s"
+            )
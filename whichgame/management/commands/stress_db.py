@@ -0,0 +1,131 @@
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections, transaction
+from whichgame import db
+from whichgame.filters import filter_games, order_games
+from whichgame.models import Game
+
+# Scratch table living in the real database file (same locks as the app tables), dropped at the end
+SCRATCH_TABLE = 'stress_db_scratch'
+
+class Command(BaseCommand):
+    help = 'Concurrency stress test: explorer reads while cron-like writers hold the SQLite write lock.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4, help='Concurrent reader threads (explorer query).')
+        parser.add_argument('--writers', type=int, default=2, help='Concurrent writer threads.')
+        parser.add_argument('--rows', type=int, default=20000, help='Rows written by each writer.')
+        parser.add_argument('--chunk-size', type=int, default=db.WRITE_CHUNK_SIZE, help='Rows per write transaction.')
+        parser.add_argument('--work-ms', type=float, default=20, help='Simulated work (ms) inside each write transaction.')
+        parser.add_argument(
+            '--single-transaction',
+            action='store_true',
+            help='Each writer does everything in one transaction (the old behaviour, for comparison).',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("stress_db only targets the SQLite setup.")
+
+        chunk_size = options['rows'] if options['single_transaction'] else max(1, options['chunk_size'])
+        settings_line = ", ".join(f"{name}={value}" for name, value in db.pragmas().items())
+        self.stdout.write(f"⚙️ SQLite: {settings_line}")
+        self.stdout.write(
+            f"🔥 {options['readers']} readers vs {options['writers']} writers x {options['rows']} rows "
+            f"({chunk_size} rows per transaction, {options['work_ms']}ms of work each)..."
+        )
+
+        # 1. Scratch table
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS {SCRATCH_TABLE} (id INTEGER PRIMARY KEY, writer INTEGER, payload TEXT)")
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._read_latencies = []
+        self._errors = {'read': 0, 'write': 0}
+        self._write_waits = []
+
+        # 2. Readers loop until every writer is done
+        readers = [threading.Thread(target=self._reader) for _ in range(options['readers'])]
+        writers = [
+            threading.Thread(target=self._writer, args=(w, options['rows'], chunk_size, options['work_ms'] / 1000))
+            for w in range(options['writers'])
+        ]
+        start_time = time.perf_counter()
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        write_duration = time.perf_counter() - start_time
+        self._stop.set()
+        for thread in readers:
+            thread.join()
+
+        # 3. Cleanup
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}")
+
+        # 4. Report
+        latencies = sorted(self._read_latencies)
+        if latencies:
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            self.stdout.write(
+                f"\n   📖 Reads: {len(latencies)} | p50 {statistics.median(latencies):.1f}ms | "
+                f"p95 {p95:.1f}ms | max {latencies[-1]:.1f}ms"
+            )
+        if self._write_waits:
+            self.stdout.write(
+                f"   ✍️ Writes: {options['writers'] * options['rows']} rows in {write_duration:.1f}s | "
+                f"max wait for the write lock {max(self._write_waits):.1f}ms"
+            )
+        self.stdout.write(f"   🔒 'database is locked' errors: reads {self._errors['read']} | writes {self._errors['write']}")
+
+        if self._errors['read'] or self._errors['write']:
+            raise CommandError("Lock errors under concurrent load.")
+        self.stdout.write(self.style.SUCCESS("\n✅ No lock error: readers and writers coexisted."))
+
+    def _reader(self):
+        """Runs the default explorer query (count + first page) in a loop."""
+        try:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                try:
+                    queryset = order_games(filter_games(Game.objects.all(), {}), {})
+                    queryset.count()
+                    list(queryset[:24])
+                except OperationalError:
+                    with self._lock:
+                        self._errors['read'] += 1
+                    continue
+                with self._lock:
+                    self._read_latencies.append((time.perf_counter() - start) * 1000)
+        finally:
+            connections.close_all()
+
+    def _writer(self, writer, rows, chunk_size, work):
+        """Inserts `rows` rows, `chunk_size` per transaction, holding the lock `work` seconds per transaction."""
+        payload = 'x' * 200
+        try:
+            for chunk in db.chunks(range(rows), chunk_size):
+                start = time.perf_counter()
+                try:
+                    # BEGIN IMMEDIATE (settings): the wait for the write lock happens here
+                    with transaction.atomic():
+                        waited = (time.perf_counter() - start) * 1000
+                        with connection.cursor() as cursor:
+                            cursor.executemany(
+                                f"INSERT INTO {SCRATCH_TABLE} (writer, payload) VALUES (%s, %s)",
+                                [(writer, payload)] * len(chunk),
+                            )
+                        time.sleep(work)
+                except OperationalError:
+                    with self._lock:
+                        self._errors['write'] += 1
+                    continue
+                with self._lock:
+                    self._write_waits.append(waited)
+        finally:
+            connections.close_all()
@@ -2,12 +2,12 @@ import os
 import re
 import time
 
-from django.core.management.base import BaseCommand
 from django.conf import settings
+from whichgame import http_sessions
+from whichgame.ledger import TrackedCommand
 from whichgame.models import Game
-from howlongtobeatpy import HowLongToBeat
 
-class Command(BaseCommand):
+class Command(TrackedCommand):
     help = 'Fetches and updates game playtimes via HowLongToBeat (Rate-limit safe, max 10/run).'
 
     def handle(self, *args, **options):
@@ -24,19 +24,24 @@ class Command(BaseCommand):
 
         self.stdout.write(f"⏱️ Updating playtimes for {len(games_to_update)} games (Offset: {offset})...")
         
-        # Initialize the scraper tool once for the batch
+        # Initialize the scraper tool once for the batch (imported here: aiohttp, bs4 and fake-useragent are slow to load)
+        from howlongtobeatpy import HowLongToBeat
+        self._point_hltb_to(http_sessions.url('hltb'))
         hltb_tool = HowLongToBeat()
 
         # 2. Process the batch
         for game in games_to_update:
-            found_time = self._fetch_playtime(hltb_tool, game.title)
+            with self.phase('fetch'):
+                found_time = self._fetch_playtime(hltb_tool, game.title)
 
             if found_time > 0:
                 game.playtime_main = found_time
                 # Only update the specific field to optimize database write
-                game.save(update_fields=['playtime_main'])
+                game.save(update_fields=['playtime_main', 'updated_at'])
+                self.rows['updated'] += 1
                 self.stdout.write(self.style.SUCCESS(f"   ✅ {game.title[:30]}: Updated -> {found_time}h"))
             else:
+                self.rows['not_found'] += 1
                 self.stdout.write(self.style.WARNING(f"   ⚠️ {game.title[:30]}: Not found on HLTB"))
 
             # Anti-ban sleep (HLTB is strictly monitored, keep at least 1.2s delay)
@@ -62,6 +67,20 @@ class Command(BaseCommand):
         with open(state_file, 'w') as f:
             f.write(str(offset))
 
+    def _point_hltb_to(self, base_url):
+        """
+        howlongtobeatpy hardcodes howlongtobeat.com in HTMLRequests class attributes:
+        rewrite them when settings.UPSTREAM_URLS['hltb'] points elsewhere (fake_upstreams).
+        """
+        from howlongtobeatpy.HTMLRequests import HTMLRequests
+        original = HTMLRequests.BASE_URL
+        if original == base_url:
+            return
+        for name in ('BASE_URL', 'REFERER_HEADER', 'GAME_URL', 'SEARCH_URL'):
+            value = getattr(HTMLRequests, name, None)
+            if isinstance(value, str) and value.startswith(original):
+                setattr(HTMLRequests, name, base_url + value[len(original):])
+
     def _clean_title(self, title):
         """Removes special characters to improve search matching."""
         return re.sub(r'[^\w\s]', '', title)
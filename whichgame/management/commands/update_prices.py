@@ -1,13 +1,13 @@
 import os
-import re
-import time
-import requests
 
-from django.core.management.base import BaseCommand
 from django.conf import settings
-from whichgame.models import Game
+from whichgame import http_sessions, ratelimit
+from whichgame.ledger import TrackedCommand
+from whichgame.models import Game, PriceHistory
+from whichgame.prices import record_prices
+from whichgame.text import clean_title
 
-class Command(BaseCommand):
+class Command(TrackedCommand):
     help = 'Fetches and updates PC game prices via CheapShark API (Rate-limit safe).'
 
     def handle(self, *args, **options):
@@ -26,34 +26,44 @@ class Command(BaseCommand):
 
         # 2. Process the batch using a persistent HTTP session
         success_batch = True
+        found_prices = []
         
-        with requests.Session() as session:
-            for game in games_to_update:
-                # Check if the game is available on computer platforms
-                is_pc = any(platform in ['PC (Microsoft Windows)', 'PC', 'Mac', 'Linux'] for platform in game.platforms)
+        session = http_sessions.get('cheapshark') # Kept alive between runs under run_scheduler
+        for game in games_to_update:
+            # Check if the game is available on computer platforms
+            is_pc = any(platform in ['PC (Microsoft Windows)', 'PC', 'Mac', 'Linux'] for platform in game.platforms)
+            
+            if is_pc:
+                found_price, status_code = self._fetch_best_price(session, game)
                 
-                if is_pc:
-                    found_price, status_code = self._fetch_best_price(session, game.title)
-                    
-                    if status_code == 429:
-                        self.stdout.write(self.style.ERROR(f"🛑 Rate limit exceeded (HTTP 429) on '{game.title}'. Pausing batch."))
-                        success_batch = False
-                        break
-                    
-                    if found_price is not None:
-                        game.price_current = found_price # type: ignore
-                        # Only update the specific field to avoid overwriting other concurrent changes
-                        game.save(update_fields=['price_current'])
-                        self.stdout.write(self.style.SUCCESS(f"   ✅ {game.title[:30]}: Updated -> {found_price}€"))
-                    else:
-                        self.stdout.write(self.style.WARNING(f"   ⚠️ {game.title[:30]}: Not found or no price available"))
-                        
-                    # Anti-ban sleep (CheapShark recommends keeping requests reasonable)
-                    time.sleep(1.5)
+                if status_code == 429:
+                    ratelimit.throttled('cheapshark')
+                    self.stdout.write(self.style.ERROR(f"🛑 Rate limit exceeded (HTTP 429) on '{game.title}'. Pausing batch."))
+                    success_batch = False
+                    break
+                
+                if found_price is not None:
+                    # Written in bulk at the end of the batch (history + rollups, see prices.py)
+                    found_prices.append((game, found_price))
+                    self.stdout.write(self.style.SUCCESS(f"   ✅ {game.title[:30]}: Found -> {found_price}€"))
                 else:
-                    self.stdout.write(f"   ⏩ {game.title[:30]}: Skipped (Console only)")
+                    self.rows['not_found'] += 1
+                    self.stdout.write(self.style.WARNING(f"   ⚠️ {game.title[:30]}: Not found or no price available"))
+                    
+            else:
+                self.rows['skipped'] += 1
+                self.stdout.write(f"   ⏩ {game.title[:30]}: Skipped (Console only)")
+
+        # 3. Record the prices that changed (also when the batch was interrupted)
+        with self.phase('save'):
+            changed = record_prices(found_prices, PriceHistory.SOURCE_SEARCH)
+        self.rows['updated'] += len(changed)
+        self.rows['unchanged'] += len(found_prices) - len(changed)
+        self.stdout.write(f"📈 {len(changed)}/{len(found_prices)} prices changed and recorded.")
+
+        self.stdout.write(self.http_summary())
 
-        # 3. Save state if the batch completed without hitting rate limits
+        # 4. Save state if the batch completed without hitting rate limits
         if success_batch:
             new_offset = offset + limit
             self._save_offset(state_file, new_offset)
@@ -78,18 +88,21 @@ class Command(BaseCommand):
 
     def _clean_title(self, title):
         """Removes special characters and spaces for better strict matching."""
-        return re.sub(r'[^a-z0-9]', '', title.lower())
+        return clean_title(title)
 
-    def _fetch_best_price(self, session, game_name):
+    def _fetch_best_price(self, session, game):
         """
         Fetches the best current price from CheapShark.
         Returns a tuple: (price_as_float_or_None, http_status_code)
         """
-        url = "https://www.cheapshark.com/api/1.0/games"
-        params = {'title': game_name, 'limit': 10}
+        import requests
+        url = http_sessions.url('cheapshark', 'games')
+        params = {'title': game.title, 'limit': 10}
         
         try:
-            response = session.get(url, params=params, timeout=5)
+            with self.phase('fetch'):
+                # The session draws from the shared CheapShark budget, unless the disk cache answers
+                response = session.get(url, params=params, timeout=5)
             
             if response.status_code != 200:
                 return None, response.status_code
@@ -98,7 +111,8 @@ class Command(BaseCommand):
             if not results:
                 return None, 200
 
-            clean_game = self._clean_title(game_name)
+            # Stored at save time (Game.clean_title), only the CheapShark titles need cleaning
+            clean_game = game.clean_title or self._clean_title(game.title)
             candidates = []
             
             # Filter candidates to ensure strict matching
@@ -0,0 +1,108 @@
+"""
+Métriques par vue : latence totale, nombre de requêtes SQL, temps SQL et temps de rendu
+des templates, dans des histogrammes en mémoire (alimentés par `MetricsMiddleware`).
+
+`render()` les exporte au format texte Prometheus pour `metrics_view` (staff ou jeton).
+Comme les index de `caching.VersionedSingleton`, les compteurs vivent dans chaque worker :
+le label `pid` distingue les séries de chaque processus.
+
+Coût : une addition par requête SQL (`connection.execute_wrapper`) et quelques µs par requête
+HTTP sous un verrou, négligeable devant le rendu d'une page.
+"""
+import bisect
+import os
+import threading
+import time
+
+# Bornes des histogrammes (secondes), puis nombre de requêtes SQL
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# (nom Prometheus, description, bornes)
+HISTOGRAMS = {
+    'latency': ('whichgame_request_duration_seconds', 'Total request latency.', SECONDS_BUCKETS),
+    'db': ('whichgame_request_db_seconds', 'Time spent in SQL queries per request.', SECONDS_BUCKETS),
+    'queries': ('whichgame_request_queries', 'SQL queries per request.', QUERY_BUCKETS),
+    'render': ('whichgame_request_render_seconds', 'Template rendering time (lazy querysets included).', SECONDS_BUCKETS),
+}
+
+
+class Histogram:
+    """Histogramme cumulatif à bornes fixes (sémantique `le` de Prometheus)."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Dernière case : au-delà de la dernière borne (+Inf)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class QueryTimer:
+    """`connection.execute_wrapper` qui compte et chronomètre les requêtes SQL d'une requête HTTP."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+# {vue: {métrique: Histogram}} et {(vue, classe de statut): nombre de réponses}
+_histograms = {}
+_responses = {}
+_lock = threading.Lock()
+
+
+def record(view, status, latency, db_time, queries, render_time=None):
+    """Enregistre une requête HTTP. `render_time` est None pour les réponses sans template."""
+    with _lock:
+        histograms = _histograms.get(view)
+        if histograms is None:
+            histograms = _histograms[view] = {name: Histogram(spec[2]) for name, spec in HISTOGRAMS.items()}
+        histograms['latency'].observe(latency)
+        histograms['db'].observe(db_time)
+        histograms['queries'].observe(queries)
+        if render_time is not None:
+            histograms['render'].observe(render_time)
+
+        key = (view, f"{status // 100}xx")
+        _responses[key] = _responses.get(key, 0) + 1
+
+
+def render():
+    """Toutes les métriques du processus au format texte Prometheus (version 0.0.4)."""
+    pid = os.getpid()
+    lines = []
+
+    with _lock:
+        for name, (metric, description, buckets) in HISTOGRAMS.items():
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} histogram")
+            for view, histograms in sorted(_histograms.items()):
+                histogram = histograms[name]
+                labels = f'pid="{pid}",view="{view}"'
+                cumulative = 0
+                for bound, count in zip(buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f'{metric}_sum{{{labels}}} {histogram.sum:.6f}')
+                lines.append(f'{metric}_count{{{labels}}} {histogram.count}')
+
+        lines.append("# HELP whichgame_responses_total Responses by view and status class.")
+        lines.append("# TYPE whichgame_responses_total counter")
+        for (view, status), count in sorted(_responses.items()):
+            lines.append(f'whichgame_responses_total{{pid="{pid}",view="{view}",status="{status}"}} {count}')
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,112 @@
+"""
+Middlewares transverses : métriques de toutes les requêtes, profilage à la demande du staff.
+"""
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from . import metrics
+from .models import RequestProfile
+from .profiling import SamplingProfiler, SqlRecorder, build_report
+
+# Profils conservés en base (les plus anciens sont supprimés à chaque nouveau profil)
+PROFILE_KEEP = 200
+
+
+class MetricsMiddleware:
+    """
+    Mesure chaque requête (latence, requêtes SQL, rendu du template) et l'ajoute aux
+    histogrammes de `metrics`, étiquetée par nom d'URL. À placer en tête de MIDDLEWARE.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = metrics.QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        latency = time.perf_counter() - start
+
+        # Nom d'URL avec namespace ('home', 'admin:index'...) : pas d'explosion de labels par slug
+        view = request.resolver_match.view_name if request.resolver_match else 'unresolved'
+        metrics.record(view, response.status_code, latency, timer.duration, timer.count, getattr(request, '_metrics_render', None))
+        return response
+
+    def process_template_response(self, request, response):
+        # Dernier middleware appelé avant response.render() : on chronomètre le rendu seul
+        start = time.perf_counter()
+
+        def rendered(response):
+            request._metrics_render = time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+class ProfilerMiddleware:
+    """
+    Profile la requête quand un membre du staff ajoute `?_profile=1`, ou a le cookie de profilage
+    (`?_profile=on` le pose pour une heure, `?_profile=off` le retire). Le rapport et le journal SQL
+    sont enregistrés dans `RequestProfile` (admin). À placer après AuthenticationMiddleware.
+
+    Pour les autres visiteurs, le coût est une lecture dans request.GET et request.COOKIES :
+    la session et l'utilisateur ne sont chargés que si le paramètre ou le cookie est présent.
+    """
+    PARAM = '_profile'
+    COOKIE = 'whichgame_profile'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        flag = request.GET.get(self.PARAM)
+        if flag is None and self.COOKIE not in request.COOKIES:
+            return self.get_response(request)
+        if not (request.user.is_active and request.user.is_staff):
+            return self.get_response(request)
+
+        if flag == 'off':
+            response = self.get_response(request)
+            response.delete_cookie(self.COOKIE)
+            return response
+
+        # 1. Requête exécutée sous le profileur, SQL journalisé
+        profiler = SamplingProfiler()
+        sql = SqlRecorder()
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            with connection.execute_wrapper(sql):
+                response = self.get_response(request)
+        finally:
+            profiler.stop()
+        duration = time.perf_counter() - start
+
+        # 2. Sauvegarde (hors mesure) et rotation des anciens profils
+        profile = RequestProfile.objects.create(
+            path=request.get_full_path()[:500],
+            view_name=request.resolver_match.view_name if request.resolver_match else '',
+            method=request.method,
+            status_code=response.status_code,
+            user=request.user,
+            duration_ms=round(duration * 1000, 2),
+            sql_count=sql.count,
+            sql_time_ms=round(sql.duration * 1000, 2),
+            samples=profiler.samples,
+            report=build_report(profiler, sql, duration),
+            sql_log=sql.queries,
+        )
+        stale = list(RequestProfile.objects.values_list('id', flat=True)[PROFILE_KEEP:PROFILE_KEEP + 100])
+        if stale:
+            RequestProfile.objects.filter(id__in=stale).delete()
+
+        response['X-Profile-Id'] = str(profile.pk)
+        if flag == 'on':
+            response.set_cookie(self.COOKIE, '1', max_age=3600, httponly=True, samesite='Lax')
+        return response
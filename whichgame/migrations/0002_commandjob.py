@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whichgame', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommandJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('command', models.CharField(db_index=True, max_length=100)),
+                ('args', models.JSONField(blank=True, default=list)),
+                ('dedupe_key', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('queued', 'En attente'), ('running', 'En cours'), ('success', 'Terminé'), ('failed', 'Erreur')], db_index=True, default='queued', max_length=10)),
+                ('output', models.TextField(blank=True, default='')),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Tâche de fond',
+                'verbose_name_plural': 'Tâches de fond',
+                'ordering': ['-created_at'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['queued', 'running'])), fields=('dedupe_key',), name='unique_active_command_job')],
+            },
+        ),
+    ]
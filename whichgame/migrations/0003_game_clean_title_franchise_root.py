@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:05
+
+from django.db import migrations, models
+
+from whichgame import text
+
+# Jeux relus / écrits par lot (bulk_update ne déclenche ni save() ni auto_now)
+BACKFILL_CHUNK_SIZE = 500
+
+
+def fill_titles(apps, schema_editor):
+    """Remplit clean_title / franchise_root des jeux existants avec les mêmes règles que Game.save()."""
+    Game = apps.get_model('whichgame', 'Game')
+    batch = []
+    for game in Game.objects.only('id', 'title').order_by('id').iterator(chunk_size=BACKFILL_CHUNK_SIZE):
+        game.clean_title = text.clean_title(game.title)
+        game.franchise_root = text.franchise_root(game.title)[:100]
+        batch.append(game)
+        if len(batch) >= BACKFILL_CHUNK_SIZE:
+            Game.objects.bulk_update(batch, ['clean_title', 'franchise_root'])
+            batch = []
+    if batch:
+        Game.objects.bulk_update(batch, ['clean_title', 'franchise_root'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whichgame', '0002_commandjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='clean_title',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='franchise_root',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(fill_titles, migrations.RunPython.noop),
+    ]
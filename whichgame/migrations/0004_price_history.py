@@ -0,0 +1,59 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whichgame', '0003_game_clean_title_franchise_root'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='price_dropped_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='price_lowest',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, max_digits=6, null=True),
+        ),
+        migrations.CreateModel(
+            name='PriceHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('source', models.CharField(choices=[('search', 'Recherche CheapShark (update_prices)'), ('deals', 'Promotions CheapShark (sync_hot_deals)')], max_length=10)),
+                ('recorded_at', models.DateTimeField(db_index=True)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_history', to='whichgame.game')),
+            ],
+            options={
+                'verbose_name': 'Historique de prix',
+                'verbose_name_plural': 'Historique des prix',
+                'ordering': ['-recorded_at'],
+                'indexes': [models.Index(fields=['game', '-recorded_at'], name='pricehistory_game_recent')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PriceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Jour'), ('week', 'Semaine')], max_length=4)),
+                ('period_start', models.DateField()),
+                ('price_min', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('price_max', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('price_close', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_rollups', to='whichgame.game')),
+            ],
+            options={
+                'verbose_name': 'Agrégat de prix',
+                'verbose_name_plural': 'Agrégats de prix',
+                'ordering': ['game', 'period', '-period_start'],
+                'indexes': [models.Index(fields=['period', 'period_start'], name='pricerollup_period')],
+                'constraints': [models.UniqueConstraint(fields=('game', 'period', 'period_start'), name='unique_price_rollup')],
+            },
+        ),
+    ]
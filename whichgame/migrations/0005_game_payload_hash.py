@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whichgame', '0004_price_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='payload_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=40),
+        ),
+    ]
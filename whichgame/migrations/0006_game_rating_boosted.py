@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whichgame', '0005_game_payload_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='rating_boosted',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whichgame', '0007_requestprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommandRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('command', models.CharField(db_index=True, max_length=100)),
+                ('args', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('running', 'En cours'), ('success', 'Terminé'), ('failed', 'Erreur')], default='running', max_length=10)),
+                ('error', models.TextField(blank=True, default='')),
+                ('started_at', models.DateTimeField(db_index=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('duration', models.FloatField(blank=True, null=True)),
+                ('phases', models.JSONField(blank=True, default=dict)),
+                ('http', models.JSONField(blank=True, default=dict)),
+                ('http_requests', models.PositiveIntegerField(default=0)),
+                ('http_throttled', models.PositiveIntegerField(default=0)),
+                ('rows', models.JSONField(blank=True, default=dict)),
+                ('rows_written', models.PositiveIntegerField(default=0)),
+                ('rows_skipped', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Exécution de commande',
+                'verbose_name_plural': 'Exécutions de commandes',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['command', '-started_at'], name='commandrun_command_recent')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whichgame', '0008_commandrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamecollection',
+            name='is_auto',
+            field=models.BooleanField(default=False, help_text="Les jeux sont recalculés depuis le filtre de l'explorateur (url_filter) par refresh_collections", verbose_name='Automatique'),
+        ),
+        migrations.AddField(
+            model_name='gamecollection',
+            name='auto_limit',
+            field=models.PositiveIntegerField(default=24, verbose_name='Nombre de jeux (auto)'),
+        ),
+        migrations.AddField(
+            model_name='gamecollection',
+            name='ranking',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='gamecollection',
+            name='refreshed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whichgame', '0009_gamecollection_auto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commandjob',
+            name='output_length',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
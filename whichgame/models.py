@@ -1,10 +1,17 @@
+from django.conf import settings
 from django.db import models
 
+from . import text
+
 class Game(models.Model):
     # --- Identifiants ---
     igdb_id = models.IntegerField(unique=True, null=True, blank=True, db_index=True)
     title = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255, unique=True)
+
+    # --- Titre normalisé (calculé dans save(), voir text.py) ---
+    clean_title = models.CharField(max_length=255, blank=True, default='', db_index=True, editable=False) # Matching des prix
+    franchise_root = models.CharField(max_length=100, blank=True, default='', db_index=True, editable=False) # Suites / remakes
     
     # --- Infos Principales ---
     cover_url = models.URLField(blank=True, max_length=500)
@@ -22,7 +29,10 @@ class Game(models.Model):
     # --- Chiffres & Dates ---
     rating = models.IntegerField(null=True, blank=True, db_index=True)      
     total_rating_count = models.IntegerField(null=True, blank=True, db_index=True) # Filtre Anti-Poubelle
+    rating_boosted = models.BooleanField(default=False, db_index=True) # Note/avis provisoires injectés par refresh_ghost_games
     price_current = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True, db_index=True) 
+    price_lowest = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True, db_index=True) # Plus bas historique (voir prices.py)
+    price_dropped_at = models.DateTimeField(null=True, blank=True, db_index=True) # Date de la dernière baisse de prix
     playtime_main = models.IntegerField(null=True, blank=True, db_index=True)
     
     release_year = models.IntegerField(null=True, blank=True, db_index=True)
@@ -34,10 +44,23 @@ class Game(models.Model):
     video_id = models.CharField(max_length=50, null=True, blank=True)
     screenshots = models.JSONField(default=list, blank=True)
     
+    payload_hash = models.CharField(max_length=40, blank=True, default='', editable=False) # Hash du dernier payload IGDB (voir ingest.py)
     updated_at = models.DateTimeField(auto_now=True) 
     
     def __str__(self):
         return self.title
+
+    def save(self, *args, **kwargs):
+        # Colonnes dérivées du titre, recalculées à chaque sauvegarde (imports, admin...)
+        self.clean_title = text.clean_title(self.title)
+        self.franchise_root = text.franchise_root(self.title)[:100]
+
+        # update_or_create() ne sauvegarde que les champs modifiés : on ajoute les colonnes dérivées
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'title' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'clean_title', 'franchise_root'}
+
+        super().save(*args, **kwargs)
     
 
 class GameCollection(models.Model):
@@ -64,10 +87,212 @@ class GameCollection(models.Model):
     display_order = models.PositiveIntegerField(default=0)
     games = models.ManyToManyField(Game, related_name="collections", blank=True)
 
+    # --- Collection automatique (jeux recalculés depuis url_filter, voir auto_collections.py) ---
+    is_auto = models.BooleanField(
+        default=False,
+        verbose_name="Automatique",
+        help_text="Les jeux sont recalculés depuis le filtre de l'explorateur (url_filter) par refresh_collections",
+    )
+    auto_limit = models.PositiveIntegerField(default=24, verbose_name="Nombre de jeux (auto)")
+    ranking = models.JSONField(default=list, blank=True, editable=False) # IDs dans l'ordre de l'explorateur
+    refreshed_at = models.DateTimeField(null=True, blank=True, editable=False) # Dernier changement de la liste
+
     class Meta:
         ordering = ['display_order']
         verbose_name = "Collection Home"
         verbose_name_plural = "Collections Home"
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.title
+
+    def ordered_games(self):
+        """Jeux de la collection (prefetch_related('games') conseillé), dans l'ordre de l'explorateur si auto."""
+        games = list(self.games.all())
+        if self.is_auto and self.ranking:
+            position = {game_id: index for index, game_id in enumerate(self.ranking)}
+            games.sort(key=lambda game: position.get(game.id, len(position)))
+        return games
+
+class CommandJob(models.Model):
+    """File d'attente des commandes lancées depuis l'admin (exécutées par le worker `run_jobs`)."""
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCESS = 'success'
+    STATUS_FAILED = 'failed'
+    STATUSES = [
+        (STATUS_QUEUED, 'En attente'),
+        (STATUS_RUNNING, 'En cours'),
+        (STATUS_SUCCESS, 'Terminé'),
+        (STATUS_FAILED, 'Erreur'),
+    ]
+    ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+    command = models.CharField(max_length=100, db_index=True)
+    args = models.JSONField(default=list, blank=True)
+    # Clé "commande + arguments" : empêche deux exécutions simultanées du même job
+    dedupe_key = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUSES, default=STATUS_QUEUED, db_index=True)
+    output = models.TextField(blank=True, default='') # Fin de la sortie (MAX_OUTPUT_CHARS au plus, voir jobs.py)
+    output_length = models.PositiveBigIntegerField(default=0) # Caractères écrits depuis le début, fenêtre comprise
+    error = models.TextField(blank=True, default='')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True) # Mis à jour par le worker tant que la commande tourne
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Tâche de fond"
+        verbose_name_plural = "Tâches de fond"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedupe_key'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='unique_active_command_job',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.command} {' '.join(self.args)}".strip()
+
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+
+    @property
+    def duration(self):
+        if not self.started_at:
+            return None
+        end = self.finished_at or self.heartbeat_at or self.started_at
+        return round((end - self.started_at).total_seconds(), 2)
+
+
+class CommandRun(models.Model):
+    """Une exécution de commande de gestion (voir ledger.py) : durée, étapes, appels HTTP, lignes écrites."""
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCESS = 'success'
+    STATUS_FAILED = 'failed'
+    STATUSES = [
+        (STATUS_RUNNING, 'En cours'),
+        (STATUS_SUCCESS, 'Terminé'),
+        (STATUS_FAILED, 'Erreur'),
+    ]
+
+    command = models.CharField(max_length=100, db_index=True)
+    args = models.JSONField(default=dict, blank=True) # Options passées (hors options par défaut de Django)
+    status = models.CharField(max_length=10, choices=STATUSES, default=STATUS_RUNNING)
+    error = models.TextField(blank=True, default='')
+
+    started_at = models.DateTimeField(db_index=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True) # Secondes
+
+    phases = models.JSONField(default=dict, blank=True) # {étape: secondes}, ex: {"auth": 0.2, "fetch": 12.4}
+    http = models.JSONField(default=dict, blank=True) # {api: {requests, wait, throttled}}
+    http_requests = models.PositiveIntegerField(default=0)
+    http_throttled = models.PositiveIntegerField(default=0) # Réponses HTTP 429
+    rows = models.JSONField(default=dict, blank=True) # Détail, ex: {"new": 3, "changed": 12, "unchanged": 480}
+    rows_written = models.PositiveIntegerField(default=0)
+    rows_skipped = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-started_at']
+        verbose_name = "Exécution de commande"
+        verbose_name_plural = "Exécutions de commandes"
+        indexes = [
+            models.Index(fields=['command', '-started_at'], name='commandrun_command_recent'),
+        ]
+
+    def __str__(self):
+        return f"{self.command} ({self.started_at:%Y-%m-%d %H:%M})"
+
+    @property
+    def throughput(self):
+        """Lignes écrites par seconde."""
+        if not self.duration:
+            return None
+        return round(self.rows_written / self.duration, 2)
+
+
+class PriceHistory(models.Model):
+    """Historique brut des prix : une ligne uniquement quand le prix d'un jeu change (voir prices.py)."""
+    SOURCE_SEARCH = 'search'
+    SOURCE_DEALS = 'deals'
+    SOURCES = [
+        (SOURCE_SEARCH, 'Recherche CheapShark (update_prices)'),
+        (SOURCE_DEALS, 'Promotions CheapShark (sync_hot_deals)'),
+    ]
+
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='price_history')
+    price = models.DecimalField(max_digits=6, decimal_places=2)
+    source = models.CharField(max_length=10, choices=SOURCES)
+    recorded_at = models.DateTimeField(db_index=True) # Index seul : utilisé par la purge (rollup_prices)
+
+    class Meta:
+        ordering = ['-recorded_at']
+        verbose_name = "Historique de prix"
+        verbose_name_plural = "Historique des prix"
+        indexes = [
+            models.Index(fields=['game', '-recorded_at'], name='pricehistory_game_recent'),
+        ]
+
+    def __str__(self):
+        return f"{self.game_id} : {self.price}€ ({self.recorded_at:%Y-%m-%d})"
+
+
+class PriceRollup(models.Model):
+    """Min / max / dernier prix d'un jeu par jour et par semaine, tenus à jour à chaque écriture."""
+    PERIOD_DAY = 'day'
+    PERIOD_WEEK = 'week'
+    PERIODS = [
+        (PERIOD_DAY, 'Jour'),
+        (PERIOD_WEEK, 'Semaine'),
+    ]
+
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='price_rollups')
+    period = models.CharField(max_length=4, choices=PERIODS)
+    period_start = models.DateField() # Le jour, ou le lundi de la semaine
+    price_min = models.DecimalField(max_digits=6, decimal_places=2)
+    price_max = models.DecimalField(max_digits=6, decimal_places=2)
+    price_close = models.DecimalField(max_digits=6, decimal_places=2) # Dernier prix de la période
+
+    class Meta:
+        ordering = ['game', 'period', '-period_start']
+        verbose_name = "Agrégat de prix"
+        verbose_name_plural = "Agrégats de prix"
+        constraints = [
+            models.UniqueConstraint(fields=['game', 'period', 'period_start'], name='unique_price_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['period', 'period_start'], name='pricerollup_period'),
+        ]
+
+    def __str__(self):
+        return f"{self.game_id} {self.period} {self.period_start} : {self.price_min}-{self.price_max}€"
+
+
+class RequestProfile(models.Model):
+    """Profil d'une requête demandé par un membre du staff (`?_profile=1`, voir profiling.py)."""
+    path = models.CharField(max_length=500)
+    view_name = models.CharField(max_length=200, blank=True, default='', db_index=True)
+    method = models.CharField(max_length=10)
+    status_code = models.PositiveSmallIntegerField()
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+
+    duration_ms = models.FloatField()
+    sql_count = models.PositiveIntegerField(default=0)
+    sql_time_ms = models.FloatField(default=0)
+    samples = models.PositiveIntegerField(default=0)
+    report = models.TextField(blank=True, default='')
+    sql_log = models.JSONField(default=list, blank=True) # [{sql, params, ms}], MAX_SQL_LOG au plus
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Profil de requête"
+        verbose_name_plural = "Profils de requêtes"
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
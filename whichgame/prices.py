@@ -0,0 +1,172 @@
+"""
+Historique des prix, alimenté par `update_prices` et `sync_hot_deals`.
+
+- `PriceHistory` : un point uniquement quand le prix change (jamais de doublon).
+- `PriceRollup` : min / max / dernier prix par jour et par semaine, mis à jour à l'écriture.
+- `Game.price_lowest` et `Game.price_dropped_at` : colonnes indexées pour les filtres
+  de l'explorateur ("plus bas historique", "baisse cette semaine"), sans lire l'historique.
+
+Le brut et les agrégats journaliers sont purgés par `rollup_prices` ; les agrégats
+hebdomadaires sont conservés (au plus 52 lignes par jeu et par an).
+"""
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from . import caching, db
+from .models import Game, PriceHistory, PriceRollup
+
+# Fenêtre du filtre "baisse de prix cette semaine"
+DROP_WINDOW = timedelta(days=7)
+
+# Durées de conservation (voir la commande rollup_prices)
+RAW_RETENTION = timedelta(days=90)
+DAILY_RETENTION = timedelta(days=400)
+
+# Jeux par requête `game_id__in` (limite de paramètres SQLite)
+CHUNK_SIZE = 500
+
+
+def to_price(value):
+    """Prix CheapShark (float ou str) -> Decimal à 2 décimales, None si illisible."""
+    try:
+        return Decimal(str(value)).quantize(Decimal('0.01'))
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+
+
+def period_starts(day):
+    """{'day': le jour, 'week': le lundi de sa semaine}."""
+    return {
+        PriceRollup.PERIOD_DAY: day,
+        PriceRollup.PERIOD_WEEK: day - timedelta(days=day.weekday()),
+    }
+
+
+def record_prices(changes, source, now=None):
+    """
+    Enregistre en lot les nouveaux prix. `changes` : itérable de (game, prix).
+    Les prix identiques au prix actuel sont ignorés. Retourne la liste de (game, ancien prix)
+    des jeux réellement modifiés.
+    """
+    now = now or timezone.now()
+
+    changed = []
+    history = []
+    for game, price in changes:
+        price = to_price(price)
+        old_price = game.price_current
+        if price is None or price == old_price:
+            continue
+
+        # L'ancien prix a été observé lui aussi : il compte pour le plus bas historique
+        known = [p for p in (game.price_lowest, old_price, price) if p is not None]
+        game.price_lowest = min(known)
+        if old_price is not None and price < old_price:
+            game.price_dropped_at = now
+        game.price_current = price
+        game.updated_at = now # bulk_update() ignore auto_now
+
+        changed.append((game, old_price))
+        history.append(PriceHistory(game=game, price=price, source=source, recorded_at=now))
+
+    if not changed:
+        return changed
+
+    # Une transaction courte par lot (historique + prix + agrégats des mêmes jeux), voir db.py
+    day = timezone.localdate(now)
+    for chunk in db.chunks(zip(changed, history), CHUNK_SIZE):
+        with transaction.atomic():
+            PriceHistory.objects.bulk_create([point for _, point in chunk])
+            Game.objects.bulk_update(
+                [game for (game, _), _ in chunk],
+                ['price_current', 'price_lowest', 'price_dropped_at', 'updated_at'],
+            )
+            _update_rollups([change for change, _ in chunk], day)
+
+    # bulk_update() n'envoie pas post_save : invalidation manuelle (voir signals.py)
+    for game, _ in changed:
+        caching.invalidate_game(game)
+    caching.schedule_bump(caching.CATALOG)
+
+    return changed
+
+
+def _update_rollups(changed, day):
+    """Étend (ou crée) les agrégats du jour et de la semaine de chaque jeu modifié."""
+    starts = period_starts(day)
+
+    for i in range(0, len(changed), CHUNK_SIZE):
+        chunk = changed[i:i + CHUNK_SIZE]
+        existing = {
+            (r.game_id, r.period): r
+            for r in PriceRollup.objects.filter(
+                game_id__in=[game.id for game, _ in chunk],
+                period_start__in=set(starts.values()),
+            )
+            if r.period_start == starts[r.period]
+        }
+
+        to_create = []
+        to_update = []
+        for game, old_price in chunk:
+            price = game.price_current
+            for period, start in starts.items():
+                rollup = existing.get((game.id, period))
+                if rollup is None:
+                    # Le prix précédent était en vigueur au début de la période
+                    opening = [p for p in (old_price, price) if p is not None]
+                    to_create.append(PriceRollup(
+                        game=game, period=period, period_start=start,
+                        price_min=min(opening), price_max=max(opening), price_close=price,
+                    ))
+                else:
+                    rollup.price_min = min(rollup.price_min, price)
+                    rollup.price_max = max(rollup.price_max, price)
+                    rollup.price_close = price
+                    to_update.append(rollup)
+
+        PriceRollup.objects.bulk_create(to_create)
+        PriceRollup.objects.bulk_update(to_update, ['price_min', 'price_max', 'price_close'])
+
+
+def prune(now=None):
+    """Supprime l'historique brut et les agrégats journaliers trop anciens. Retourne (brut, jours)."""
+    now = now or timezone.now()
+    raw = _delete_in_chunks(PriceHistory.objects.filter(recorded_at__lt=now - RAW_RETENTION))
+    daily = _delete_in_chunks(PriceRollup.objects.filter(
+        period=PriceRollup.PERIOD_DAY,
+        period_start__lt=timezone.localdate(now) - DAILY_RETENTION,
+    ))
+    return raw, daily
+
+
+def _delete_in_chunks(queryset):
+    """Supprime par lots de CHUNK_SIZE lignes (un DELETE géant bloquerait les autres écrivains)."""
+    deleted = 0
+    while True:
+        ids = list(queryset.values_list('id', flat=True)[:CHUNK_SIZE])
+        if not ids:
+            return deleted
+        count, _ = queryset.model.objects.filter(id__in=ids).delete()
+        deleted += count
+
+
+def rebuild_lowest():
+    """Recalcule `Game.price_lowest` depuis les agrégats hebdomadaires (jamais purgés)."""
+    lows = (
+        PriceRollup.objects.filter(period=PriceRollup.PERIOD_WEEK)
+        .values('game_id')
+        .annotate(low=Min('price_min'))
+    )
+    games = []
+    for row in lows.iterator():
+        games.append(Game(id=row['game_id'], price_lowest=row['low']))
+    # bulk_update() ferait tous les lots dans une seule transaction
+    for chunk in db.chunks(games, CHUNK_SIZE):
+        Game.objects.bulk_update(chunk, ['price_lowest'])
+    caching.schedule_bump(caching.CATALOG)
+    return len(games)
@@ -0,0 +1,148 @@
+"""
+Profilage à la demande d'une requête, réservé au staff (voir `ProfilerMiddleware`).
+
+- `SamplingProfiler` : un thread relève la pile du thread de la requête toutes les
+  `interval` secondes (`sys._current_frames`), sans tracer chaque appel comme cProfile.
+- `SqlRecorder` : journal des requêtes SQL (texte, paramètres, durée).
+- `build_report()` : fonctions les plus coûteuses (temps propre / cumulé), chemins chauds et
+  requêtes SQL répétées (N+1), stocké dans `RequestProfile` et lisible dans l'admin.
+"""
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+
+# Intervalle d'échantillonnage (s). Le GIL limite de toute façon la précision à quelques ms.
+DEFAULT_INTERVAL = 0.002
+
+# Requêtes SQL gardées dans le journal d'un profil
+MAX_SQL_LOG = 500
+
+_BASE_DIR = str(settings.BASE_DIR)
+
+
+def _is_project(code):
+    """Code du projet (un virtualenv peut se trouver dans BASE_DIR : ses paquets sont exclus)."""
+    return code.co_filename.startswith(_BASE_DIR) and 'site-packages' not in code.co_filename
+
+
+def _frame_label(code):
+    """'fonction (fichier:ligne)', chemin raccourci au projet ou au paquet installé."""
+    filename = code.co_filename
+    if 'site-packages' in filename:
+        filename = filename.split('site-packages', 1)[1].lstrip('/\\')
+    elif filename.startswith(_BASE_DIR):
+        filename = filename[len(_BASE_DIR):].lstrip('/\\')
+    else:
+        filename = Path(filename).name
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Échantillonne la pile d'un thread (celui qui appelle `start()`) jusqu'à `stop()`."""
+
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()  # {(code racine, ..., code feuille): échantillons}
+        self._stop = threading.Event()
+        self._thread = None
+        self._target = None
+
+    def start(self):
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    @property
+    def samples(self):
+        return sum(self.stacks.values())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+
+class SqlRecorder:
+    """`connection.execute_wrapper` qui garde le texte, les paramètres et la durée de chaque requête."""
+
+    def __init__(self):
+        self.queries = []
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            if len(self.queries) < MAX_SQL_LOG:
+                self.queries.append({
+                    'sql': sql,
+                    'params': repr(params)[:300] if not many else '(executemany)',
+                    'ms': round(elapsed * 1000, 3),
+                })
+
+
+def build_report(profiler, sql, duration, limit=30):
+    """Rapport texte d'un profil : temps propre, temps cumulé, chemins chauds et SQL répété."""
+    total = profiler.samples
+    lines = [
+        f"Durée : {duration * 1000:.1f} ms | {total} échantillons (intervalle visé : {profiler.interval * 1000:.0f} ms)",
+        f"SQL : {sql.count} requêtes, {sql.duration * 1000:.1f} ms",
+        "",
+    ]
+    if not total:
+        lines.append("Aucun échantillon (requête plus courte que l'intervalle).")
+        return "\n".join(lines)
+
+    own = Counter()
+    cumulative = Counter()
+    for stack, count in profiler.stacks.items():
+        own[stack[-1]] += count
+        for code in set(stack):
+            cumulative[code] += count
+
+    def table(title, counter):
+        lines.append(title)
+        for code, count in counter.most_common(limit):
+            lines.append(f"  {count / total * 100:5.1f}%  {count:6d}  {_frame_label(code)}")
+        lines.append("")
+
+    table("== Temps propre (la fonction elle-même) ==", own)
+    table("== Temps cumulé (fonction + appels) ==", cumulative)
+
+    # Chemins chauds : piles complètes les plus fréquentes, limitées au code du projet
+    lines.append("== Chemins chauds (code du projet) ==")
+    paths = Counter()
+    for stack, count in profiler.stacks.items():
+        project = [code for code in stack if _is_project(code)]
+        if project:
+            paths[tuple(project)] += count
+    for stack, count in paths.most_common(10):
+        lines.append(f"  {count / total * 100:5.1f}%  " + " > ".join(code.co_name for code in stack))
+    lines.append("")
+
+    repeated = Counter(query['sql'] for query in sql.queries)
+    duplicates = [(text, count) for text, count in repeated.most_common(10) if count > 1]
+    if duplicates:
+        lines.append("== Requêtes SQL répétées (N+1 probable) ==")
+        for text, count in duplicates:
+            lines.append(f"  x{count}  {text[:200]}")
+
+    return "\n".join(lines)
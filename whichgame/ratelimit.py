@@ -0,0 +1,114 @@
+"""
+Budget de requêtes partagé entre processus (token bucket), un par API externe.
+
+Les crons qui se chevauchent (ex: `update_prices` et `sync_hot_deals` sur CheapShark) puisent
+dans le même seau au lieu de dormir chacun de leur côté. L'état est stocké dans une petite base
+SQLite dédiée (`settings.RATE_LIMIT_DB`) : `BEGIN IMMEDIATE` sérialise les processus et les threads,
+sans jamais bloquer la base principale.
+
+Chaque appel à `acquire()` réserve un jeton : s'il n'y en a plus, le jeton est "emprunté" sur le
+futur et l'appelant dort le temps nécessaire (hors verrou). Les appelants sont donc servis dans
+l'ordre d'arrivée et le débit global ne dépasse jamais `rate` requêtes / seconde.
+"""
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+# (requêtes par seconde, rafale maximale), surchargeable par settings.RATE_LIMITS
+DEFAULT_LIMITS = {
+    'igdb': (4.0, 4),
+    'cheapshark': (1.0, 2),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+# Compteurs par API dans ce processus : {nom: [secondes d'attente, requêtes, requêtes ayant attendu, HTTP 429]}
+_stats = defaultdict(lambda: [0.0, 0, 0, 0])
+_stats_lock = threading.Lock()
+
+
+def _connect():
+    connection = sqlite3.connect(str(settings.RATE_LIMIT_DB), timeout=30, isolation_level=None)
+    connection.execute(_SCHEMA)
+    return connection
+
+
+def limits(name):
+    return getattr(settings, 'RATE_LIMITS', {}).get(name, DEFAULT_LIMITS[name])
+
+
+def acquire(name, tokens=1):
+    """Réserve `tokens` jetons de l'API `name` et attend qu'ils soient disponibles. Retourne l'attente (s)."""
+    rate, capacity = limits(name)
+
+    connection = _connect()
+    try:
+        connection.execute("BEGIN IMMEDIATE")
+        now = time.time()
+        row = connection.execute("SELECT tokens, updated_at FROM buckets WHERE name = ?", (name,)).fetchone()
+        available = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+        available -= tokens
+        connection.execute(
+            "INSERT OR REPLACE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+            (name, available, now),
+        )
+        connection.execute("COMMIT")
+    finally:
+        connection.close()
+
+    # Solde négatif : le jeton sera disponible dans -solde / débit secondes
+    wait = max(0.0, -available / rate)
+    if wait:
+        time.sleep(wait)
+
+    with _stats_lock:
+        stats = _stats[name]
+        stats[0] += wait
+        stats[1] += 1
+        stats[2] += 1 if wait else 0
+    return wait
+
+
+def throttled(name):
+    """Compte une réponse HTTP 429 de l'API `name` (le budget était trop optimiste)."""
+    with _stats_lock:
+        _stats[name][3] += 1
+
+
+def snapshot():
+    """Copie des compteurs du processus : {nom: {'requests', 'wait', 'delayed', 'throttled'}} (voir ledger.py)."""
+    with _stats_lock:
+        return {
+            name: {'requests': count, 'wait': round(waited, 3), 'delayed': delayed, 'throttled': throttled_count}
+            for name, (waited, count, delayed, throttled_count) in _stats.items()
+        }
+
+
+def summary(since=None):
+    """
+    Ligne de résumé des attentes, pour la sortie des commandes. Les compteurs vivent dans le
+    processus (run_scheduler enchaîne les commandes) : `since`, un snapshot() pris au début de la
+    commande, limite le résumé à cette exécution.
+    """
+    since = since or {}
+    parts = []
+    for name, counts in sorted(snapshot().items()):
+        previous = since.get(name, {})
+        waited, count, delayed, throttled_count = (
+            counts[key] - previous.get(key, 0) for key in ('wait', 'requests', 'delayed', 'throttled')
+        )
+        if count or throttled_count:
+            parts.append(
+                f"{name}: {waited:.1f}s over {count} requests ({delayed} delayed"
+                + (f", {throttled_count} HTTP 429)" if throttled_count else ")")
+            )
+    return "⏳ Rate limit wait — " + " | ".join(parts) if parts else "⏳ Rate limit wait — no upstream request"
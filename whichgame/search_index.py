@@ -0,0 +1,93 @@
+"""
+In-memory prefix index for title autocomplete.
+
+Built once per worker from the catalog and rebuilt lazily when the catalog version changes.
+Keys are normalized with `text.clean_title` (accents, punctuation and spaces removed), so
+"pokemon sc", "Pokémon: Sc" and "pokemon-sc" all hit "Pokémon Scarlet".
+
+Each game is indexed under its full title, its slug and every word start of its title
+("witcher" finds "The Witcher 3"). Results are ranked by `total_rating_count`.
+"""
+import heapq
+from array import array
+from bisect import bisect_left
+
+from . import caching
+from .models import Game
+from .text import clean_title, title_words
+
+# Word starts indexed per title (keeps the index compact for long titles)
+MAX_WORD_KEYS = 6
+
+# Prefixes up to this length have their top results precomputed (their key range is huge)
+PRECOMPUTED_PREFIX_LENGTH = 2
+PRECOMPUTED_RESULTS = 20
+
+
+class PrefixIndex:
+
+    def __init__(self, version):
+        self.version = version
+
+        games = Game.objects.filter(total_rating_count__gte=5).values_list(
+            'id', 'title', 'slug', 'cover_url', 'release_year', 'total_rating_count'
+        )
+
+        pairs = []
+        self.games = {}
+        self.popularity = {}
+
+        for game_id, title, slug, cover_url, release_year, count in games.iterator():
+            self.games[game_id] = (title, slug, cover_url, release_year)
+            self.popularity[game_id] = count or 0
+
+            keys = {clean_title(title), clean_title(slug)}
+            words = title_words(title)
+            for start in range(1, min(len(words), MAX_WORD_KEYS)):
+                keys.add("".join(words[start:]))
+            pairs.extend((key, game_id) for key in keys if key)
+
+        pairs.sort()
+        # Two parallel arrays instead of a list of tuples: ~3x less memory
+        self.keys = [key for key, _ in pairs]
+        self.ids = array('q', (game_id for _, game_id in pairs))
+
+        self.top = {}
+        for length in range(1, PRECOMPUTED_PREFIX_LENGTH + 1):
+            prefixes = {key[:length] for key in self.keys if len(key) >= length}
+            for prefix in prefixes:
+                self.top[prefix] = self._rank(prefix, PRECOMPUTED_RESULTS)
+
+    def _range(self, prefix):
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + '{', lo) # '{' sorts right after 'z'
+        return lo, hi
+
+    def _rank(self, prefix, limit):
+        lo, hi = self._range(prefix)
+        return heapq.nlargest(limit, set(self.ids[lo:hi]), key=self.popularity.__getitem__)
+
+    def search(self, query, limit=8):
+        """Returns [(id, title, slug, cover_url, release_year), ...], most rated first."""
+        prefix = clean_title(query)
+        if not prefix:
+            return []
+
+        if prefix in self.top and limit <= PRECOMPUTED_RESULTS:
+            ids = self.top[prefix][:limit]
+        else:
+            ids = self._rank(prefix, limit)
+
+        return [(game_id, *self.games[game_id]) for game_id in ids]
+
+
+_index = caching.VersionedSingleton(PrefixIndex, caching.CATALOG)
+
+
+def get_index():
+    """Returns this worker's prefix index (rebuilt if the catalog changed)."""
+    return _index.get()
+
+
+def warm():
+    get_index()
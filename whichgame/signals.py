@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import CATALOG, invalidate_game, schedule_bump
+from .models import Game
+
+
+@receiver(post_save, sender=Game)
+@receiver(post_delete, sender=Game)
+def game_changed(sender, instance, **kwargs):
+    invalidate_game(instance)
+    # Un seul changement de version par transaction, et par minute pendant une commande (voir caching)
+    schedule_bump(CATALOG)
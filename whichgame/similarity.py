@@ -0,0 +1,215 @@
+"""
+Scoring of game-to-game similarity, shared by `calculate_recommendations`.
+
+The exact scorer compares two games on summary keywords, genres, themes and franchise.
+`MinHashLSH` is an optional candidate-generation stage: it pre-selects a few hundred
+likely neighbours per game so the exact scorer no longer has to visit every pair.
+"""
+import heapq
+import random
+import re
+import zlib
+from collections import Counter, defaultdict
+from itertools import islice
+
+# Fundamental genre incompatibilities (e.g., Don't recommend a Racing game for a RPG)
+STRICT_GENRES = {'Racing', 'Sport', 'Fighting', 'Puzzle', 'Strategy', 'Simulator'}
+
+# Common words to ignore during semantic keyword extraction
+STOPWORDS = {
+    'the', 'a', 'an', 'and', 'or', 'of', 'to', 'in', 'on', 'at', 'with', 'by', 'from',
+    'game', 'play', 'player', 'world', 'story', 'new', 'best', 'experience', 'character',
+    'level', 'mode', 'edition', 'version', 'series', 'explore', 'fight', 'action', 'adventure',
+    'gameplay', 'system', 'features', 'time', 'original', 'classic', 'set', 'take', 'control',
+    'find', 'make', 'use', 'get', 'one', 'two', 'three', 'first', 'second', 'third'
+}
+
+# Number of recommendations stored per game, and max games of the same franchise among them
+MAX_RECOMMENDATIONS = 6
+MAX_SAME_FRANCHISE = 2
+
+
+def extract_keywords(text):
+    """Extracts meaningful keywords from a text block."""
+    if not text:
+        return set()
+    text_clean = re.sub(r'[^\w\s]', '', text.lower())
+    words = text_clean.split()
+    return {w for w in words if len(w) > 3 and w not in STOPWORDS}
+
+
+class GameFeatures:
+    """Pre-computed scoring inputs for one game (computed once, not once per pair)."""
+    __slots__ = ('game', 'id', 'keywords', 'genres', 'themes', 'root', 'strict')
+
+    def __init__(self, game):
+        self.game = game
+        self.id = game.id
+        self.keywords = extract_keywords(game.summary)
+        self.genres = set(game.genres or [])
+        self.themes = set(game.themes or [])
+        self.root = game.franchise_root # Stored on Game (see Game.save)
+        self.strict = frozenset(self.genres & STRICT_GENRES)
+
+
+def score(game, candidate):
+    """Weighted similarity score between two `GameFeatures`. Returns 0 for incompatible pairs."""
+    # 1. Strict Genre Check
+    if game.strict != candidate.strict:
+        return 0
+
+    # 2. Keyword Intersection (Summary semantics)
+    total = len(game.keywords & candidate.keywords) * 2
+
+    # 3. Metadata Intersection (Genres & Themes)
+    total += len(game.genres & candidate.genres) * 5
+    total += len(game.themes & candidate.themes) * 4
+
+    # 4. Same Franchise boost
+    if game.root and game.root == candidate.root:
+        total += 15
+
+    return total
+
+
+def top_recommendations(game, candidates):
+    """
+    Scores `candidates` against `game` and returns the final selection of `GameFeatures`,
+    sorted by score with the franchise diversity filter applied.
+    """
+    scored = []
+    for candidate in candidates:
+        if candidate.id == game.id:
+            continue
+        value = score(game, candidate)
+        if value > 0:
+            scored.append((value, candidate))
+
+    # Sort by score descending
+    scored.sort(key=lambda x: x[0], reverse=True)
+
+    # Diversity Filter (Limit games from the exact same franchise)
+    selection = []
+    same_franchise_count = 0
+    for value, candidate in scored:
+        if len(selection) >= MAX_RECOMMENDATIONS:
+            break
+        if game.root and candidate.root == game.root:
+            if same_franchise_count >= MAX_SAME_FRANCHISE:
+                continue
+            same_franchise_count += 1
+        selection.append(candidate)
+
+    return selection
+
+
+class MinHashLSH:
+    """
+    Locality-sensitive hashing over MinHash signatures of summary keywords, plus
+    genre/theme buckets.
+
+    `bands` x `rows` hash functions are used. More bands (or fewer rows per band) means
+    more collisions: better recall, more work. Candidates are ranked by the number of
+    buckets they share with the game (LSH bands + (genre, theme) pairs), and games of
+    the same franchise root are kept first (they carry the +15 boost).
+
+    Every step is bounded, whatever the catalog size: a (genre, theme) bucket such as
+    ("Adventure", None) can hold a large share of the catalog, so only `meta_sample`
+    of its members are drawn per game; LSH bands holding more than `max_candidates`
+    games (very common words) are skipped; and at most `max_candidates // 3` franchise
+    games are forced in (a root like "star" or "super" is shared by hundreds of games).
+    """
+    _PRIME = (1 << 61) - 1
+
+    def __init__(self, features, bands=32, rows=2, max_candidates=300, meta_sample=64, seed=42):
+        self.bands = bands
+        self.rows = rows
+        self.max_candidates = max_candidates
+        self.meta_sample = meta_sample
+        self.max_same_root = max(1, max_candidates // 3)
+        # A band shared by more games than we can score says nothing about any of them (like a stopword)
+        self.max_band_bucket = max_candidates
+        self.by_id = {f.id: f for f in features}
+        self._order = {f.id: index for index, f in enumerate(features)}
+
+        rng = random.Random(seed)
+        num_perm = bands * rows
+        self._perms = [(rng.randrange(1, self._PRIME), rng.randrange(0, self._PRIME)) for _ in range(num_perm)]
+        self._token_hashes = {}
+
+        self._band_buckets = defaultdict(list)
+        self._meta_buckets = defaultdict(list)
+        self._root_buckets = defaultdict(list)
+        self._signatures = {}
+
+        for f in features:
+            signature = self._signature(f.keywords)
+            self._signatures[f.id] = signature
+            if signature is not None:
+                for key in self._band_keys(signature):
+                    self._band_buckets[key].append(f.id)
+            for key in self._meta_keys(f):
+                self._meta_buckets[key].append(f.id)
+            if f.root:
+                self._root_buckets[f.root].append(f.id)
+
+    def _hash_token(self, token):
+        """Vector of `bands * rows` hashes for one token (memoised: the vocabulary is shared)."""
+        vector = self._token_hashes.get(token)
+        if vector is None:
+            x = zlib.crc32(token.encode('utf-8'))
+            vector = [(a * x + b) % self._PRIME for a, b in self._perms]
+            self._token_hashes[token] = vector
+        return vector
+
+    def _signature(self, tokens):
+        if not tokens:
+            return None
+        return list(map(min, zip(*(self._hash_token(t) for t in tokens))))
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield (band, tuple(signature[start:start + self.rows]))
+
+    def _meta_keys(self, features):
+        """One bucket per (genre, theme) pair: sharing many pairs ~ sharing genres AND themes."""
+        themes = features.themes or {None}
+        return [(genre, theme) for genre in features.genres for theme in themes]
+
+    def candidates(self, game):
+        """Returns up to `max_candidates` `GameFeatures`, most shared buckets first."""
+        collisions = Counter()
+
+        signature = self._signatures.get(game.id)
+        if signature is not None:
+            for key in self._band_keys(signature):
+                bucket = self._band_buckets[key]
+                if len(bucket) <= self.max_band_bucket:
+                    collisions.update(bucket)
+
+        # Large (genre, theme) buckets are sampled (seeded by the game: reproducible runs)
+        rng = random.Random(game.id)
+        for key in self._meta_keys(game):
+            bucket = self._meta_buckets.get(key, ())
+            if len(bucket) > self.meta_sample:
+                bucket = rng.sample(bucket, self.meta_sample)
+            collisions.update(bucket)
+
+        collisions.pop(game.id, None)
+        always = set()
+        if game.root:
+            same_root = [gid for gid in self._root_buckets.get(game.root, ()) if gid != game.id]
+            if len(same_root) > self.max_same_root:
+                # Most shared buckets first, then catalog order
+                same_root = heapq.nsmallest(
+                    self.max_same_root, same_root, key=lambda gid: (-collisions[gid], self._order[gid]),
+                )
+            always = set(same_root)
+
+        budget = max(0, self.max_candidates - len(always))
+        # Franchise games may also be among the top collisions: ask for enough to fill the budget
+        ranked = (gid for gid, _ in collisions.most_common(budget + len(always)) if gid not in always)
+        selected = always | set(islice(ranked, budget))
+        # Catalog order is kept so ties are broken exactly like the exhaustive scorer
+        return [self.by_id[gid] for gid in sorted(selected, key=self._order.__getitem__)]
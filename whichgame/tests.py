@@ -1,3 +1,564 @@
-from django.test import TestCase
+import importlib
+import io
+import os
+import random
+import threading
+from collections import Counter
+from types import SimpleNamespace
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from whichgame import db, explorer_api, http_cache, igdb, ingest, jobs, prices
+from whichgame.filters import filter_games, order_games, sort_fields
+from whichgame.management.commands import sync_hot_deals
+from whichgame.models import CommandJob, Game, PriceHistory, PriceRollup
+from whichgame.similarity import GameFeatures, MinHashLSH, score, top_recommendations
+
+# Tests that go through views or caching.py never touch the configured file cache
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-default'},
+    'fragments': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-fragments'},
+}
+
+
+class StartupBudgetTests(SimpleTestCase):
+    """
+    Cold start regressions (heavy top-level imports, work at import time) fail the suite.
+    The children run --isolated: the configured database and cache are never opened.
+    """
+
+    def test_no_http_client_at_startup(self):
+        out = io.StringIO()
+        try:
+            # /robots.txt: the first request measures the worker, not the database content
+            call_command(
+                'benchmark_startup', '--isolated', '--no-budget', '--repeat', '1', '--path', '/robots.txt',
+                '--commands', 'link_remakes', stdout=out,
+            )
+        except CommandError as e:
+            self.fail(f"{e}\n{out.getvalue()}")
+
+        self.assertIn("no forbidden import", out.getvalue())
+
+    def test_forbidden_imports_are_detected(self):
+        # Django itself is always imported: the test above is not vacuous
+        with self.assertRaisesMessage(CommandError, "Forbidden imports"):
+            call_command(
+                'benchmark_startup', '--isolated', '--no-budget', '--repeat', '1', '--path', '/robots.txt',
+                '--commands', 'link_remakes', '--forbid', 'django', stdout=io.StringIO(),
+            )
+
+    @skipUnless(os.environ.get('STARTUP_BUDGET_TESTS'), "wall-clock budgets: set STARTUP_BUDGET_TESTS=1 on a quiet machine")
+    def test_startup_within_budget(self):
+        out = io.StringIO()
+        try:
+            call_command('benchmark_startup', '--isolated', '--repeat', '2', '--path', '/robots.txt', stdout=out)
+        except CommandError as e:
+            self.fail(f"{e}\n{out.getvalue()}")
+
+        self.assertIn("within budget", out.getvalue())
+
+    def test_budgets_are_enforced(self):
+        # A budget nobody can meet must fail
+        with self.assertRaisesMessage(CommandError, "budget exceeded"):
+            call_command(
+                'benchmark_startup', '--isolated', '--repeat', '1', '--path', '/robots.txt',
+                '--commands', 'link_remakes', '--max-command-ms', '0',
+                stdout=io.StringIO(),
+            )
+
+
+class SQLiteConcurrencyTests(TransactionTestCase):
+    """
+    Readers and chunked writers share the file-based test database (settings.DATABASES TEST NAME):
+    with WAL, the busy timeout and BEGIN IMMEDIATE, nobody may see "database is locked".
+    """
+    WRITERS = 3
+    READERS = 4
+    ROWS_PER_WRITER = 3000
+
+    def test_sqlite_settings(self):
+        self.assertNotIn('memory', connection.settings_dict['NAME'])
+        pragmas = db.pragmas()
+        self.assertEqual(pragmas['journal_mode'], 'wal')
+        self.assertGreaterEqual(pragmas['busy_timeout'], 5000)
+
+    def test_concurrent_writers_and_readers(self):
+        errors = []
+        reads = []
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def reader():
+            try:
+                while not stop.is_set():
+                    try:
+                        queryset = order_games(filter_games(Game.objects.all(), {}), {})
+                        queryset.count()
+                        list(queryset[:24])
+                    except OperationalError as e:
+                        with lock:
+                            errors.append(f"read: {e}")
+                    else:
+                        with lock:
+                            reads.append(1)
+            finally:
+                connections.close_all()
+
+        def writer(number):
+            # Same pattern as the data commands: one short transaction per chunk, inserts then updates
+            try:
+                games = [
+                    Game(title=f"Stress {number} {i}", slug=f"stress-{number}-{i}", total_rating_count=i % 50)
+                    for i in range(self.ROWS_PER_WRITER)
+                ]
+                for chunk in db.chunks(games):
+                    try:
+                        with transaction.atomic():
+                            Game.objects.bulk_create(chunk)
+                    except OperationalError as e:
+                        with lock:
+                            errors.append(f"write: {e}")
+                created = list(Game.objects.filter(slug__startswith=f"stress-{number}-"))
+                for game in created:
+                    game.rating = game.total_rating_count
+                for chunk in db.chunks(created):
+                    try:
+                        with transaction.atomic():
+                            Game.objects.bulk_update(chunk, ['rating'])
+                    except OperationalError as e:
+                        with lock:
+                            errors.append(f"write: {e}")
+            finally:
+                connections.close_all()
+
+        readers = [threading.Thread(target=reader) for _ in range(self.READERS)]
+        writers = [threading.Thread(target=writer, args=(n,)) for n in range(self.WRITERS)]
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        stop.set()
+        for thread in readers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertGreater(len(reads), 0)
+        self.assertEqual(Game.objects.filter(rating__isnull=False).count(), self.WRITERS * self.ROWS_PER_WRITER)
+
+    def test_stress_db_command(self):
+        # The command raises CommandError on any lock error
+        call_command(
+            'stress_db', '--readers', '3', '--writers', '2', '--rows', '2000', '--work-ms', '5',
+            stdout=io.StringIO(),
+        )
+
+
+class NormalizedTitleTests(TestCase):
+    """clean_title / franchise_root are filled for every game, and deals match on them."""
+
+    def test_migration_fills_existing_games(self):
+        game = Game.objects.create(title="The Witcher 3: Wild Hunt", slug="witcher-3")
+        Game.objects.filter(pk=game.pk).update(clean_title='', franchise_root='') # Row from before 0003
+
+        migration = importlib.import_module('whichgame.migrations.0003_game_clean_title_franchise_root')
+        migration.fill_titles(apps, None)
+
+        game.refresh_from_db()
+        self.assertEqual(game.clean_title, "thewitcher3wildhunt")
+        self.assertEqual(game.franchise_root, "witcher")
+
+    def test_deal_matches_accented_title(self):
+        game = Game.objects.create(title="Pokémon Écarlate", slug="pokemon-ecarlate", platforms=["PC (Microsoft Windows)"])
+        Game.objects.create(title="Unrelated", slug="unrelated", platforms=["PC (Microsoft Windows)"])
+
+        command = sync_hot_deals.Command(stdout=io.StringIO())
+        command.rows = Counter() # Set by TrackedCommand.execute()
+        updated = command._update_local_games({command._clean_title("POKEMON ECARLATE!"): 9.99})
+
+        self.assertEqual(updated, 1)
+        game.refresh_from_db()
+        self.assertEqual(str(game.price_current), "9.99")
+        self.assertIsNone(Game.objects.get(slug="unrelated").price_current)
+
+
+@override_settings(JOBS_SPAWN_WORKER=False)
+class JobQueueTests(TestCase):
+    """A queued job nobody will run must not block its command forever."""
+
+    def _age(self, job, delta):
+        CommandJob.objects.filter(pk=job.pk).update(created_at=timezone.now() - delta)
+
+    def test_expired_queued_job_does_not_block_enqueue(self):
+        old, _ = jobs.enqueue('link_remakes')
+        self._age(old, jobs.QUEUED_EXPIRE_AFTER + timedelta(minutes=1))
+
+        job, created = jobs.enqueue('link_remakes')
+
+        self.assertTrue(created)
+        old.refresh_from_db()
+        self.assertEqual(old.status, CommandJob.STATUS_FAILED)
+
+    def test_queued_job_waits_behind_a_live_worker(self):
+        now = timezone.now()
+        CommandJob.objects.create(command='update_prices', dedupe_key='update_prices', status=CommandJob.STATUS_RUNNING, heartbeat_at=now)
+        old, _ = jobs.enqueue('link_remakes')
+        self._age(old, jobs.QUEUED_EXPIRE_AFTER + timedelta(minutes=1))
+
+        job, created = jobs.enqueue('link_remakes')
+
+        self.assertFalse(created)
+        self.assertEqual(job.pk, old.pk)
+
+    def test_worker_is_respawned_for_a_stale_queued_job(self):
+        old, _ = jobs.enqueue('link_remakes')
+        self._age(old, jobs.QUEUED_RESPAWN_AFTER + timedelta(minutes=1))
+
+        with override_settings(JOBS_SPAWN_WORKER=True), mock.patch.object(jobs, 'spawn_worker') as spawn_worker:
+            job, created = jobs.enqueue('link_remakes')
+
+        self.assertFalse(created)
+        spawn_worker.assert_called_once_with()
+
+    def test_pool_threads_only_buffer_output(self):
+        job, _ = jobs.enqueue('link_remakes')
+        out = jobs.JobOutput(job)
+
+        thread = threading.Thread(target=lambda: (out.write("from a pool thread\n"), out.flush()))
+        thread.start()
+        thread.join()
+        job.refresh_from_db()
+        self.assertEqual(job.output, '')
+
+        out.flush()
+        job.refresh_from_db()
+        self.assertEqual(job.output, "from a pool thread\n")
+        self.assertEqual(job.output_length, len("from a pool thread\n"))
+
+
+class HttpCacheBypassTests(SimpleTestCase):
+    """--no-cache only affects the command that asked for it (and its own thread pool)."""
+
+    def test_bypass_is_local_to_the_caller(self):
+        seen = []
+        with http_cache.bypass():
+            thread = threading.Thread(target=lambda: seen.append(http_cache._bypass.get()))
+            thread.start()
+            thread.join()
+            self.assertTrue(http_cache._bypass.get())
+        self.assertFalse(http_cache._bypass.get())
+        self.assertEqual(seen, [False])
+
+    def test_post_many_threads_inherit_bypass(self):
+        with mock.patch.object(igdb, 'config', return_value='client-id'):
+            client = igdb.Client('token', workers=4)
+
+        with mock.patch.object(igdb.Client, 'post', side_effect=lambda endpoint, query: http_cache._bypass.get()):
+            with http_cache.bypass():
+                results = client.post_many('games', ['a', 'b', 'c', 'd'])
+            self.assertEqual([result for _, result, _ in results], [True] * 4)
+            results = client.post_many('games', ['a', 'b'])
+            self.assertEqual([result for _, result, _ in results], [False] * 2)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ExplorerApiTests(TestCase):
+    """JSON explorer: cache key / ETag, cursor validation and keyset pagination."""
+    url = '/en/api/v1/explorer/'
+
+    def setUp(self):
+        cache.clear()
+
+    def test_dropped_deals_etag_follows_the_window_day(self):
+        tomorrow = timezone.now() + timedelta(days=1)
+
+        dropped_today = self.client.get(self.url, {'deal': 'dropped'})['ETag']
+        plain_today = self.client.get(self.url)['ETag']
+        with mock.patch('django.utils.timezone.now', return_value=tomorrow):
+            dropped_tomorrow = self.client.get(self.url, {'deal': 'dropped'})['ETag']
+            plain_tomorrow = self.client.get(self.url)['ETag']
+
+        self.assertNotEqual(dropped_today, dropped_tomorrow)
+        self.assertEqual(plain_today, plain_tomorrow)
+
+    def test_dropped_deal_leaves_the_list_after_the_window(self):
+        game = Game.objects.create(
+            title="Dropped", slug="dropped", total_rating_count=500, rating=80,
+            price_current=5, price_lowest=5, price_dropped_at=timezone.now(),
+        )
+        later = timezone.now() + prices.DROP_WINDOW + timedelta(days=2)
+
+        response = self.client.get(self.url, {'deal': 'dropped'})
+        self.assertEqual([card['id'] for card in response.json()['results']], [game.id])
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            response = self.client.get(self.url, {'deal': 'dropped'})
+        self.assertEqual(response.json()['results'], [])
+
+    def _walk(self, params, limit=7, between_pages=None):
+        """Ids of every page, following next_cursor to the end."""
+        ids, cursor = [], None
+        while True:
+            page = explorer_api.page(params, cursor=cursor, limit=limit)
+            ids.extend(card['id'] for card in page['results'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                return ids
+            if between_pages:
+                between_pages()
+
+    def _catalog_with_ties(self):
+        # Three popularity levels x ratings in {None, 70, 80}: most games share their sort values
+        for i in range(60):
+            Game.objects.create(
+                title=f"Tie {i}", slug=f"tie-{i}", platforms=["PC"],
+                total_rating_count=(10, 50, 50)[i % 3], rating=(None, 70, 80, 80)[i % 4],
+            )
+
+    def test_cursor_pages_follow_the_full_order(self):
+        self._catalog_with_ties()
+        for params in ({}, {'platform': 'PC'}): # Popularity first / rating first (NULL ratings last)
+            with self.subTest(params=params):
+                fields = (*sort_fields(params), 'id')
+                expected = list(
+                    order_games(filter_games(Game.objects.all(), params), params)
+                    .order_by(*(F(field).desc(nulls_last=True) for field in fields))
+                    .values_list('id', flat=True)
+                )
+                ids = self._walk(params)
+                self.assertEqual(ids, expected)
+                self.assertEqual(len(ids), len(set(ids)))
+
+    def test_cursor_is_stable_while_games_are_added(self):
+        self._catalog_with_ties()
+        before = set(Game.objects.values_list('id', flat=True))
+        added = iter(range(100))
+
+        def add_top_game():
+            number = next(added)
+            Game.objects.create(title=f"New {number}", slug=f"new-{number}", total_rating_count=999, rating=99)
+
+        ids = self._walk({}, between_pages=add_top_game)
+
+        # Games inserted before the cursor are not seen, nothing is repeated or skipped
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(set(ids), before)
+
+    def test_invalid_cursors_are_rejected(self):
+        fields = 3 # total_rating_count, rating, id
+        for values in ([10, 5, True], [10, 5, None], [10, 5, 1.5], [10, False, 3], ['10', 5, 3], [10, 5]):
+            with self.subTest(values=values):
+                response = self.client.get(self.url, {'cursor': explorer_api.encode_cursor(values)})
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'cursor': 'not base64!'}).status_code, 400)
+        self.assertEqual(len(explorer_api.decode_cursor(explorer_api.encode_cursor([None, 5, 3]), fields)), fields)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class GameDetailCacheTests(TestCase):
+    """Conditional GET and the anonymous full-page cache of game detail pages."""
+
+    def setUp(self):
+        cache.clear()
+        self.game = Game.objects.create(title="Hollow Knight", slug="hollow-knight", total_rating_count=500, rating=90)
+        self.url = f'/en/game/{self.game.slug}/'
+
+    def test_etag_and_last_modified_give_304(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+    def test_update_changes_etag_and_page(self):
+        etag = self.client.get(self.url)['ETag']
+
+        self.game.title = "Hollow Knight: Voidheart Edition"
+        self.game.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, "Voidheart Edition")
+
+    def test_anonymous_page_is_served_from_cache(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(1): # updated_at only
+            cached = self.client.get(self.url)
+        self.assertEqual(cached.status_code, 200)
+        self.assertEqual(cached.content.count(b"Hollow Knight"), first.content.count(b"Hollow Knight"))
+
+    def test_logged_in_user_does_not_reuse_the_anonymous_etag(self):
+        anonymous_etag = self.client.get(self.url)['ETag']
+        self.client.force_login(User.objects.create_user('player'))
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=anonymous_etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], anonymous_etag)
+        self.assertFalse(response.has_header('Last-Modified'))
+
+
+class MinHashRecallTests(SimpleTestCase):
+    """LSH candidates must keep (almost) everything the exhaustive scorer would recommend."""
+    GENRES = ['Adventure', 'Role-playing (RPG)', 'Shooter', 'Platform', 'Indie', 'Strategy', 'Racing', 'Puzzle']
+    THEMES = ['Fantasy', 'Science fiction', 'Horror', 'Survival', 'Open world', 'Comedy', 'Historical', 'Stealth']
+
+    def _catalog(self, size=2000):
+        """Games drawn from 60 topics (own vocabulary + shared words), some in topic franchises."""
+        rng = random.Random(7)
+        topics = [[f"topic{t}word{w}" for w in range(40)] for t in range(60)]
+        common = [f"commonword{w}" for w in range(300)]
+        features = []
+        for game_id in range(1, size + 1):
+            topic = rng.randrange(len(topics))
+            features.append(GameFeatures(SimpleNamespace(
+                id=game_id,
+                summary=' '.join(rng.sample(topics[topic], 12) + rng.sample(common, 8)),
+                genres=rng.sample(self.GENRES[topic % 4:topic % 4 + 4], 2),
+                themes=rng.sample(self.THEMES, 2),
+                franchise_root=f"franchise{topic * 2 + rng.randrange(2)}" if rng.random() < 0.3 else '',
+            )))
+        return features
+
+    def test_candidates_capture_the_exhaustive_selection(self):
+        features = self._catalog()
+        lsh = MinHashLSH(features)
+
+        captured = []
+        for game in random.Random(1).sample(features, 150):
+            candidates = lsh.candidates(game)
+            self.assertLessEqual(len(candidates), lsh.max_candidates)
+
+            exact = sum(score(game, other) for other in top_recommendations(game, features))
+            approx = sum(score(game, other) for other in top_recommendations(game, candidates))
+            captured.append(approx / exact if exact else 1.0)
+
+        # Same measure as `calculate_recommendations --measure-recall` ("score captured")
+        self.assertGreaterEqual(sum(captured) / len(captured), 0.95)
+        self.assertGreaterEqual(min(captured), 0.8)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class PriceHistoryTests(TestCase):
+    """History rows only on a real change; day/week rollups and the deal columns follow them."""
+
+    def setUp(self):
+        self.game = Game.objects.create(title="Celeste", slug="celeste", total_rating_count=500, rating=90)
+        # Noon: the few minutes between two records never cross into another day
+        self.now = timezone.localtime().replace(hour=12, minute=0, second=0, microsecond=0)
+
+    def _record(self, price, minutes=0):
+        return prices.record_prices([(self.game, price)], PriceHistory.SOURCE_SEARCH, now=self.now + timedelta(minutes=minutes))
+
+    def test_history_written_only_on_change(self):
+        self.assertEqual(len(self._record(20)), 1)
+        self.assertEqual(self._record(20, 1), [])
+        self.assertEqual(self._record("20.00", 2), [])
+        self.assertEqual(self._record(None, 3), []) # Unreadable price
+        self.assertEqual(len(self._record(15, 4)), 1)
+
+        self.assertEqual(
+            list(PriceHistory.objects.filter(game=self.game).order_by('recorded_at').values_list('price', flat=True)),
+            [Decimal('20.00'), Decimal('15.00')],
+        )
+
+    def test_rollups_and_deal_columns(self):
+        self._record(20)
+        self.game.refresh_from_db()
+        self.assertIsNone(self.game.price_dropped_at) # First observation is not a drop
+        self.assertFalse(filter_games(Game.objects.all(), {'deal': 'lowest'}).exists())
+
+        self._record(15, 1)
+        self._record(25, 2)
+
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.price_current, Decimal('25.00'))
+        self.assertEqual(self.game.price_lowest, Decimal('15.00'))
+        self.assertEqual(self.game.price_dropped_at, self.now + timedelta(minutes=1))
+
+        starts = prices.period_starts(timezone.localdate(self.now))
+        for period, start in starts.items():
+            with self.subTest(period=period):
+                rollup = PriceRollup.objects.get(game=self.game, period=period)
+                self.assertEqual(rollup.period_start, start)
+                self.assertEqual(
+                    (rollup.price_min, rollup.price_max, rollup.price_close),
+                    (Decimal('15.00'), Decimal('25.00'), Decimal('25.00')),
+                )
+
+        self._record(15, 3)
+        self.assertTrue(filter_games(Game.objects.all(), {'deal': 'lowest'}).exists())
+
+    def test_prune_keeps_weekly_rollups_for_the_lowest_price(self):
+        self._record(20)
+        self._record(12, 1)
+        self._record(30, 2)
+
+        later = self.now + prices.DAILY_RETENTION + timedelta(days=30)
+        raw, daily = prices.prune(now=later)
+        self.assertEqual((raw, daily), (3, 1))
+        self.assertEqual(PriceRollup.objects.filter(period=PriceRollup.PERIOD_WEEK).count(), 1)
+
+        Game.objects.filter(pk=self.game.pk).update(price_lowest=None)
+        prices.rebuild_lowest()
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.price_lowest, Decimal('12.00'))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class UpsertTests(TestCase):
+    """An IGDB payload identical to the stored game writes nothing (updated_at and caches stay valid)."""
+
+    def setUp(self):
+        self.defaults = {
+            'title': "Outer Wilds", 'slug': "outer-wilds", 'summary': "A space exploration game.",
+            'rating': 92, 'total_rating_count': 800, 'genres': ["Adventure"], 'platforms': ["PC (Microsoft Windows)"],
+        }
+        self.game, status = ingest.upsert_game(1001, self.defaults)
+        self.assertEqual(status, ingest.NEW)
+
+    def test_same_payload_is_a_single_read(self):
+        with self.assertNumQueries(1):
+            game, status = ingest.upsert_game(1001, dict(self.defaults))
+
+        self.assertEqual(status, ingest.UNCHANGED)
+        self.assertEqual(game.updated_at, self.game.updated_at)
+
+    def test_same_stored_values_only_update_the_hash(self):
+        # 92.4 is stored as 92: another payload, same row
+        with CaptureQueriesContext(connection) as queries:
+            game, status = ingest.upsert_game(1001, {**self.defaults, 'rating': 92.4})
+
+        self.assertEqual(status, ingest.UNCHANGED)
+        writes = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(writes), 1)
+        self.assertNotIn('"updated_at"', writes[0])
+        game.refresh_from_db()
+        self.assertEqual(game.updated_at, self.game.updated_at)
+
+    def test_changed_payload_writes_only_modified_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            game, status = ingest.upsert_game(1001, {**self.defaults, 'rating': 95})
+
+        self.assertEqual(status, ingest.CHANGED)
+        writes = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(writes), 1)
+        self.assertIn('"rating"', writes[0])
+        for column in ('"summary"', '"title"', '"genres"', '"platforms"'):
+            self.assertNotIn(column, writes[0])
+        game.refresh_from_db()
+        self.assertEqual(game.rating, 95)
+        self.assertGreater(game.updated_at, self.game.updated_at)
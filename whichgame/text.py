@@ -0,0 +1,44 @@
+"""
+Normalisation des titres, partagée par le matching de prix (CheapShark), l'autocomplétion
+et les recommandations. `clean_title` et `franchise_root` sont aussi stockés sur `Game`.
+"""
+import re
+import unicodedata
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]')
+_ROMAN_NUMERALS = re.compile(r'\b(i|ii|iii|iv|v|vi|vii|viii|ix|x)\b')
+_PUNCTUATION = re.compile(r'[^\w\s]')
+
+
+def fold_accents(text):
+    """'Pokémon Écarlate' -> 'Pokemon Ecarlate'."""
+    return unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode('ascii')
+
+
+def clean_title(title):
+    """
+    Supprime accents, ponctuation et espaces pour un matching strict.
+    Ex: "Assassin's Creed® II" -> "assassinscreedii"
+    """
+    return _NON_ALNUM.sub('', fold_accents(title).lower())
+
+
+def title_words(title):
+    """Mots normalisés d'un titre (même normalisation que `clean_title`, mot par mot)."""
+    return [w for w in (clean_title(part) for part in fold_accents(title).split()) if w]
+
+
+def franchise_root(title):
+    """
+    Nom de base de la franchise, pour détecter suites et spin-offs.
+    Ex: "The Witcher 3: Wild Hunt" -> "witcher", "Final Fantasy VII" -> "final"
+    """
+    if not title:
+        return ""
+    t = _ROMAN_NUMERALS.sub('', title.lower()) # Chiffres romains isolés
+    t = _PUNCTUATION.sub('', t)
+    for prefix in ['the ', 'a ', 'super ']:
+        if t.startswith(prefix):
+            t = t[len(prefix):]
+    words = t.split()
+    return words[0] if words else ""
@@ -1,9 +1,12 @@
 from django.urls import path
-from .views import HomeListView, HomeView, GameDetailView, delete_game
+from .views import HomeListView, HomeView, GameDetailView, delete_game, wishlist_recommendations, autocomplete, explorer_api_v1
 
 urlpatterns = [
     path('', HomeView.as_view(), name='home'),
     path('explorer/', HomeListView.as_view(), name='game_list'),
     path('game/<slug:slug>/', GameDetailView.as_view(), name='game_detail'),
     path('game/<int:pk>/delete/', delete_game, name='delete_game'),
+    path('api/autocomplete/', autocomplete, name='autocomplete'),
+    path('api/wishlist/recommendations/', wishlist_recommendations, name='wishlist_recommendations'),
+    path('api/v1/explorer/', explorer_api_v1, name='explorer_api_v1'),
 ]
\ No newline at end of file
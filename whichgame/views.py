@@ -1,119 +1,52 @@
-import io
-import time
+import hmac
 
+from django.conf import settings
 from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import get_object_or_404, redirect
-from django.core.management import call_command
+from django.urls import reverse
 from django.contrib import messages
 from django.utils.html import format_html
-from django.http import HttpResponse
+from django.db.models import Prefetch
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from django.template import Template, RequestContext
 from django.views.generic import ListView, TemplateView, DetailView
-from django.db.models import Q
-from .models import Game , GameCollection
+from django.views.decorators.http import condition
+from django.utils.decorators import method_decorator
+from django.utils.translation import get_language
+from django.middleware.csrf import get_token
+from .models import Game , GameCollection, CommandJob
+from .jobs import enqueue
+from django.core.cache import cache
+from . import caching, explorer_api, facets, feature_index, metrics, search_index
+from .filters import GENRES, PLATFORMS, drop_window_key, filter_games, order_games
 
 class HomeListView(ListView):
     model = Game
     paginate_by = 24
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        
-        # Récupération des paramètres GET
-        price = self.request.GET.get('price')
-        duration = self.request.GET.get('duration')
-        platform = self.request.GET.get('platform')
-        genre = self.request.GET.get('genre')
-        year_min = self.request.GET.get('year_min')
-        year_max = self.request.GET.get('year_max')
-        search = self.request.GET.get('search')
-        wishlist_ids = self.request.GET.get('wishlist_ids')
-
-        # 1. Barre de Recherche (Recherche dans le titre OU le slug)
-        if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) | Q(slug__icontains=search)
-            )
-
-        # 2. Filtre Prix
-        if price:
-            try:
-                price_val = float(price)
-                # On garde les jeux MOINS CHERS que la limite OU ceux qui n'ont PAS DE PRIX (None)
-                queryset = queryset.filter(
-                    Q(price_current__lte=price_val) | Q(price_current__isnull=True)
-                )
-            except ValueError:
-                pass
-
-        # 3. Filtre Durée
-        if duration == 'short':
-            queryset = queryset.filter(playtime_main__lte=10)
-        elif duration == 'medium':
-            queryset = queryset.filter(playtime_main__gt=10, playtime_main__lte=30)
-        elif duration == 'long':
-            queryset = queryset.filter(playtime_main__gt=30)
-
-        # 4. Filtre Plateforme (JSONField)
-        if platform:
-            # Comme platforms est une liste JSON ["PC", "PS5"], on utilise 'icontains'
-            # pour voir si le mot existe dans la liste.
-            queryset = queryset.filter(platforms__icontains=platform)
-        
-        # 5. Filtre Genre (JSONField)
-        if genre:
-            queryset = queryset.filter(genres__icontains=genre)
+        # Filtres et tri partagés avec les compteurs de facettes (voir filters.py)
+        queryset = filter_games(super().get_queryset(), self.request.GET)
 
-        # 6. Filtre Année
-
-        if year_min:
-            try:
-                queryset = queryset.filter(release_year__gte=int(year_min))
-            except ValueError:
-                pass
-        
-        if year_max:
-            try:
-                queryset = queryset.filter(release_year__lte=int(year_max))
-            except ValueError:
-                pass
-        
-       
-        if wishlist_ids:
-            try:
-                ids_list = [int(id) for id in wishlist_ids.split(',')]
-                queryset = queryset.filter(id__in=ids_list)
-            except ValueError:
-                pass
-
-        params = self.request.GET.copy()
-        
-        if 'page' in params:
-            del params['page']
-
-        if params:
-             queryset = queryset.filter(total_rating_count__gte=5)
-             return queryset.order_by('-rating', '-total_rating_count')
-
-        return queryset.order_by('-total_rating_count', '-rating')
+        # "Vous aimerez aussi" de chaque carte en une requête pour la page (au lieu de 2 par carte
+        # rendue), avec les seuls champs affichés par game_card.html
+        queryset = queryset.prefetch_related(
+            Prefetch('similar_games', queryset=Game.objects.only('id', 'slug', 'title', 'cover_url'))
+        )
+        return order_games(queryset, self.request.GET)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # On envoie la liste des plateformes pour le menu déroulant
-        # (Pour un MVP, on les écrit en dur pour éviter des requêtes complexes sur JSON)
-        context['platforms_list'] = [
-            "PC", "Mac", "Linux", 
-            "PlayStation 5", "PlayStation 4", 
-            "Xbox Series X|S", "Xbox One", 
-            "Nintendo Switch"
-        ]
-
-        # Liste des genres populaires (Statique pour MVP)
-        context['genres_list'] = [
-            "Role-playing (RPG)", "Adventure", "Shooter", 
-            "Platform", "Puzzle", "Strategy", "Indie", 
-            "Sport", "Racing", "Fighting", "Simulator"
-        ]
+
+        # Menus déroulants avec, pour chaque option, le nombre de jeux qu'elle donnerait
+        # compte tenu des autres filtres actifs (bitmaps en mémoire, voir facets.py)
+        counts = facets.facet_counts(self.request.GET)
+        context['platforms_list'] = [(value, counts['platform'][value]) for value in PLATFORMS]
+        context['genres_list'] = [(value, counts['genre'][value]) for value in GENRES]
+        context['duration_counts'] = counts['duration']
+
+        # Fait partie de la clé de cache des cartes (game_card.html) : change à chaque recalcul de l'IA
+        context['recommendations_version'] = caching.get_version(caching.RECOMMENDATIONS)
         
         return context
 
@@ -133,11 +66,188 @@ class HomeView(TemplateView):
         return context
 
 
+def _game_updated_at(request, slug):
+    """
+    Date de dernière modification du jeu (None s'il n'existe pas).
+    Mémorisée sur la requête : ETag, Last-Modified et cache de page partagent la même requête SQL.
+    """
+    if not hasattr(request, '_game_updated_at'):
+        request._game_updated_at = Game.objects.filter(slug=slug).values_list('updated_at', flat=True).first()
+    return request._game_updated_at
+
+
+def _viewer(request):
+    """Variante du HTML selon le visiteur : base.html ajoute le formulaire et le store admin pour un superuser."""
+    user = request.user
+    if not user.is_authenticated:
+        return 'anon'
+    return 'admin' if user.is_superuser else 'user'
+
+
+def _game_etag(request, slug):
+    updated_at = _game_updated_at(request, slug)
+    if updated_at is None:
+        return None
+    # La langue et le type de visiteur font partie de l'ETag : /en/ et /fr/, anonyme et admin
+    # ne partagent pas le même HTML (pas de 304 avec la page d'un autre état de connexion)
+    return f'"{slug}-{get_language()}-{_viewer(request)}-{updated_at.timestamp():.6f}"'
+
+
+def _game_last_modified(request, slug):
+    # Last-Modified ne distingue pas les visiteurs : réservé aux anonymes, les autres passent par l'ETag
+    if request.user.is_authenticated:
+        return None
+    return _game_updated_at(request, slug)
+
+
+@method_decorator(condition(etag_func=_game_etag, last_modified_func=_game_last_modified), name='dispatch')
 class GameDetailView(DetailView):
     model = Game
     template_name = "game_detail.html"
     context_object_name = "game"
 
+    def get(self, request, *args, **kwargs):
+        slug = kwargs['slug']
+        language = get_language()
+        updated_at = _game_updated_at(request, slug)
+
+        # Cache pleine page : visiteurs anonymes uniquement, et sans paramètres GET (utm...)
+        self.use_page_cache = updated_at is not None and not request.user.is_authenticated and not request.GET
+
+        if self.use_page_cache:
+            content = caching.get_game_detail(slug, language, updated_at)
+            if content is not None:
+                return HttpResponse(content.replace(caching.CSRF_PLACEHOLDER.encode(), get_token(request).encode()))
+
+        response = super().get(request, *args, **kwargs)
+
+        if self.use_page_cache:
+            # 1. On stocke le HTML avec le marqueur CSRF... 2. ...puis on y injecte le vrai jeton du visiteur
+            response.add_post_render_callback(
+                lambda r: caching.set_game_detail(slug, language, updated_at, r.content)
+            )
+            response.add_post_render_callback(
+                lambda r: setattr(r, 'content', r.content.replace(caching.CSRF_PLACEHOLDER.encode(), get_token(request).encode()))
+            )
+        return response
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if self.use_page_cache:
+            # Prioritaire sur le context processor CSRF : le HTML mis en cache reste anonyme
+            context['csrf_token'] = caching.CSRF_PLACEHOLDER
+        return context
+
+def autocomplete(request):
+    """
+    Autocomplétion de la barre de recherche : GET ?q=witch&limit=8 -> JSON.
+    Servie depuis l'index de préfixes en mémoire du worker (aucune requête SQL).
+    """
+    query = request.GET.get('q', '')[:100]
+    try:
+        limit = min(max(int(request.GET.get('limit', 8)), 1), 20)
+    except ValueError:
+        limit = 8
+
+    # URL de détail construite une seule fois (reverse() par résultat coûterait plus cher que la recherche)
+    detail_url = reverse('game_detail', args=['__slug__'])
+
+    results = [
+        {
+            'id': game_id,
+            'title': title,
+            'slug': slug,
+            'cover_url': cover_url,
+            'release_year': release_year,
+            'url': detail_url.replace('__slug__', slug),
+        }
+        for game_id, title, slug, cover_url, release_year in search_index.get_index().search(query, limit=limit)
+    ]
+
+    response = JsonResponse({'query': query, 'results': results})
+    response['Cache-Control'] = 'public, max-age=300'
+    return response
+
+
+def wishlist_recommendations(request):
+    """
+    Recommandations "Parce que vous avez sauvegardé..." pour une wishlist.
+    GET ?ids=12,45,78&limit=12 -> JSON. Servi depuis l'index en mémoire du worker (aucune requête SQL).
+    """
+    try:
+        ids = [int(i) for i in request.GET.get('ids', '').split(',') if i.strip()]
+    except ValueError:
+        return JsonResponse({'error': 'invalid ids'}, status=400)
+
+    try:
+        limit = min(max(int(request.GET.get('limit', 12)), 1), 50)
+    except ValueError:
+        limit = 12
+
+    index = feature_index.get_index()
+    return JsonResponse({
+        'version': list(index.version),
+        'results': index.recommend(ids, limit=limit),
+    })
+
+
+def _explorer_api_key(request):
+    """
+    Clé de cache (et base de l'ETag) d'une page de l'API : versions du catalogue et des
+    recommandations, jour de la fenêtre deal=dropped + paramètres triés.
+    Mémorisée sur la requête, comme _game_updated_at.
+    """
+    if not hasattr(request, '_explorer_api_key'):
+        query = request.GET.copy()
+        query.pop('limit', None) # Normalisé par la vue, voir _explorer_api_limit
+        query['limit'] = str(_explorer_api_limit(request))
+        request._explorer_api_key = caching.explorer_api_key(
+            '&'.join(sorted(query.urlencode().split('&'))),
+            caching.get_version(caching.CATALOG),
+            caching.get_version(caching.RECOMMENDATIONS),
+            drop_window_key(request.GET),
+        )
+    return request._explorer_api_key
+
+
+def _explorer_api_limit(request):
+    try:
+        return min(max(int(request.GET.get('limit', explorer_api.DEFAULT_LIMIT)), 1), explorer_api.MAX_LIMIT)
+    except ValueError:
+        return explorer_api.DEFAULT_LIMIT
+
+
+def _explorer_api_etag(request):
+    # "explorer_api:12:3:2026-10-12:ab12..." -> "12-3-2026-10-12-ab12..." : change avec le catalogue,
+    # les recommandations, le jour (deal=dropped) et les paramètres
+    return '"{}"'.format(_explorer_api_key(request).split(':', 1)[1].replace(':', '-'))
+
+
+@condition(etag_func=_explorer_api_etag)
+def explorer_api_v1(request):
+    """
+    Explorateur en JSON : GET ?platform=PC&genre=Indie&cursor=...&limit=24 -> cartes compactes.
+    Mêmes filtres et même tri que HomeListView ; `next_cursor` donne la page suivante (voir explorer_api.py).
+    """
+    key = _explorer_api_key(request)
+    payload = cache.get(key)
+    if payload is None:
+        try:
+            payload = explorer_api.page(
+                explorer_api.filter_params(request.GET),
+                cursor=request.GET.get('cursor'),
+                limit=_explorer_api_limit(request),
+            )
+        except explorer_api.InvalidCursor:
+            return JsonResponse({'error': 'invalid cursor'}, status=400)
+        cache.set(key, payload, caching.EXPLORER_API_TIMEOUT)
+
+    response = JsonResponse(payload)
+    # Court côté navigateur / CDN ; au-delà, l'ETag (versions du catalogue) évite de renvoyer le corps
+    response['Cache-Control'] = 'public, max-age=60'
+    return response
+
+
 @staff_member_required
 def delete_game(request, pk):
     game = get_object_or_404(Game, pk=pk)
@@ -148,7 +258,7 @@ def delete_game(request, pk):
 @staff_member_required
 def run_command(request, cmd_name):
     """
-    Lance une commande SANS argument (ex: Recalcul IA, Import Global)
+    Met en file une commande SANS argument (ex: Recalcul IA, Import Global)
     """
     # Liste blanche
     ALLOWED_COMMANDS = {
@@ -161,39 +271,21 @@ def run_command(request, cmd_name):
         messages.error(request, f"⛔ Commande '{cmd_name}' inconnue.")
         return redirect('admin:index')
 
-    print(f"🚀 [ADMIN] Lancement de la commande : {cmd_name}...") # Log console
+    # 2. Mise en file (le worker `run_jobs` l'exécute en arrière-plan)
+    job, created = enqueue(cmd_name)
 
-    try:
-        start_time = time.time()
-        
-        # 2. Capture des logs
-        out = io.StringIO()
-        
-        # Astuce : On passe stdout ET stderr pour capturer les erreurs aussi
-        call_command(cmd_name, stdout=out, stderr=out)
-        
-        result = out.getvalue()
-        duration = round(time.time() - start_time, 2)
-        
-        print(f"✅ [ADMIN] Terminé en {duration}s") # Log console
-
-        # 3. Message de succès (limité à 1000 caractères pour ne pas casser l'affichage)
-        short_result = (result[:1000] + '...') if len(result) > 1000 else result
-        
+    if created:
+        print(f"🚀 [ADMIN] Commande mise en file : {cmd_name} (job #{job.pk})") # Log console
         messages.success(request, format_html(
-            f"✅ <b>{ALLOWED_COMMANDS[cmd_name]}</b> terminé en {duration}s !<br>"
-            f"<div style='background:#1e293b; color:#10b981; padding:10px; border-radius:5px; "
-            f"max-height:200px; overflow-y:auto; font-family:monospace; margin-top:5px;'>"
-            f"{short_result.replace(chr(10), '<br>')}"
-            f"</div>"
+            "🚀 <b>{}</b> lancé en arrière-plan.", ALLOWED_COMMANDS[cmd_name]
+        ))
+    else:
+        messages.warning(request, format_html(
+            "⏳ <b>{}</b> est déjà en cours : suivi du job existant.", ALLOWED_COMMANDS[cmd_name]
         ))
 
-    except Exception as e:
-        print(f"❌ [ADMIN] Erreur : {str(e)}") # Log console
-        messages.error(request, f"❌ Erreur critique : {str(e)}")
-
-    # 4. Redirection FORCÉE vers l'accueil admin (plus sûr que Referer)
-    return redirect('admin:index')
+    # 3. Redirection vers la page de suivi du job
+    return redirect('admin_job_detail', pk=job.pk)
 
 
 @staff_member_required
@@ -204,16 +296,14 @@ def import_franchise_view(request):
     if request.method == "POST":
         franchise_name = request.POST.get("franchise_name")
         if franchise_name:
-            try:
-                out = io.StringIO()
-                call_command('import_franchise', franchise_name, stdout=out, stderr=out)
-                result = out.getvalue()
-                messages.success(request, format_html(f"✅ Import de <b>{franchise_name}</b> terminé !<br><pre>{result}</pre>"))
-            except Exception as e:
-                messages.error(request, f"❌ Erreur : {str(e)}")
-        else:
-            messages.warning(request, "Veuillez entrer un nom.")
-            
+            job, created = enqueue('import_franchise', franchise_name)
+            if created:
+                messages.success(request, format_html("🚀 Import de <b>{}</b> lancé en arrière-plan.", franchise_name))
+            else:
+                messages.warning(request, format_html("⏳ Import de <b>{}</b> déjà en cours.", franchise_name))
+            return redirect('admin_job_detail', pk=job.pk)
+
+        messages.warning(request, "Veuillez entrer un nom.")
         return redirect('admin:index')
 
     # --- LE TEMPLATE HTML ---
@@ -255,4 +345,112 @@ def import_franchise_view(request):
         'site_title': 'WhichGame Admin',
     })
     
-    return HttpResponse(template.render(context))
\ No newline at end of file
+    return HttpResponse(template.render(context))
+
+
+def metrics_view(request):
+    """
+    Métriques du worker au format Prometheus. Réservé au staff, ou au scraper qui envoie
+    `Authorization: Bearer <METRICS_TOKEN>`.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    authorized = token and hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}")
+    if not authorized and not (request.user.is_active and request.user.is_staff):
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@staff_member_required
+def job_status(request, pk):
+    """
+    Endpoint JSON interrogé par la page de suivi.
+    `?offset=N` ne renvoie que la sortie produite depuis le caractère N (compté depuis le début de
+    la commande, même si `output` n'en garde que la fin).
+    """
+    job = get_object_or_404(CommandJob, pk=pk)
+
+    try:
+        offset = max(0, int(request.GET.get('offset', 0)))
+    except ValueError:
+        offset = 0
+
+    # `output` couvre les caractères [window_start, output_length[ de la sortie complète
+    window_start = job.output_length - len(job.output)
+    truncated = offset < window_start # Le client a manqué du texte sorti de la fenêtre
+
+    return JsonResponse({
+        'id': job.pk,
+        'command': str(job),
+        'status': job.status,
+        'status_label': job.get_status_display(),
+        'is_active': job.is_active,
+        'duration': job.duration,
+        'output': job.output[max(0, offset - window_start):],
+        'offset': job.output_length,
+        'truncated': truncated,
+        'error': job.error,
+    })
+
+
+@staff_member_required
+def job_detail(request, pk):
+    """
+    Page de suivi d'un job : la sortie de la commande s'affiche en direct (polling JSON).
+    """
+    job = get_object_or_404(CommandJob, pk=pk)
+
+    html_content = """
+    {% extends "admin/base_site.html" %}
+
+    {% block content %}
+    <div style="max-width: 900px; margin: 40px auto; background: #1e293b; padding: 30px; border-radius: 10px; color: white; box-shadow: 0 4px 6px rgba(0,0,0,0.3);">
+        <h1 style="color: #a78bfa; margin-bottom: 10px; font-size: 1.5rem;"><i class="fas fa-terminal"></i> Job #{{ job.pk }} : {{ job }}</h1>
+        <p style="color: #cbd5e1;">Statut : <b id="job-status">{{ job.get_status_display }}</b> <span id="job-duration"></span></p>
+
+        <pre id="job-output" style="background:#0f172a; color:#10b981; padding:10px; border-radius:5px; height:400px; overflow-y:auto; font-family:monospace; white-space:pre-wrap;">{{ job.output }}</pre>
+        <p id="job-error" style="color: #f87171;">{{ job.error }}</p>
+
+        <div style="text-align: center;">
+            <a href="/admin/" style="color: #94a3b8; text-decoration: none; font-size: 0.9rem;">← Retour au tableau de bord</a>
+        </div>
+    </div>
+
+    <script>
+        (function () {
+            var offset = {{ job.output_length }};
+            var output = document.getElementById('job-output');
+
+            function poll() {
+                fetch("{% url 'admin_job_status' job.pk %}?offset=" + offset, {credentials: 'same-origin'})
+                    .then(function (r) { return r.json(); })
+                    .then(function (data) {
+                        if (data.truncated) {
+                            output.textContent += '\\n[...]\\n';
+                        }
+                        if (data.output) {
+                            output.textContent += data.output;
+                            output.scrollTop = output.scrollHeight;
+                        }
+                        offset = data.offset;
+                        document.getElementById('job-status').textContent = data.status_label;
+                        document.getElementById('job-duration').textContent = data.duration !== null ? '(' + data.duration + 's)' : '';
+                        document.getElementById('job-error').textContent = data.error;
+                        if (data.is_active) { setTimeout(poll, 1500); }
+                    })
+                    .catch(function () { setTimeout(poll, 5000); });
+            }
+
+            {% if job.is_active %}poll();{% endif %}
+        })();
+    </script>
+    {% endblock %}
+    """
+
+    template = Template(html_content)
+    context = RequestContext(request, {
+        'site_header': 'WhichGame Admin',
+        'site_title': 'WhichGame Admin',
+        'job': job,
+    })
+
+    return HttpResponse(template.render(context))